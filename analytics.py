@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta, time
+from sqlalchemy import func, Date, Float
+from sqlalchemy.exc import CompileError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.sql.visitors import InternalTraversal
+from app import db
+from models import User, Task
+
+# Analytics expressions that compile to native SQL on each supported database,
+# so durations and date buckets are computed by the database on both backends.
+
+BUCKET_UNITS = ('day', 'week', 'month')
+
+class date_bucket(FunctionElement):
+    """Truncate a datetime to the start of its day, week (Monday) or month, as a DATE"""
+    type = Date()
+    name = 'date_bucket'
+    inherit_cache = True
+    # The unit changes the SQL, so it must be part of the statement cache key
+    _traverse_internals = FunctionElement._traverse_internals + [('unit', InternalTraversal.dp_string)]
+
+    def __init__(self, expr, unit='day'):
+        if unit not in BUCKET_UNITS:
+            raise ValueError(f"Unknown bucket unit: {unit}")
+        self.unit = unit
+        super().__init__(expr)
+
+class hours_between(FunctionElement):
+    """Hours from one datetime to another, as a float"""
+    type = Float()
+    name = 'hours_between'
+    inherit_cache = True
+
+def _arguments(element, compiler, **kw):
+    return [compiler.process(arg, **kw) for arg in element.clauses]
+
+@compiles(date_bucket)
+def _date_bucket_default(element, compiler, **kw):
+    raise CompileError(f"date_bucket is not supported on {compiler.dialect.name}")
+
+@compiles(date_bucket, 'sqlite')
+def _date_bucket_sqlite(element, compiler, **kw):
+    (expr,) = _arguments(element, compiler, **kw)
+    modifiers = {
+        'day': '',
+        'week': ", 'weekday 0', '-6 days'",
+        'month': ", 'start of month'",
+    }[element.unit]
+    return f"date({expr}{modifiers})"
+
+@compiles(date_bucket, 'postgresql')
+def _date_bucket_postgresql(element, compiler, **kw):
+    (expr,) = _arguments(element, compiler, **kw)
+    if element.unit == 'day':
+        return f"CAST({expr} AS DATE)"
+    return f"CAST(date_trunc('{element.unit}', {expr}) AS DATE)"
+
+@compiles(hours_between)
+def _hours_between_default(element, compiler, **kw):
+    raise CompileError(f"hours_between is not supported on {compiler.dialect.name}")
+
+@compiles(hours_between, 'sqlite')
+def _hours_between_sqlite(element, compiler, **kw):
+    start, end = _arguments(element, compiler, **kw)
+    return f"((julianday({end}) - julianday({start})) * 24.0)"
+
+@compiles(hours_between, 'postgresql')
+def _hours_between_postgresql(element, compiler, **kw):
+    start, end = _arguments(element, compiler, **kw)
+    return f"(EXTRACT(EPOCH FROM ({end} - {start})) / 3600.0)"
+
+# Live queries straight from tasks. The analytics page reads the
+# task_daily_stats rollup; these are its reference for checks and benchmarks.
+
+def live_completions(days=30, unit='day'):
+    """(bucket start, completed count) over tasks completed in the last `days`"""
+    # Whole days, matching the rollup's day granularity
+    since = datetime.combine((datetime.utcnow() - timedelta(days=days)).date(), time.min)
+    bucket = date_bucket(Task.completed_at, unit).label('bucket')
+    return db.session.query(bucket, func.count().label('completed_count')).filter(
+        Task.completed_at >= since
+    ).group_by(bucket).order_by(bucket).all()
+
+def live_productivity():
+    """Per assignee: name, total and completed tasks, and average hours to complete"""
+    completed = func.count(Task.completed_at)
+    return db.session.query(
+        User.first_name,
+        User.last_name,
+        func.count(Task.id).label('total_tasks'),
+        completed.label('completed_tasks'),
+        func.avg(hours_between(Task.created_at, Task.completed_at)).label('avg_completion_time'),
+    ).join(Task, Task.assignee_id == User.id).group_by(
+        User.id, User.first_name, User.last_name
+    ).order_by(User.first_name, User.last_name).all()
@@ -13,13 +13,16 @@ except ImportError:
     # python-dotenv not installed, continue without it
     pass
 
+import config
+from replicas import RoutingSession, replica_binds
+
 # Configure logging
-logging.basicConfig(level=logging.DEBUG)
+logging.basicConfig(level=config.LOG_LEVEL)
 
 class Base(DeclarativeBase):
     pass
 
-db = SQLAlchemy(model_class=Base)
+db = SQLAlchemy(model_class=Base, session_options={'class_': RoutingSession})
 
 # Create the app
 app = Flask(__name__)
@@ -34,10 +37,9 @@ if not database_url:
     print("Warning: No DATABASE_URL found. Using SQLite database for development.")
 
 app.config["SQLALCHEMY_DATABASE_URI"] = database_url
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = config.engine_options(database_url)
+# Read replicas, if configured; see replicas.py for what reads from them
+app.config["SQLALCHEMY_BINDS"] = replica_binds()
 
 # Initialize the app with the extension
 db.init_app(app)
@@ -45,5 +47,13 @@ db.init_app(app)
 with app.app_context():
     # Import models to ensure tables are created
     import models  # noqa: F401
-    db.create_all()
-    logging.info("Database tables created")
+    import rollups  # noqa: F401  (keeps task_daily_stats in step with task changes)
+    
+    if not config.IS_PRODUCTION:
+        # In production the schema is managed by upgrade_db.py at deploy time
+        # rather than by every worker as it starts
+        db.create_all()
+        logging.info("Database tables created")
+        
+        from search import setup_search
+        setup_search()
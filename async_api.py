@@ -0,0 +1,184 @@
+"""
+Async read-only API for the polling endpoints, as a small ASGI app.
+
+Serves GET /api/dashboard-stats and GET /api/tasks on an async SQLAlchemy
+engine, so a worker waiting on the database is free to serve other pollers.
+The queries are the ones the Flask views use: each handler runs them through
+AsyncSession.run_sync, whose I/O goes over the async driver.
+
+Run it next to the Flask app and route those two paths to it, e.g.
+    uvicorn async_api:app --port 5001
+Requires an async driver: asyncpg for PostgreSQL, aiosqlite for SQLite.
+Logins come from the Flask session cookie; writes stay in the Flask app.
+"""
+
+import os
+from datetime import datetime
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qsl
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import parse_etags
+from itsdangerous import BadSignature
+from app import app as flask_app, database_url
+from principal import principal_cache, load_principal
+from stats import get_task_stats
+from conditional import compute_etag
+from pagination import paginate_tasks
+from deadlines import deadline_windows, with_due_state
+from sync import current_sync_token
+from routes import get_task_filters, filtered_task_query, search_relevance, with_task_people, task_to_json
+
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'postgres': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+# Pollers wait on the pool rather than each holding a connection, so a small
+# pool serves many concurrent requests
+ASYNC_POOL_SIZE = int(os.environ.get("ASYNC_DB_POOL_SIZE", 10))
+ASYNC_MAX_OVERFLOW = int(os.environ.get("ASYNC_DB_MAX_OVERFLOW", 10))
+
+def async_database_url(url):
+    """The DATABASE_URL with its driver swapped for the async one"""
+    url = make_url(url)
+    backend = url.drivername.split('+')[0]
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}")
+    url = url.set(drivername=ASYNC_DRIVERS[backend])
+    if backend != 'sqlite' and 'sslmode' in url.query:
+        # asyncpg spells libpq's sslmode as ssl
+        url = url.difference_update_query(['sslmode']).update_query_dict({'ssl': url.query['sslmode']})
+    return url
+
+def create_engine_for(url):
+    url = async_database_url(url)
+    options = {'pool_pre_ping': True, 'pool_recycle': 300}
+    if url.get_backend_name() != 'sqlite':
+        options.update(pool_size=ASYNC_POOL_SIZE, max_overflow=ASYNC_MAX_OVERFLOW)
+    return create_async_engine(url, **options)
+
+engine = create_engine_for(database_url)
+AsyncSession = async_sessionmaker(engine, expire_on_commit=False)
+
+class Request:
+    """The parts of an ASGI HTTP request the handlers need"""
+
+    def __init__(self, scope):
+        self.path = scope['path']
+        self.query_string = scope.get('query_string', b'').decode('latin-1')
+        self.headers = {name.decode('latin-1').lower(): value.decode('latin-1')
+                        for name, value in scope.get('headers', [])}
+        self.args = MultiDict(parse_qsl(self.query_string, keep_blank_values=True))
+
+    @property
+    def full_path(self):
+        # Same form as Flask's request.full_path, so ETag variants match
+        return f"{self.path}?{self.query_string}"
+
+    def cookie(self, name):
+        cookies = SimpleCookie()
+        cookies.load(self.headers.get('cookie', ''))
+        return cookies[name].value if name in cookies else None
+
+def json_response(data, status=200, headers=None):
+    return status, {'content-type': 'application/json', **(headers or {})}, flask_app.json.dumps(data).encode()
+
+def flask_session(request):
+    """The Flask session cookie's data; empty if missing, forged or expired"""
+    cookie = request.cookie(flask_app.config['SESSION_COOKIE_NAME'])
+    if not cookie:
+        return {}
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    try:
+        return serializer.loads(cookie, max_age=int(flask_app.permanent_session_lifetime.total_seconds()))
+    except BadSignature:
+        return {}
+
+async def current_user(request, session):
+    """The logged-in, active user as a Principal, cached per process as in the Flask views"""
+    data = flask_session(request)
+    user_id = data.get('user_id')
+    if user_id is None:
+        return None
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        principal = await session.run_sync(lambda s: load_principal(user_id, s))
+        if principal is not None:
+            principal_cache.put(principal)
+    if principal is None or not principal.is_active:
+        return None
+    return principal.with_task_scope(data.get('task_scope'))
+
+async def conditional(request, session, user, variant, weak, build, windows=()):
+    """ETag handling as in conditional.conditional_get: 304 when unchanged, else build the body"""
+    etag = await session.run_sync(lambda s: compute_etag(user, *variant, session=s, windows=windows))
+    headers = {'etag': f'W/"{etag}"' if weak else f'"{etag}"', 'cache-control': 'private, no-cache'}
+    # If-None-Match always uses weak comparison
+    if parse_etags(request.headers.get('if-none-match')).contains_weak(etag):
+        return 304, headers, b''
+    return json_response(await session.run_sync(build), headers=headers)
+
+async def dashboard_stats(request, session, user):
+    return await conditional(request, session, user, (), False, lambda s: get_task_stats(user, s))
+
+async def tasks(request, session, user):
+    def build(s):
+        filters = get_task_filters(request.args)
+        query = with_due_state(with_task_people(filtered_task_query(user, filters, s)))
+        tasks_list, next_cursor = paginate_tasks(query, filters['sort'], filters['order'],
+                                                 request.args.get('cursor'),
+                                                 request.args.get('per_page', type=int),
+                                                 relevance=search_relevance(filters, s))
+        return {
+            'tasks': [task_to_json(task, user) for task in tasks_list],
+            'next_cursor': next_cursor,
+            'sync_token': current_sync_token()
+        }
+
+    variant = (request.full_path, datetime.utcnow().date())
+    return await conditional(request, session, user, variant, True, build, deadline_windows(request.args))
+
+ROUTES = {
+    '/api/dashboard-stats': dashboard_stats,
+    '/api/tasks': tasks,
+}
+
+async def handle(request, handler):
+    async with AsyncSession() as session:
+        user = await current_user(request, session)
+        if user is None:
+            return json_response({'error': 'Login required'}, status=401)
+        return await handler(request, session, user)
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    if scope['type'] != 'http':
+        return
+
+    handler = ROUTES.get(scope['path'])
+    if handler is None:
+        status, headers, body = json_response({'error': 'Not found'}, status=404)
+    elif scope['method'] not in ('GET', 'HEAD'):
+        status, headers, body = json_response({'error': 'Method not allowed'}, status=405,
+                                              headers={'allow': 'GET, HEAD'})
+    else:
+        status, headers, body = await handle(Request(scope), handler)
+
+    headers['content-length'] = str(len(body))
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.encode('latin-1'), value.encode('latin-1')) for name, value in headers.items()],
+    })
+    await send({'type': 'http.response.body', 'body': b'' if scope['method'] == 'HEAD' else body})
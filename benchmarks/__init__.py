@@ -0,0 +1,2 @@
+"""Benchmark scripts for Task Tracker. Run them from the project root, e.g.
+python -m benchmarks.dashboard_stats"""
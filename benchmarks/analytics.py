@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark and check the analytics queries: Python-side aggregation vs the
+dialect-aware database expressions vs the task_daily_stats rollup
+Usage: python -m benchmarks.analytics [num_tasks]
+
+Uses BENCHMARK_DATABASE_URL (default sqlite:///benchmark.db); point it at a
+PostgreSQL database to run the same checks there. The SQL each analytics
+expression compiles to is printed for both SQLite and PostgreSQL.
+"""
+
+import os
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+os.environ["DATABASE_URL"] = os.environ.get("BENCHMARK_DATABASE_URL", "sqlite:///benchmark.db")
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from app import app, db
+from models import User, Task
+from analytics import BUCKET_UNITS, date_bucket, hours_between, live_completions, live_productivity
+from rollups import rebuild_task_daily_stats, completion_trend, productivity_by_assignee
+from benchmarks.datagen import ensure_dataset
+
+NUM_TASKS = 200_000
+ROUNDS = 3
+WINDOW_DAYS = 90
+
+def bucket_start(day, unit):
+    if unit == 'week':
+        return day - timedelta(days=day.weekday())
+    if unit == 'month':
+        return day.replace(day=1)
+    return day
+
+def python_analytics():
+    """The Python-side fallback: stream every task and aggregate in the app"""
+    since = (datetime.utcnow() - timedelta(days=WINDOW_DAYS)).date()
+    completions = {unit: defaultdict(int) for unit in BUCKET_UNITS}
+    people = defaultdict(lambda: [0, 0, 0.0])
+
+    rows = db.session.execute(
+        select(User.first_name, User.last_name, Task.created_at, Task.completed_at)
+        .join(Task, Task.assignee_id == User.id)
+    ).yield_per(10_000)
+    for first_name, last_name, created_at, completed_at in rows:
+        person = people[(first_name, last_name)]
+        person[0] += 1
+        if completed_at is not None:
+            person[1] += 1
+            person[2] += (completed_at - created_at).total_seconds() / 3600
+            if completed_at.date() >= since:
+                for unit in BUCKET_UNITS:
+                    completions[unit][bucket_start(completed_at.date(), unit)] += 1
+
+    trends = {unit: sorted(counts.items()) for unit, counts in completions.items()}
+    productivity = {name: (total, completed, hours / completed if completed else None)
+                    for name, (total, completed, hours) in people.items()}
+    return trends, productivity
+
+def database_analytics():
+    trends = {unit: [tuple(row) for row in live_completions(WINDOW_DAYS, unit)] for unit in BUCKET_UNITS}
+    productivity = {(row.first_name, row.last_name): tuple(row[2:]) for row in live_productivity()}
+    return trends, productivity
+
+def rollup_analytics():
+    trends = {unit: [tuple(row) for row in completion_trend(WINDOW_DAYS, unit)] for unit in BUCKET_UNITS}
+    productivity = {(row.first_name, row.last_name): tuple(row[2:]) for row in productivity_by_assignee()}
+    return trends, productivity
+
+def same_results(expected, actual):
+    """Compare (trends, productivity) pairs, allowing float rounding in the averages"""
+    if expected[0] != actual[0] or expected[1].keys() != actual[1].keys():
+        return False
+    for name, (total, completed, avg_hours) in expected[1].items():
+        other_total, other_completed, other_avg = actual[1][name]
+        if (total, completed) != (int(other_total), int(other_completed)):
+            return False
+        if (avg_hours is None) != (other_avg is None):
+            return False
+        if avg_hours is not None and abs(avg_hours - other_avg) > 1e-6 * max(1.0, avg_hours):
+            return False
+    return True
+
+def best_time(fn):
+    timings = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return result, min(timings)
+
+def print_compiled_sql():
+    expressions = [('hours_between', hours_between(Task.created_at, Task.completed_at))]
+    expressions += [(f'date_bucket {unit}', date_bucket(Task.completed_at, unit)) for unit in BUCKET_UNITS]
+    for dialect in (sqlite.dialect(), postgresql.dialect()):
+        print(f"\n{dialect.name}:")
+        for label, expression in expressions:
+            print(f"  {label:<20} {expression.compile(dialect=dialect)}")
+
+def main():
+    num_tasks = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_TASKS
+
+    with app.app_context():
+        ensure_dataset(num_tasks)
+        print_compiled_sql()
+
+        _, rebuild_ms = best_time(rebuild_task_daily_stats)
+        expected, python_ms = best_time(python_analytics)
+        live, live_ms = best_time(database_analytics)
+        rollup, rollup_ms = best_time(rollup_analytics)
+
+        print("\n" + "=" * 70)
+        print(f"Database: {db.engine.dialect.name}, {Task.query.count():,} tasks")
+        print(f"{'Implementation':<32} {'Matches Python':>16} {'Best of ' + str(ROUNDS):>14}")
+        print("-" * 70)
+        print(f"{'Python-side aggregation':<32} {'-':>16} {python_ms:>11.1f} ms")
+        print(f"{'Database expressions (live)':<32} {str(same_results(expected, live)):>16} {live_ms:>11.1f} ms")
+        print(f"{'task_daily_stats rollup':<32} {str(same_results(expected, rollup)):>16} {rollup_ms:>11.1f} ms")
+        print(f"{'Rollup rebuild':<32} {'-':>16} {rebuild_ms:>11.1f} ms")
+        print("=" * 70)
+
+        if not (same_results(expected, live) and same_results(expected, rollup)):
+            print("❌ Analytics results differ from the Python reference")
+            sys.exit(1)
+        print("✅ Database and rollup analytics match the Python reference")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Check that cached response bodies always match the ETag they are sent with
+Usage: python -m benchmarks.conditional_cache
+
+Creates a SQLite database in a temporary directory and drives the app
+through the Flask test client. It checks that /api/dashboard-stats, whose
+body comes from the response cache, answers an old ETag with a fresh body
+and a new ETag after:
+  - a write committed by another worker, whose cache invalidation this
+    process never sees
+  - a task passing its due date, with no write at all
+and that an unchanged scope is still served from the cache.
+Exits with status 1 if a check fails.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'conditional.db')}"
+
+from app import app, db
+from models import User, Task
+from passwords import HashingService, set_hashing_service
+from cache import ResponseCache, get_response_cache, set_response_cache
+import routes  # noqa: F401
+
+failures = []
+
+def check(name, ok):
+    print(f"  {'✅' if ok else '❌'} {name}")
+    if not ok:
+        failures.append(name)
+
+def seed():
+    set_hashing_service(HashingService(method="pbkdf2:sha256:1000"))
+    with app.app_context():
+        db.create_all()
+        manager = User(username='manager', email='manager@example.com', role='manager',
+                       first_name='Manager', last_name='Test')
+        alice = User(username='alice', email='alice@example.com', role='employee',
+                     first_name='Alice', last_name='Test')
+        manager.set_password('secret')
+        alice.set_password('secret')
+        db.session.add_all([manager, alice])
+        db.session.flush()
+        for i in range(5):
+            db.session.add(Task(title=f'task {i}', assignee_id=alice.id, created_by_id=manager.id))
+        db.session.commit()
+        return manager.id, alice.id
+
+def add_task_in_other_worker(**fields):
+    """Commit a task the way another gunicorn worker would: its cache, not ours, is invalidated"""
+    ours = get_response_cache()
+    set_response_cache(ResponseCache())
+    try:
+        with app.app_context():
+            db.session.add(Task(**fields))
+            db.session.commit()
+    finally:
+        set_response_cache(ours)
+
+def client(username):
+    c = app.test_client()
+    c.post('/login', data={'username': username, 'password': 'secret'})
+    c.get('/dashboard')  # Show the welcome flash so later responses carry ETags
+    return c
+
+def stats(c, etag=None):
+    headers = {'If-None-Match': f'"{etag}"'} if etag else {}
+    response = c.get('/api/dashboard-stats', headers=headers)
+    return response.status_code, response.headers.get('ETag', '').strip('"'), response.get_json()
+
+def main():
+    manager_id, alice_id = seed()
+    manager = client('manager')
+    cache = get_response_cache()
+
+    print("\nUnchanged scope")
+    _, etag, body = stats(manager)
+    hits = cache.hits
+    status, again, cached = stats(manager)
+    check("a repeat request is served from the cache", cache.hits == hits + 1 and cached == body)
+    check("its ETag still validates", stats(manager, again)[0] == 304)
+
+    print("\nWrite in another worker")
+    add_task_in_other_worker(title='elsewhere', assignee_id=alice_id, created_by_id=manager_id)
+    status, new_etag, fresh = stats(manager, etag)
+    check("the old ETag gets a 200 with a new ETag", status == 200 and new_etag != etag)
+    check("the body includes the new task", fresh and fresh['total_tasks'] == body['total_tasks'] + 1)
+    check("the new ETag validates", stats(manager, new_etag)[0] == 304)
+
+    print("\nDeadline passing")
+    due = datetime.utcnow() + timedelta(seconds=2)
+    add_task_in_other_worker(title='due soon', assignee_id=alice_id, created_by_id=manager_id, due_date=due)
+    _, etag, body = stats(manager)
+    check("the task is not overdue yet", body['overdue_tasks'] == 0)
+    time.sleep(max(0, (due - datetime.utcnow()).total_seconds()) + 0.2)
+    status, new_etag, fresh = stats(manager, etag)
+    check("the old ETag gets a 200 with a new ETag", status == 200 and new_etag != etag)
+    check("the body counts the task as overdue", fresh and fresh['overdue_tasks'] == 1)
+    check("the new ETag validates", stats(manager, new_etag)[0] == 304)
+
+    shutil.rmtree(tmp, ignore_errors=True)
+    print()
+    if failures:
+        print(f"❌ {len(failures)} check(s) failed")
+        sys.exit(1)
+    print("✅ All conditional cache checks passed")
+
+if __name__ == "__main__":
+    main()
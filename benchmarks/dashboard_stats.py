@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark the dashboard counters: five COUNT queries vs one aggregate query
+over the tasks table vs the per-user workload counters
+Usage: python -m benchmarks.dashboard_stats [num_tasks]
+
+Uses BENCHMARK_DATABASE_URL (default sqlite:///benchmark.db) so the
+development database is never touched.
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+
+os.environ["DATABASE_URL"] = os.environ.get("BENCHMARK_DATABASE_URL", "sqlite:///benchmark.db")
+
+from sqlalchemy import event, and_
+from app import app, db
+from models import User, Task
+from stats import STAT_KEYS, task_stats_query, get_task_stats
+from principal import load_principal
+from teams import ALL_SCOPE
+from benchmarks.datagen import ensure_dataset
+
+NUM_TASKS = 1_000_000
+ROUNDS = 5
+
+def legacy_task_stats(user):
+    """The five-query implementation that get_task_stats() replaced"""
+    if user.is_manager():
+        query = Task.query
+    else:
+        query = user.assigned_tasks
+    return {
+        'total_tasks': query.count(),
+        'pending_tasks': query.filter_by(status='pending').count(),
+        'in_progress_tasks': query.filter_by(status='in_progress').count(),
+        'completed_tasks': query.filter_by(status='completed').count(),
+        'overdue_tasks': query.filter(
+            and_(Task.due_date < datetime.utcnow(), Task.status != 'completed')
+        ).count(),
+    }
+
+def single_pass_task_stats(user):
+    """One conditional aggregate over the tasks table, before the workload counters"""
+    row = task_stats_query(user.assignee_ids).one()
+    return {key: int(value) for key, value in zip(STAT_KEYS, row)}
+
+def measure(fn, user):
+    """Return (result, statements per call, best wall time in ms)"""
+    statements = []
+    listener = lambda *args: statements.append(1)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        timings = []
+        for _ in range(ROUNDS):
+            statements.clear()
+            started = time.perf_counter()
+            result = fn(user)
+            timings.append((time.perf_counter() - started) * 1000)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    return result, len(statements), min(timings)
+
+def main():
+    num_tasks = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_TASKS
+
+    with app.app_context():
+        ensure_dataset(num_tasks)
+        manager = User.query.filter_by(role='manager').first()
+        employee = User.query.filter_by(role='employee').first()
+
+        print("\n" + "=" * 70)
+        print(f"{'Scope':<10} {'Implementation':<16} {'Queries':>8} {'Best of ' + str(ROUNDS):>14}")
+        print("-" * 70)
+        for label, user in (('manager', manager), ('employee', employee)):
+            before, before_queries, before_ms = measure(legacy_task_stats, user)
+            # The legacy queries predate team views: compare the organization-wide scope
+            principal = load_principal(user.id).with_task_scope(ALL_SCOPE)
+            single, single_queries, single_ms = measure(single_pass_task_stats, principal)
+            after, after_queries, after_ms = measure(get_task_stats, principal)
+            assert before == single == after, f"Counter mismatch: {before} != {single} != {after}"
+            print(f"{label:<10} {'five COUNTs':<16} {before_queries:>8} {before_ms:>11.1f} ms")
+            print(f"{label:<10} {'single pass':<16} {single_queries:>8} {single_ms:>11.1f} ms")
+            print(f"{label:<10} {'counters':<16} {after_queries:>8} {after_ms:>11.1f} ms")
+        print("=" * 70)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic Task Tracker dataset at scale
+Usage: python -m benchmarks.datagen [--users N] [--tasks M] [--teams T] [--seed S]
+
+Replaces the database at BENCHMARK_DATABASE_URL (default
+sqlite:///benchmark.db) with N users in T teams and M tasks, written with
+bulk inserts. The same arguments and seed always produce the same data.
+Every user's password is BENCHMARK_PASSWORD.
+
+Distributions:
+  - one manager per team, the other users are employees; a few are inactive
+  - employees belong to one team, some to two; team sizes vary
+  - workload is skewed: a minority of employees hold most of the tasks
+  - most tasks are recent; the older a task, the likelier it is completed
+  - priority is mostly medium; most tasks have a due date about a week out,
+    so old open tasks are overdue
+  - zero to three tags per task, a few tags far more common than the rest
+
+The other benchmarks call ensure_dataset() to reuse or create their data.
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+if __name__ == "__main__":
+    os.environ["DATABASE_URL"] = os.environ.get("BENCHMARK_DATABASE_URL", "sqlite:///benchmark.db")
+
+from sqlalchemy import text
+from app import app, db
+from models import User, Task, Tag, Team, TeamMember, task_tags
+from passwords import get_hashing_service
+from rollups import rebuild_task_daily_stats
+from search import setup_search
+from workload import rebuild_user_task_counts
+
+NUM_USERS = 200
+NUM_TASKS = 100_000
+USERS_PER_TEAM = 10
+SEED = 42
+BATCH_SIZE = 20_000
+HISTORY_DAYS = 365
+BENCHMARK_PASSWORD = 'benchmark'
+
+DEPARTMENTS = [('Engineering', 5), ('Product', 2), ('Design', 1), ('Support', 2), ('Sales', 1), ('Operations', 1)]
+STATUSES_OPEN = [('pending', 6), ('in_progress', 4)]
+PRIORITIES = [('low', 3), ('medium', 5), ('high', 2)]
+CATEGORIES = [('Development', 8), ('Bug Fix', 5), ('Testing', 3), ('Documentation', 2),
+              ('Design', 2), ('Research', 1), ('Support', 3), (None, 4)]
+TAGS = ['backend', 'frontend', 'bug', 'feature', 'client', 'urgent', 'testing', 'documentation',
+        'api', 'mobile', 'security', 'performance', 'database', 'ux', 'infra', 'release']
+TAG_COUNTS = [(0, 3), (1, 4), (2, 2), (3, 1)]
+ESTIMATES = [1, 2, 3, 4, 6, 8, 12, 16, 24, 40]
+VOCABULARY = (
+    "api auth login logout session token cache database index query migration deploy release "
+    "build pipeline test coverage bug crash regression performance latency memory leak timeout "
+    "dashboard report export import csv invoice payment customer onboarding email notification "
+    "mobile android ios browser layout style refactor cleanup documentation review security audit"
+).split()
+VERBS = ['Fix', 'Add', 'Update', 'Review', 'Investigate', 'Refactor', 'Document', 'Test', 'Deploy', 'Remove']
+
+def weighted(rng, pairs):
+    values, weights = zip(*pairs)
+    return rng.choices(values, weights)[0]
+
+def words(rng, count):
+    return ' '.join(rng.choice(VOCABULARY) for _ in range(count))
+
+def reset_schema():
+    """Drop and recreate every table, including the full-text index"""
+    db.drop_all()
+    if db.engine.dialect.name == 'sqlite':
+        # Not in the metadata, and stale once tasks is dropped
+        db.session.execute(text("DROP TABLE IF EXISTS tasks_fts"))
+        db.session.commit()
+    db.create_all()
+    # Before the inserts, so the SQLite index triggers see them
+    setup_search()
+
+def reset_sequences(tables):
+    """Rows were inserted with explicit ids; move PostgreSQL's sequences past them"""
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for table in tables:
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), coalesce(max(id), 1)) FROM {table}"
+        ))
+
+def insert_batches(table, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(table.insert(), rows[start:start + BATCH_SIZE])
+
+def user_rows(rng, num_users, num_teams, password_hash, now):
+    rows = []
+    for i in range(num_users):
+        manager = i < num_teams
+        rows.append({
+            'id': i + 1,
+            'username': f'bench{i}',
+            'email': f'bench{i}@example.com',
+            'password_hash': password_hash,
+            'role': 'manager' if manager else 'employee',
+            'first_name': 'Bench',
+            'last_name': str(i),
+            'department': weighted(rng, DEPARTMENTS),
+            'created_at': now - timedelta(days=rng.randint(HISTORY_DAYS, 2 * HISTORY_DAYS)),
+            'is_active': manager or rng.random() > 0.03,
+        })
+    return rows
+
+def team_rows(rng, users, num_teams, now):
+    """Teams, their memberships, and each employee's primary team manager"""
+    teams = [{
+        'id': t + 1,
+        'name': f"{users[t]['department']} {t + 1}",
+        'manager_id': users[t]['id'],
+        'created_at': users[t]['created_at'],
+    } for t in range(num_teams)]
+
+    # Uneven team sizes: some teams are several times the size of others
+    team_weights = [rng.uniform(0.5, 3) for _ in teams]
+    members, team_manager = [], {}
+    for user in users[num_teams:]:
+        joined = rng.sample(range(num_teams), 2) if num_teams > 1 and rng.random() < 0.1 else []
+        joined = joined or rng.choices(range(num_teams), team_weights)
+        team_manager[user['id']] = teams[joined[0]]['manager_id']
+        for t in joined:
+            members.append({
+                'id': len(members) + 1,
+                'team_id': teams[t]['id'],
+                'user_id': user['id'],
+                'joined_at': now - timedelta(days=rng.randint(0, HISTORY_DAYS)),
+            })
+    return teams, members, team_manager
+
+def task_row(rng, task_id, assignee_id, creator_id, now):
+    # Mostly recent work, with a long tail back to HISTORY_DAYS
+    age_days = min(HISTORY_DAYS, rng.expovariate(1 / 90))
+    created_at = now - timedelta(days=age_days)
+
+    if rng.random() < min(0.9, 0.1 + age_days / 45):
+        status = 'completed'
+        completed_at = min(now, created_at + timedelta(hours=rng.lognormvariate(math.log(48), 1)))
+    else:
+        status = weighted(rng, STATUSES_OPEN)
+        completed_at = None
+
+    due_date = None
+    if rng.random() < 0.85:
+        due_day = created_at + timedelta(days=round(rng.lognormvariate(math.log(7), 0.8)))
+        due_date = due_day.replace(hour=17, minute=0, second=0, microsecond=0)
+
+    estimated = rng.choice(ESTIMATES) if rng.random() < 0.7 else None
+    actual = round(estimated * rng.lognormvariate(0, 0.4), 1) if estimated and completed_at else None
+    names = list(dict.fromkeys(rng.choices(TAGS, [1 / (k + 1) for k in range(len(TAGS))],
+                                           k=weighted(rng, TAG_COUNTS))))
+    return {
+        'id': task_id,
+        'title': f"{rng.choice(VERBS)} {words(rng, rng.randint(2, 5))}",
+        'description': words(rng, rng.randint(10, 40)) if rng.random() < 0.8 else None,
+        'status': status,
+        'priority': weighted(rng, PRIORITIES),
+        'due_date': due_date,
+        'created_at': created_at,
+        'updated_at': completed_at or created_at + (now - created_at) * rng.random() * 0.5,
+        'completed_at': completed_at,
+        'assignee_id': assignee_id,
+        'created_by_id': creator_id,
+        'estimated_hours': estimated,
+        'actual_hours': actual,
+        'category': weighted(rng, CATEGORIES),
+        'tags': ', '.join(names) or None,
+    }, names
+
+def generate(num_users=NUM_USERS, num_tasks=NUM_TASKS, num_teams=None, seed=SEED):
+    """Replace the current database's contents with a synthetic dataset.
+
+    Call inside an app context. Returns the dataset's size as a dict.
+    """
+    rng = random.Random(seed)
+    num_teams = num_teams or max(1, num_users // USERS_PER_TEAM)
+    if num_users <= num_teams:
+        raise ValueError("Need more users than teams: each team has a manager plus employees")
+    # A fixed clock would age the data; ages are relative to now instead
+    now = datetime.utcnow()
+
+    print(f"Generating {num_users:,} users in {num_teams:,} teams and {num_tasks:,} tasks (seed {seed})...")
+    reset_schema()
+
+    password_hash = get_hashing_service().hash(BENCHMARK_PASSWORD)
+    users = user_rows(rng, num_users, num_teams, password_hash, now)
+    teams, members, team_manager = team_rows(rng, users, num_teams, now)
+    insert_batches(User.__table__, users)
+    insert_batches(Team.__table__, teams)
+    insert_batches(TeamMember.__table__, members)
+
+    tag_ids = {name: i + 1 for i, name in enumerate(TAGS)}
+    insert_batches(Tag.__table__, [{'id': tag_id, 'name': name} for name, tag_id in tag_ids.items()])
+
+    employees = [user['id'] for user in users[num_teams:]]
+    managers = [user['id'] for user in users[:num_teams]]
+    # Pareto weights, capped so no one employee holds a silly share
+    workload = [min(20, rng.paretovariate(1.16)) for _ in employees]
+
+    for start in range(0, num_tasks, BATCH_SIZE):
+        tasks, links = [], []
+        stop = min(start + BATCH_SIZE, num_tasks)
+        assignees = rng.choices(employees, workload, k=stop - start)
+        for task_id, assignee_id in enumerate(assignees, start + 1):
+            roll = rng.random()
+            if roll < 0.7:
+                creator_id = team_manager[assignee_id]
+            elif roll < 0.9:
+                creator_id = assignee_id
+            else:
+                creator_id = rng.choice(managers)
+            task, names = task_row(rng, task_id, assignee_id, creator_id, now)
+            tasks.append(task)
+            links.extend({'task_id': task_id, 'tag_id': tag_ids[name]} for name in names)
+        db.session.execute(Task.__table__.insert(), tasks)
+        db.session.execute(task_tags.insert(), links)
+        print(f"  {stop:,} tasks", end='\r')
+    print()
+
+    reset_sequences(['users', 'teams', 'team_members', 'tags', 'tasks'])
+    db.session.commit()
+    # Bulk inserts bypass the ORM hooks that maintain the analytics rollup and workload counters
+    rebuild_task_daily_stats()
+    rebuild_user_task_counts()
+    return {'users': num_users, 'teams': num_teams, 'tasks': num_tasks, 'seed': seed}
+
+def ensure_dataset(num_tasks=NUM_TASKS, num_users=NUM_USERS, num_teams=None, seed=SEED, exact=False):
+    """Reuse the current database if it already holds the dataset, else generate it.
+
+    Without exact, any database with at least num_tasks tasks is reused.
+    """
+    task_count, user_count = Task.query.count(), User.query.count()
+    if exact:
+        reusable = task_count == num_tasks and user_count == num_users
+    else:
+        reusable = task_count >= num_tasks
+    if reusable:
+        print(f"Reusing existing {user_count:,} users and {task_count:,} tasks")
+        return {'users': user_count, 'teams': Team.query.count(), 'tasks': task_count, 'seed': None}
+    return generate(num_users, num_tasks, num_teams, seed)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Task Tracker dataset")
+    parser.add_argument('--users', type=int, default=NUM_USERS)
+    parser.add_argument('--tasks', type=int, default=NUM_TASKS)
+    parser.add_argument('--teams', type=int, default=None, help=f"default: one per {USERS_PER_TEAM} users")
+    parser.add_argument('--seed', type=int, default=SEED)
+    args = parser.parse_args()
+
+    with app.app_context():
+        try:
+            dataset = generate(args.users, args.tasks, args.teams, args.seed)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+    print(f"✅ Generated {dataset['users']:,} users, {dataset['teams']:,} teams and {dataset['tasks']:,} tasks")
+
+if __name__ == "__main__":
+    main()
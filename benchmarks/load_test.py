@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Load test a running server: requests per second and latency percentiles per route
+Usage: python -m benchmarks.load_test [base_url] [--users N] [--duration S]
+
+Start the server under the production profile first, e.g.
+    APP_ENV=production gunicorn -c gunicorn.conf.py main:app
+Each simulated user logs in once (LOAD_TEST_USERNAME / LOAD_TEST_PASSWORD,
+default admin / admin123) and then requests the routes below back to back.
+"""
+
+import argparse
+import http.cookiejar
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+ROUTES = [
+    '/dashboard',
+    '/tasks',
+    '/api/tasks',
+    '/api/dashboard-stats',
+]
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def logged_in_opener(base_url, username, password):
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+    data = urllib.parse.urlencode({'username': username, 'password': password}).encode()
+    response = opener.open(base_url + '/login', data=data, timeout=30)
+    if response.url.rstrip('/').endswith('/login'):
+        raise SystemExit(f"Login failed for {username}; set LOAD_TEST_USERNAME and LOAD_TEST_PASSWORD")
+    return opener
+
+def run_user(opener, base_url, deadline, samples, errors, lock):
+    i = 0
+    while time.monotonic() < deadline:
+        route = ROUTES[i % len(ROUTES)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            with opener.open(base_url + route, timeout=30) as response:
+                response.read()
+            ok = True
+        except (urllib.error.URLError, OSError):
+            ok = False
+        elapsed = time.perf_counter() - started
+        with lock:
+            if ok:
+                samples.setdefault(route, []).append(elapsed)
+            else:
+                errors[route] = errors.get(route, 0) + 1
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test a running Task Tracker server")
+    parser.add_argument('base_url', nargs='?', default='http://127.0.0.1:5000')
+    parser.add_argument('--users', type=int, default=16, help="concurrent simulated users")
+    parser.add_argument('--duration', type=float, default=30, help="seconds to run")
+    args = parser.parse_args()
+    base_url = args.base_url.rstrip('/')
+
+    username = os.environ.get('LOAD_TEST_USERNAME', 'admin')
+    password = os.environ.get('LOAD_TEST_PASSWORD', 'admin123')
+    print(f"Logging in {args.users} users as {username}...")
+    openers = [logged_in_opener(base_url, username, password) for _ in range(args.users)]
+
+    samples, errors, lock = {}, {}, threading.Lock()
+    deadline = time.monotonic() + args.duration
+    print(f"Running for {args.duration:.0f}s against {base_url}...")
+    started = time.perf_counter()
+    threads = [threading.Thread(target=run_user, args=(opener, base_url, deadline, samples, errors, lock))
+               for opener in openers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    print("\n" + "=" * 78)
+    print(f"{'Route':<24} {'Requests':>9} {'Errors':>7} {'Req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    print("-" * 78)
+    everything = []
+    for route in ROUTES:
+        times = sorted(samples.get(route, []))
+        everything.extend(times)
+        print(f"{route:<24} {len(times):>9,} {errors.get(route, 0):>7} {len(times) / wall:>8.1f} "
+              f"{percentile(times, 0.50) * 1000:>8.1f} {percentile(times, 0.95) * 1000:>8.1f} "
+              f"{percentile(times, 0.99) * 1000:>8.1f}")
+    everything.sort()
+    print("-" * 78)
+    print(f"{'all routes':<24} {len(everything):>9,} {sum(errors.values()):>7} {len(everything) / wall:>8.1f} "
+          f"{percentile(everything, 0.50) * 1000:>8.1f} {percentile(everything, 0.95) * 1000:>8.1f} "
+          f"{percentile(everything, 0.99) * 1000:>8.1f}")
+    print("=" * 78)
+
+if __name__ == "__main__":
+    main()
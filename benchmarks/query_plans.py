@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Check that the hot routes' queries are served by indexes
+Usage: python -m benchmarks.query_plans
+
+Requests each route through the Flask test client, captures every SQL
+statement it runs and prints the database's plan for it. Exits with
+status 1 if a statement scans the tasks table without an index, except
+for routes listed in ALLOWED_TASK_SCANS.
+
+Works on SQLite (EXPLAIN QUERY PLAN) and PostgreSQL (EXPLAIN, with
+sequential scans disabled so a usable index is always chosen).
+Uses BENCHMARK_DATABASE_URL (default sqlite:///benchmark.db).
+"""
+
+import os
+import sys
+
+os.environ["DATABASE_URL"] = os.environ.get("BENCHMARK_DATABASE_URL", "sqlite:///benchmark.db")
+
+from sqlalchemy import event
+from app import app, db
+from models import User
+import routes  # noqa: F401
+from benchmarks.datagen import ensure_dataset
+
+NUM_TASKS = 20_000
+
+# Routes that aggregate over every task by design
+ALLOWED_TASK_SCANS = {
+    '/dashboard': 'manager team performance groups all tasks by assignee',
+}
+
+ROUTES = [
+    '/dashboard',
+    '/api/dashboard-stats',
+    '/tasks',
+    '/tasks?sort=due_date&order=asc',
+    '/tasks?status=pending&sort=due_date',
+    '/tasks?overdue=1',
+    '/tasks?due_within=3d&sort=due_date&order=asc',
+    '/api/tasks',
+    '/api/tasks?sort=created_at&order=asc',
+    '/api/tasks/changes?since={sync_token}',
+    '/analytics',
+]
+
+def capture_statements(client, url):
+    """Request a URL and return the (statement, parameters) pairs it executed"""
+    statements = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    return response.status_code, statements
+
+def explain(statement, parameters):
+    """Return the plan lines for a statement and whether it scans tasks without an index"""
+    with db.engine.connect() as conn:
+        if db.engine.dialect.name == 'postgresql':
+            conn.exec_driver_sql("SET enable_seqscan = off")
+            rows = conn.exec_driver_sql("EXPLAIN " + statement, parameters).fetchall()
+            lines = [row[0] for row in rows]
+            full_scan = any('Seq Scan on tasks' in line for line in lines)
+        else:
+            rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+            lines = [row[-1] for row in rows]
+            full_scan = any(line.startswith('SCAN tasks') and 'INDEX' not in line for line in lines)
+    return lines, full_scan
+
+def main():
+    problems = []
+
+    with app.app_context():
+        ensure_dataset(NUM_TASKS)
+        users = {
+            'manager': User.query.filter_by(role='manager').first(),
+            'employee': User.query.filter_by(role='employee').first(),
+        }
+
+        for role, user in users.items():
+            client = app.test_client()
+            with client.session_transaction() as sess:
+                sess['user_id'] = user.id
+                sess['user_role'] = user.role
+            sync_token = client.get('/api/tasks').get_json()['sync_token']
+
+            for route in ROUTES:
+                url = route.format(sync_token=sync_token)
+                path = url.split('?')[0]
+                try:
+                    status_code, statements = capture_statements(client, url)
+                except Exception as e:
+                    print(f"\n❌ {role} {url}: {type(e).__name__}: {e}")
+                    problems.append((role, url, str(e)))
+                    continue
+
+                print(f"\n{role} {url} -> {status_code} ({len(statements)} statements)")
+                for statement, parameters in statements:
+                    lines, full_scan = explain(statement, parameters)
+                    marker = "⚠️ " if full_scan else "   "
+                    print(f"{marker}{' '.join(statement.split())[:110]}")
+                    for line in lines:
+                        print(f"       {line}")
+                    if full_scan and path not in ALLOWED_TASK_SCANS:
+                        problems.append((role, url, statement))
+
+    print("\n" + "=" * 70)
+    if problems:
+        print(f"❌ {len(problems)} statements scan the tasks table without an index:")
+        for role, url, statement in problems:
+            print(f"   • {role} {url}: {' '.join(statement.split())[:90]}")
+        sys.exit(1)
+    print("✅ Every route's task queries use an index")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Check read-replica routing and read-your-writes against two SQLite databases
+Usage: python -m benchmarks.replica_routing
+
+Creates a primary and a replica database in a temporary directory. The
+replica is a copy of the primary that is refreshed only when the script
+"replicates", so replication lag is fully under its control. It then
+drives the app through the Flask test client and checks:
+  - read-only views read from the replica, and writes go to the primary
+  - after writing, a user reads from the primary for REPLICA_MAX_LAG_SECONDS
+  - other users keep reading from the replica
+  - cached data read from a lagging replica is not kept after an invalidation
+Exits with status 1 if a check fails. Set REPLICA_CHECK_PRIMARY_URL and
+REPLICA_CHECK_REPLICA_URL to run the routing checks against two PostgreSQL
+instances instead (replication must then be set up between them).
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+tmp = tempfile.mkdtemp()
+PRIMARY_PATH = os.path.join(tmp, 'primary.db')
+REPLICA_PATH = os.path.join(tmp, 'replica.db')
+os.environ["DATABASE_URL"] = os.environ.get("REPLICA_CHECK_PRIMARY_URL", f"sqlite:///{PRIMARY_PATH}")
+os.environ["DATABASE_REPLICA_URLS"] = os.environ.get("REPLICA_CHECK_REPLICA_URL", f"sqlite:///{REPLICA_PATH}")
+os.environ.setdefault("REPLICA_MAX_LAG_SECONDS", "1")
+
+from sqlalchemy import event
+from app import app, db
+from models import User, Task
+from passwords import HashingService, set_hashing_service
+from replicas import REPLICA_BIND_PREFIX
+from config import REPLICA_MAX_LAG_SECONDS
+import routes  # noqa: F401
+
+failures = []
+
+def check(name, ok):
+    print(f"  {'✅' if ok else '❌'} {name}")
+    if not ok:
+        failures.append(name)
+
+def replicate():
+    """Bring the replica up to date with the primary"""
+    if os.environ.get("REPLICA_CHECK_REPLICA_URL"):
+        time.sleep(REPLICA_MAX_LAG_SECONDS)
+        return
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+    source, target = sqlite3.connect(PRIMARY_PATH), sqlite3.connect(REPLICA_PATH)
+    source.backup(target)
+    source.close()
+    target.close()
+
+def add_task_directly(assignee, creator):
+    """A write the replica has not seen yet"""
+    with app.app_context():
+        db.session.add(Task(title='unreplicated', assignee_id=assignee, created_by_id=creator))
+        db.session.commit()
+
+statements = {'primary': 0, 'replica': 0}
+
+def count_statements():
+    with app.app_context():
+        for key, engine in db.engines.items():
+            name = 'replica' if key and key.startswith(REPLICA_BIND_PREFIX) else 'primary'
+            event.listen(engine, 'before_cursor_execute',
+                         lambda *args, name=name: statements.__setitem__(name, statements[name] + 1))
+
+def reset_counts():
+    statements.update(primary=0, replica=0)
+
+def seed():
+    set_hashing_service(HashingService(method="pbkdf2:sha256:1000"))
+    with app.app_context():
+        users = []
+        for username, role in [('manager', 'manager'), ('alice', 'employee'), ('bob', 'employee')]:
+            user = User(username=username, email=f'{username}@example.com', role=role,
+                        first_name=username.title(), last_name='Test')
+            user.set_password('secret')
+            users.append(user)
+        db.session.add_all(users)
+        db.session.flush()
+        for i in range(10):
+            db.session.add(Task(title=f'task {i}', assignee_id=users[1 + i % 2].id, created_by_id=users[0].id))
+        db.session.commit()
+        return {user.username: user.id for user in users}
+
+def client(username):
+    c = app.test_client()
+    c.post('/login', data={'username': username, 'password': 'secret'})
+    c.get('/dashboard')  # Show the welcome flash so later responses carry ETags
+    return c
+
+def total(c):
+    return c.get('/api/dashboard-stats').get_json()['total_tasks']
+
+def main():
+    ids = seed()
+    replicate()
+    count_statements()
+    alice, bob, manager = client('alice'), client('bob'), client('manager')
+
+    print("\nRouting")
+    reset_counts()
+    replica_total = total(alice)
+    check("read-only views read from the replica", statements['replica'] > 0)
+    add_task_directly(ids['alice'], ids['manager'])
+    check("writes outside requests go to the primary", statements['primary'] > 0)
+    check("the replica lags: alice does not see the new task yet", total(alice) == replica_total)
+
+    print("\nRead-your-writes")
+    reset_counts()
+    alice.post('/tasks/create', data={'title': 'mine', 'assignee_id': ids['alice']})
+    check("creating a task writes to the primary only", statements['replica'] == 0)
+    check("alice sees both new tasks right after writing", total(alice) == replica_total + 2)
+    check("bob's view is served from the replica", total(bob) == 5)
+    time.sleep(REPLICA_MAX_LAG_SECONDS + 0.2)
+    reset_counts()
+    alice.get('/api/tasks')
+    check("after the lag window alice reads from the replica again",
+          statements['replica'] > 0 and statements['primary'] == 0)
+    replicate()
+    check("once replicated the replica has both tasks", total(alice) == replica_total + 2)
+
+    print("\nResponse cache")
+    manager_total = total(manager)
+    bob.post('/tasks/create', data={'title': 'bob', 'assignee_id': ids['bob']})
+    # The commit invalidated the manager's cached stats; the replica is behind
+    check("the manager reads the lagging replica", total(manager) == manager_total)
+    replicate()
+    check("that stale read was not cached", total(manager) == manager_total + 1)
+
+    shutil.rmtree(tmp, ignore_errors=True)
+    print()
+    if failures:
+        print(f"❌ {len(failures)} check(s) failed")
+        sys.exit(1)
+    print("✅ All replica routing checks passed")
+
+if __name__ == "__main__":
+    main()
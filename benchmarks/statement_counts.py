@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Check that the hot routes run the same number of SQL statements at any data size
+Usage: python -m benchmarks.statement_counts
+
+Generates a small and a large dataset with benchmarks.datagen, in turn, in
+a SQLite database in a temporary directory. For a manager and an employee
+it requests each route through the Flask test client, with an empty
+response cache, and counts the statements it executes. Exits with status 1
+if a route's count differs between the two, usually a query per row (an
+N+1).
+
+Lists are requested at their largest page size, which only the large
+dataset fills, and /api/tasks/changes after touching more tasks in the
+large dataset than in the small one. Set STATEMENT_COUNTS_DATABASE_URL to
+run against PostgreSQL instead; that database's contents are replaced.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime
+
+tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = os.environ.get("STATEMENT_COUNTS_DATABASE_URL",
+                                            f"sqlite:///{os.path.join(tmp, 'statements.db')}")
+
+from sqlalchemy import event, func, update
+from app import app, db
+from models import User, Task
+from cache import ResponseCache, set_response_cache
+import routes  # noqa: F401
+from benchmarks.datagen import generate
+
+# (users, teams, tasks): the large dataset has more of everything, and bigger teams
+DATASETS = {
+    'small': (20, 4, 150),
+    'large': (200, 10, 20_000),
+}
+
+# Tasks touched before /api/tasks/changes, per dataset
+CHANGED_TASKS = {'small': 3, 'large': 15}
+
+failed_requests = []
+
+ROUTES = [
+    '/tasks?per_page=200',
+    '/api/tasks?per_page=200',
+    '/dashboard',
+    '/api/tasks/changes?since={sync_token}',
+]
+
+def pick_users():
+    """Return the first manager and the employee with the most tasks"""
+    manager = User.query.filter_by(role='manager').order_by(User.id).first()
+    busiest = db.session.query(Task.assignee_id).group_by(Task.assignee_id).order_by(
+        func.count(Task.id).desc(), Task.assignee_id
+    ).limit(1).scalar_subquery()
+    employee = User.query.filter(User.id == busiest).one()
+    return {'manager': manager, 'employee': employee}
+
+def request_statements(client, url):
+    """Request a URL and return its status code and how many statements it executed"""
+    statements = 0
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        nonlocal statements
+        statements += 1
+
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    return response.status_code, statements
+
+def touch_tasks(task_ids):
+    """Mark tasks as updated now, as an edit elsewhere would"""
+    db.session.execute(update(Task).where(Task.id.in_(task_ids)).values(updated_at=datetime.utcnow()))
+    db.session.commit()
+
+def count_statements(size):
+    """Generate a dataset and return {(role, route): statement count}"""
+    num_users, num_teams, num_tasks = DATASETS[size]
+    counts = {}
+
+    with app.app_context():
+        generate(num_users, num_tasks, num_teams)
+        for role, user in pick_users().items():
+            client = app.test_client()
+            with client.session_transaction() as sess:
+                sess['user_id'] = user.id
+                sess['user_role'] = user.role
+
+            # Warm up once-per-process work (search backend detection and the like)
+            listing = client.get('/api/tasks?per_page=200').get_json()
+            for route in ROUTES:
+                client.get(route.format(sync_token=listing['sync_token']))
+
+            sync_token = client.get('/api/tasks').get_json()['sync_token']
+            touch_tasks([task['id'] for task in listing['tasks'][:CHANGED_TASKS[size]]])
+
+            for route in ROUTES:
+                set_response_cache(ResponseCache())
+                status_code, statements = request_statements(client, route.format(sync_token=sync_token))
+                if status_code != 200:
+                    failed_requests.append(f"{size} {role} {route} -> {status_code}")
+                counts[(role, route)] = statements
+    return counts
+
+def main():
+    counts = {size: count_statements(size) for size in DATASETS}
+
+    print(f"\n{'route':<45} {'small':>7} {'large':>7}")
+    problems = []
+    for key in counts['small']:
+        small, large = counts['small'][key], counts['large'][key]
+        ok = small == large
+        role, route = key
+        print(f"{'✅' if ok else '❌'} {role + ' ' + route.split('?')[0]:<43} {small:>7} {large:>7}")
+        if not ok:
+            problems.append(key)
+
+    shutil.rmtree(tmp, ignore_errors=True)
+    print()
+    for failure in failed_requests:
+        print(f"❌ {failure}")
+    if problems:
+        print(f"❌ {len(problems)} route(s) run a different number of statements at the two sizes")
+    if problems or failed_requests:
+        sys.exit(1)
+    print("✅ Every route runs the same number of statements at both sizes")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Benchmark every route and API endpoint and save the results as JSON
+Usage: python -m benchmarks.suite [--users N] [--tasks M] [--rounds R] [--output FILE] [--compare FILE]
+
+Generates a synthetic dataset with benchmarks.datagen in
+BENCHMARK_SUITE_DATABASE_URL (default sqlite:///benchmark_suite.db), or
+reuses it if it already has exactly that many users and tasks. Then it
+logs in as a manager and as the busiest employee and requests each route
+R times through the Flask test client.
+
+Each round runs the reads, then revalidates the polling endpoints with
+If-None-Match, then the writes. The writes clean up after themselves
+(tasks are created and deleted, added users are removed), so every round
+and every run sees the same dataset. The first round warms up and is
+not recorded.
+
+For each route the JSON has requests per second, p50/p95/p99 latency and
+SQL statements per request. It goes to benchmark_results/<commit>.json by
+default; pass an earlier file as --compare to print the differences.
+Exits with status 1 if a route answers with an unexpected status.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import urllib.parse
+from importlib.metadata import version
+from datetime import datetime, timedelta
+
+os.environ["DATABASE_URL"] = os.environ.get("BENCHMARK_SUITE_DATABASE_URL", "sqlite:///benchmark_suite.db")
+
+import sqlalchemy
+from sqlalchemy import event, func
+from app import app, db
+from models import User, Task
+from config import PERF_SAMPLE_RATE
+import routes  # noqa: F401
+from benchmarks.datagen import NUM_USERS, NUM_TASKS, BENCHMARK_PASSWORD, ensure_dataset
+from benchmarks.load_test import percentile
+
+ROUNDS = 10
+BATCH_TASKS = 20
+SUITE_USER_PREFIX = 'suite-'
+RESULTS_DIR = 'benchmark_results'
+
+class Scenario:
+    """One request: who sends it, what, and the status it should get back.
+
+    path, data and json may use values from the run state: path is a
+    format string, data and json may be callables taking the state.
+    after(response, state) runs untimed to pick up ids for later requests.
+    """
+
+    def __init__(self, client, method, path, data=None, json=None, headers=None, expect=200,
+                 after=None, stream=False, label=None):
+        self.client = client
+        self.method = method
+        self.path = path
+        self.data = data
+        self.json = json
+        self.headers = headers
+        self.expect = expect if isinstance(expect, tuple) else (expect,)
+        self.after = after
+        self.stream = stream
+        self.name = f"{client} {method} {path}" + (f" ({label})" if label else '')
+
+    def request(self, state):
+        resolve = lambda value: value(state) if callable(value) else value
+        kwargs = {'method': self.method}
+        for key in ('data', 'json', 'headers'):
+            if getattr(self, key) is not None:
+                kwargs[key] = resolve(getattr(self, key))
+        return self.path.format(**state), kwargs
+
+# Hooks that carry values from one response to later requests
+
+def remember_api_tasks(response, state):
+    data = response.get_json()
+    state['sync_token'] = data['sync_token']
+    state['cursor'] = urllib.parse.quote(data['next_cursor'] or '')
+    remember_etag(response, state)
+
+def remember_etag(response, state):
+    state['etags'][state['client'], response.request.path] = response.headers.get('ETag')
+
+def if_none_match(role, path):
+    return lambda state: {'If-None-Match': state['etags'].get((role, path)) or '"none"'}
+
+def remember_form_task(response, state):
+    with app.app_context():
+        state['task_id'] = db.session.query(Task.id).filter_by(title=state['task_title']).scalar()
+
+def remember_batch(response, state):
+    state['batch_ids'] = [item['id'] for item in response.get_json()['results'] if 'id' in item]
+
+def remember_suite_user(response, state):
+    with app.app_context():
+        state['suite_user_id'] = db.session.query(User.id).filter_by(username=state['suite_username']).scalar()
+
+def batch_tasks(state):
+    return {'tasks': [{
+        'title': f"Suite batch {state['round']}.{i}",
+        'assignee_id': state['employee_id'],
+        'priority': ('low', 'medium', 'high')[i % 3],
+        'due_date': state['due_date'],
+        'tags': 'backend, suite',
+    } for i in range(BATCH_TASKS)]}
+
+def scenarios():
+    reads = []
+    for role in ('manager', 'employee'):
+        # An HTML page first: it shows pending flash messages, which would suppress ETags
+        reads += [
+            Scenario(role, 'GET', '/dashboard'),
+            Scenario(role, 'GET', '/tasks'),
+            Scenario(role, 'GET', '/tasks?search=memory+leak'),
+            Scenario(role, 'GET', '/api/dashboard-stats', after=remember_etag),
+            Scenario(role, 'GET', '/api/tasks', after=remember_api_tasks),
+            Scenario(role, 'GET', '/api/tasks?cursor={cursor}', label='page 2'),
+            Scenario(role, 'GET', '/api/tasks/changes?since={sync_token}'),
+            Scenario(role, 'GET', '/api/tasks/export'),
+            Scenario(role, 'GET', '/api/events', stream=True, label='first event'),
+            Scenario(role, 'GET', '/tasks/create'),
+        ]
+    reads += [
+        Scenario('manager', 'GET', '/tasks?status=pending&priority=high'),
+        Scenario('manager', 'GET', '/tasks?sort=due_date&order=asc'),
+        Scenario('manager', 'GET', '/tasks?tag=backend'),
+        Scenario('manager', 'GET', '/tasks?overdue=1'),
+        Scenario('employee', 'GET', '/tasks?due_within=3d&sort=due_date&order=asc'),
+        Scenario('manager', 'GET', '/tasks/{sample_task_id}/edit'),
+        Scenario('manager', 'GET', '/analytics'),
+        Scenario('manager', 'GET', '/analytics/export?days=30'),
+        Scenario('manager', 'GET', '/admin/users'),
+        Scenario('manager', 'GET', '/admin/cache-stats'),
+        Scenario('manager', 'GET', '/admin/perf'),
+        Scenario('manager', 'GET', '/metrics', expect=200 if PERF_SAMPLE_RATE else 404),
+        Scenario('guest', 'GET', '/', expect=302),
+        Scenario('guest', 'GET', '/login'),
+        Scenario('guest', 'GET', '/dashboard', expect=302, label='not logged in'),
+        Scenario('guest', 'GET', '/init-demo-data', expect=302),
+    ]
+
+    revalidations = [
+        Scenario(role, 'GET', path, headers=if_none_match(role, path), expect=304, label='If-None-Match')
+        for role in ('manager', 'employee') for path in ('/api/dashboard-stats', '/api/tasks')
+    ]
+
+    writes = [
+        # Flashes a message too, so it has to come after the revalidations
+        Scenario('employee', 'GET', '/admin/users', expect=302, label='forbidden'),
+        Scenario('guest', 'POST', '/login', expect=302,
+                 data=lambda state: {'username': state['employee_username'], 'password': BENCHMARK_PASSWORD}),
+        Scenario('guest', 'GET', '/logout', expect=302),
+        Scenario('manager', 'POST', '/tasks/create', expect=302, after=remember_form_task,
+                 data=lambda state: {'title': state['task_title'], 'assignee_id': state['employee_id'],
+                                     'priority': 'high', 'due_date': state['due_date'], 'tags': 'suite'}),
+        Scenario('manager', 'POST', '/tasks/{task_id}/edit', expect=302,
+                 data={'status': 'in_progress', 'priority': 'medium', 'tags': 'suite, edited'}),
+        Scenario('manager', 'POST', '/tasks/{task_id}/delete', expect=302),
+        Scenario('manager', 'POST', '/api/tasks/batch/create', json=batch_tasks, after=remember_batch),
+        Scenario('manager', 'POST', '/api/tasks/batch/status',
+                 json=lambda state: {'task_ids': state['batch_ids'], 'status': 'completed'}),
+        Scenario('manager', 'POST', '/api/tasks/batch/reassign',
+                 json=lambda state: {'task_ids': state['batch_ids'], 'assignee_id': state['other_employee_id']}),
+        Scenario('manager', 'POST', '/api/tasks/batch/delete',
+                 json=lambda state: {'task_ids': state['batch_ids']}),
+        Scenario('manager', 'POST', '/admin/add-user', expect=302, after=remember_suite_user,
+                 data=lambda state: {'username': state['suite_username'],
+                                     'email': f"{state['suite_username']}@example.com",
+                                     'first_name': 'Suite', 'last_name': 'User', 'role': 'employee',
+                                     'department': 'Engineering', 'password': BENCHMARK_PASSWORD}),
+        Scenario('manager', 'POST', '/admin/toggle-user/{suite_user_id}', label='deactivate'),
+        Scenario('manager', 'POST', '/admin/toggle-user/{suite_user_id}', label='reactivate'),
+        Scenario('manager', 'POST', '/admin/reset-password/{suite_user_id}', expect=302,
+                 data={'new_password': 'benchmark-reset'}),
+        Scenario('manager', 'POST', '/admin/perf/reset', expect=302),
+    ]
+    return reads + revalidations + writes
+
+def remove_suite_users():
+    with app.app_context():
+        User.query.filter(User.username.startswith(SUITE_USER_PREFIX)).delete(synchronize_session=False)
+        db.session.commit()
+
+def log_in(username):
+    client = app.test_client()
+    response = client.post('/login', data={'username': username, 'password': BENCHMARK_PASSWORD})
+    if response.status_code != 302 or not response.location.endswith('/dashboard'):
+        raise SystemExit(f"❌ Could not log in as {username}")
+    client.get('/dashboard')  # Show the welcome flash so later responses carry ETags
+    return client
+
+def initial_state():
+    with app.app_context():
+        manager = User.query.filter_by(role='manager', is_active=True).order_by(User.id).first()
+        # The busiest employees: the worst case for employee-scoped pages
+        busiest = (db.session.query(User.id, User.username)
+                   .join(Task, Task.assignee_id == User.id)
+                   .filter(User.role == 'employee', User.is_active.is_(True))
+                   .group_by(User.id, User.username)
+                   .order_by(func.count(Task.id).desc(), User.id)
+                   .limit(2).all())
+        sample_task_id = db.session.query(func.min(Task.id)).scalar()
+    return {
+        'manager_username': manager.username,
+        'employee_id': busiest[0].id,
+        'employee_username': busiest[0].username,
+        'other_employee_id': busiest[1].id,
+        'sample_task_id': sample_task_id,
+        'due_date': (datetime.utcnow() + timedelta(days=7)).strftime('%Y-%m-%d'),
+        # Placeholders until the requests that produce them have run
+        'sync_token': '', 'cursor': '', 'task_id': 0, 'batch_ids': [], 'suite_user_id': 0,
+        'etags': {},
+    }
+
+def run(rounds):
+    """Run every scenario rounds + 1 times; return the timed samples and the wall time"""
+    statements = [0]
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute',
+                         lambda *args: statements.__setitem__(0, statements[0] + 1))
+
+    state = initial_state()
+    clients = {
+        'manager': log_in(state['manager_username']),
+        'employee': log_in(state['employee_username']),
+    }
+
+    plan = scenarios()
+    samples = {scenario.name: [] for scenario in plan}
+    failures = {}
+    wall = 0.0
+    for round_number in range(rounds + 1):
+        recording = round_number > 0
+        clients['guest'] = app.test_client()
+        state.update(round=round_number, task_title=f"Suite task {round_number}",
+                     suite_username=f"{SUITE_USER_PREFIX}{round_number}")
+        round_started = time.perf_counter()
+        for scenario in plan:
+            path, kwargs = scenario.request(state)
+            client = clients[scenario.client]
+            state['client'] = scenario.client
+            statements[0] = 0
+            started = time.perf_counter()
+            response = client.open(path, **kwargs)
+            if scenario.stream:
+                next(iter(response.response))
+            else:
+                response.get_data()
+            elapsed = time.perf_counter() - started
+            count = statements[0]
+            if response.status_code not in scenario.expect:
+                failures.setdefault(scenario.name, response.status_code)
+            elif scenario.after:
+                scenario.after(response, state)
+            response.close()
+            if recording:
+                samples[scenario.name].append((elapsed, count, response.status_code))
+        if recording:
+            wall += time.perf_counter() - round_started
+        remove_suite_users()
+    return plan, samples, failures, wall
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        'mean': round(sum(values) / len(values), 3),
+        'p50': round(percentile(values, 0.50), 3),
+        'p95': round(percentile(values, 0.95), 3),
+        'p99': round(percentile(values, 0.99), 3),
+        'max': round(values[-1], 3),
+    }
+
+def git_info():
+    def git(*args):
+        try:
+            return subprocess.run(['git', *args], capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    commit = git('rev-parse', '--short', 'HEAD')
+    return {'commit': commit, 'dirty': bool(git('status', '--porcelain', '--untracked-files=no'))}
+
+def report(plan, samples, wall, dataset, rounds):
+    results = []
+    for scenario in plan:
+        times = [elapsed * 1000 for elapsed, _, _ in samples[scenario.name]]
+        counts = [count for _, count, _ in samples[scenario.name]]
+        statuses = sorted({status for _, _, status in samples[scenario.name]})
+        results.append({
+            'name': scenario.name,
+            'client': scenario.client,
+            'method': scenario.method,
+            'path': scenario.path,
+            'statuses': statuses,
+            'requests': len(times),
+            'requests_per_second': round(len(times) / (sum(times) / 1000), 1),
+            'latency_ms': summarize(times),
+            'queries': summarize(counts),
+        })
+    all_times = [elapsed * 1000 for name in samples for elapsed, _, _ in samples[name]]
+    with app.app_context():
+        database = db.engine.dialect.name
+    return {
+        'suite': 'routes',
+        'created_at': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'git': git_info(),
+        'environment': {
+            'python': platform.python_version(),
+            'flask': version('flask'),
+            'sqlalchemy': sqlalchemy.__version__,
+            'database': database,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'dataset': dataset,
+        'rounds': rounds,
+        'totals': {
+            'requests': len(all_times),
+            'seconds': round(wall, 3),
+            'requests_per_second': round(len(all_times) / wall, 1),
+            'latency_ms': summarize(all_times),
+        },
+        'routes': results,
+    }
+
+def print_report(result):
+    print("\n" + "=" * 100)
+    print(f"{'Route':<62} {'Req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'Queries':>8}")
+    print("-" * 100)
+    for route in result['routes']:
+        latency = route['latency_ms']
+        print(f"{route['name'][:62]:<62} {route['requests_per_second']:>8.1f} {latency['p50']:>8.1f} "
+              f"{latency['p95']:>8.1f} {latency['p99']:>8.1f} {route['queries']['p50']:>8.0f}")
+    totals = result['totals']
+    print("-" * 100)
+    print(f"{'all routes':<62} {totals['requests_per_second']:>8.1f} {totals['latency_ms']['p50']:>8.1f} "
+          f"{totals['latency_ms']['p95']:>8.1f} {totals['latency_ms']['p99']:>8.1f}")
+    print("=" * 100)
+
+def print_comparison(baseline, result):
+    before = {route['name']: route for route in baseline['routes']}
+    print(f"\nCompared with {baseline['git']['commit'] or 'baseline'} "
+          f"({baseline['dataset']['tasks']:,} tasks, {baseline['environment']['database']})")
+    print("=" * 100)
+    print(f"{'Route':<62} {'p50 ms':>16} {'Change':>8} {'Queries':>10}")
+    print("-" * 100)
+    for route in result['routes']:
+        old = before.get(route['name'])
+        if old is None:
+            print(f"{route['name'][:62]:<62} {'new':>16}")
+            continue
+        old_p50, new_p50 = old['latency_ms']['p50'], route['latency_ms']['p50']
+        change = (new_p50 - old_p50) / old_p50 * 100 if old_p50 else 0.0
+        old_queries, new_queries = old['queries']['p50'], route['queries']['p50']
+        marker = "⚠️ " if change > 20 or new_queries > old_queries else "   "
+        print(f"{marker}{route['name'][:59]:<59} {old_p50:>7.1f} → {new_p50:<6.1f} {change:>+7.0f}% "
+              f"{old_queries:>4.0f} → {new_queries:<3.0f}")
+    print("=" * 100)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every Task Tracker route")
+    parser.add_argument('--users', type=int, default=NUM_USERS)
+    parser.add_argument('--tasks', type=int, default=NUM_TASKS)
+    parser.add_argument('--rounds', type=int, default=ROUNDS)
+    parser.add_argument('--output', help=f"JSON file to write (default {RESULTS_DIR}/<commit>.json)")
+    parser.add_argument('--compare', help="an earlier JSON result to compare against")
+    args = parser.parse_args()
+
+    with app.app_context():
+        dataset = ensure_dataset(args.tasks, args.users, exact=True)
+    print(f"Running {args.rounds} rounds (plus one warm-up)...")
+    plan, samples, failures, wall = run(args.rounds)
+    result = report(plan, samples, wall, dataset, args.rounds)
+    print_report(result)
+
+    output = args.output
+    if not output:
+        git = result['git']
+        name = f"{git['commit'] or 'unknown'}{'-dirty' if git['dirty'] else ''}.json"
+        output = os.path.join(RESULTS_DIR, name)
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(json.load(f), result)
+
+    if failures:
+        print(f"\n❌ {len(failures)} route(s) answered with an unexpected status:")
+        for name, status in failures.items():
+            print(f"   • {name}: {status}")
+        sys.exit(1)
+    print("✅ Every route answered as expected")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark bulk user import: the old per-user loop vs the batched CSV import
+Usage: python -m benchmarks.user_import [num_users]
+
+Uses BENCHMARK_USERS_DATABASE_URL (default sqlite:///benchmark_users.db).
+Passwords are hashed with BENCHMARK_HASH_METHOD (default a cheap pbkdf2) so
+the timings show the import itself; the production hash cost is reported
+separately, since it dominates and scales with the number of CPUs.
+"""
+
+import csv
+import os
+import sys
+import tempfile
+import time
+
+os.environ["DATABASE_URL"] = os.environ.get("BENCHMARK_USERS_DATABASE_URL", "sqlite:///benchmark_users.db")
+
+from app import app, db
+from models import User
+from passwords import HashingService, set_hashing_service, HASH_METHOD
+from user_import import read_rows, import_users
+
+NUM_USERS = 10_000
+HASH_METHOD_FOR_BENCHMARK = os.environ.get("BENCHMARK_HASH_METHOD", "pbkdf2:sha256:1000")
+FIELDS = ['username', 'email', 'first_name', 'last_name', 'password', 'role', 'department']
+
+def write_csv(path, num_users):
+    """Users plus a few bad rows: in-file duplicates, a short password, a missing email"""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDS)
+        for i in range(num_users):
+            writer.writerow([f'user{i}', f'user{i}@example.com', 'Bulk', str(i), f'secret{i:06d}',
+                             'manager' if i % 50 == 0 else 'employee', 'Imported'])
+        writer.writerow(['user0', 'other0@example.com', 'Dup', 'User', 'secret123', 'employee', ''])
+        writer.writerow(['shortpw', 'shortpw@example.com', 'Short', 'Password', '123', 'employee', ''])
+        writer.writerow(['noemail', '', 'No', 'Email', 'secret123', 'employee', ''])
+
+def legacy_import(path):
+    """The old bulk_add_users.py loop: two lookups and one serial hash per user"""
+    created = 0
+    for _, row in read_rows(path):
+        if User.query.filter_by(username=row['username']).first():
+            continue
+        if User.query.filter_by(email=row['email']).first():
+            continue
+        if not row['email'] or len(row['password']) < 6:
+            continue
+        user = User(username=row['username'], email=row['email'], first_name=row['first_name'],
+                    last_name=row['last_name'], role=row['role'], department=row['department'] or None)
+        user.set_password(row['password'])
+        db.session.add(user)
+        created += 1
+    db.session.commit()
+    return created
+
+def reset_users():
+    db.session.query(User).delete()
+    db.session.commit()
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+def main():
+    num_users = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_USERS
+    set_hashing_service(HashingService(method=HASH_METHOD_FOR_BENCHMARK))
+
+    with app.app_context(), tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'users.csv')
+        write_csv(path, num_users)
+
+        reset_users()
+        legacy_created, legacy_seconds = timed(legacy_import, path)
+        reset_users()
+        report, import_seconds = timed(import_users, read_rows(path))
+        assert len(report.created) == legacy_created == num_users, (len(report.created), legacy_created)
+
+        cost = HashingService(method=HASH_METHOD)
+        _, one_hash = timed(cost.hash, 'secret')
+        cpus = os.cpu_count() or 1
+
+        print("\n" + "=" * 70)
+        print(f"{num_users:,} users, {len(report.errors)} bad rows, hash method {HASH_METHOD_FOR_BENCHMARK}")
+        print(f"{'Implementation':<28} {'Seconds':>10} {'Users/s':>12}")
+        print("-" * 70)
+        print(f"{'per-user loop':<28} {legacy_seconds:>10.2f} {num_users / legacy_seconds:>12,.0f}")
+        print(f"{'batched import':<28} {import_seconds:>10.2f} {num_users / import_seconds:>12,.0f}")
+        print("-" * 70)
+        print(f"At production cost ({HASH_METHOD}, {one_hash * 1000:.0f} ms per hash), hashing adds about")
+        print(f"{num_users * one_hash:,.0f}s serially or {num_users * one_hash / cpus:,.0f}s on {cpus} CPU(s) with the process pool.")
+        print("=" * 70)
+        for line_number, username, email, message in sorted(report.errors):
+            print(f"  line {line_number}: {username or email} - {message}")
+        reset_users()
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,17 @@
 #!/usr/bin/env python3
 """
-Bulk user creation script for Task Tracker
-Creates multiple users at once from a predefined list
+Bulk user import for Task Tracker
+Streams users from a CSV or JSONL file (columns: username, email, first_name,
+last_name, password, role, department) and creates them in batches.
+Rejected rows are written to an error report next to the input file.
+Usage: python bulk_add_users.py [users.csv | users.jsonl] [--batch-size N] [--report PATH]
+With no file, creates the predefined users below.
 """
 
-from app import app, db
-from models import User
+import argparse
+import time
+from app import app
+from user_import import read_rows, import_users, DEFAULT_BATCH_SIZE
 
 # Define users to create
 USERS_TO_CREATE = [
@@ -34,7 +40,7 @@ USERS_TO_CREATE = [
         'last_name': 'Palakkal',
         'role': 'employee',
         'department': 'Deployment',
-        'password': 'password123''
+        'password': 'password123'
     },
     {
         'username': 'wasimuser',
@@ -47,78 +53,55 @@ USERS_TO_CREATE = [
     }
 ]
 
-def create_bulk_users():
-    """Create multiple users from the predefined list"""
+def print_summary(report, elapsed):
+    print("\n" + "=" * 60)
+    print("SUMMARY")
+    print("=" * 60)
+    print(f"✅ Created {len(report.created)} users in {elapsed:.1f}s")
+    if report.errors:
+        print(f"⚠️  Rejected {len(report.errors)} rows:")
+        for line_number, username, email, message in sorted(report.errors)[:20]:
+            print(f"   • line {line_number}: {username or email or '?'} - {message}")
+        if len(report.errors) > 20:
+            print(f"   ... and {len(report.errors) - 20} more")
+
+def create_bulk_users(path=None, batch_size=DEFAULT_BATCH_SIZE, report_path=None):
+    """Import users from a file, or the predefined list when no file is given"""
     with app.app_context():
-        print("Task Tracker - Bulk User Creation")
+        print("Task Tracker - Bulk User Import")
         print("=" * 40)
         
-        created_users = []
-        skipped_users = []
-        
-        for user_data in USERS_TO_CREATE:
-            # Check if user already exists
-            existing_user = User.query.filter_by(username=user_data['username']).first()
-            existing_email = User.query.filter_by(email=user_data['email']).first()
-            
-            if existing_user or existing_email:
-                skipped_users.append(user_data['username'])
-                print(f"⚠️  Skipping '{user_data['username']}' - already exists")
-                continue
-            
-            try:
-                # Create new user
-                new_user = User()
-                new_user.username = user_data['username']
-                new_user.email = user_data['email']
-                new_user.first_name = user_data['first_name']
-                new_user.last_name = user_data['last_name']
-                new_user.role = user_data['role']
-                new_user.department = user_data['department']
-                new_user.set_password(user_data['password'])
-                
-                db.session.add(new_user)
-                created_users.append(user_data)
-                print(f"✅ Created '{user_data['username']}' ({user_data['role']})")
-                
-            except Exception as e:
-                print(f"❌ Error creating '{user_data['username']}': {str(e)}")
-                db.session.rollback()
-                continue
+        if path:
+            rows = read_rows(path)
+        else:
+            rows = enumerate(USERS_TO_CREATE, 1)
         
-        # Commit all changes
-        if created_users:
-            try:
-                db.session.commit()
-                print(f"\n🎉 Successfully created {len(created_users)} users!")
-            except Exception as e:
-                print(f"❌ Error committing changes: {str(e)}")
-                db.session.rollback()
-                return
+        started = time.perf_counter()
+        report = import_users(rows, batch_size=batch_size)
+        print_summary(report, time.perf_counter() - started)
         
-        # Print summary
-        print("\n" + "=" * 60)
-        print("SUMMARY")
-        print("=" * 60)
+        if report.errors and path:
+            report_path = report_path or f"{path}.errors.csv"
+            report.write_csv(report_path)
+            print(f"\n📄 Error report written to {report_path}")
         
-        if created_users:
-            print(f"✅ Created {len(created_users)} users:")
-            for user in created_users:
-                print(f"   • {user['first_name']} {user['last_name']} ({user['username']}) - {user['role'].title()}")
-        
-        if skipped_users:
-            print(f"\n⚠️  Skipped {len(skipped_users)} existing users:")
-            for username in skipped_users:
-                print(f"   • {username}")
-        
-        # Print login credentials
-        if created_users:
+        # Print login credentials for the predefined users
+        if not path and report.created:
             print(f"\n🔐 LOGIN CREDENTIALS:")
-            for user in created_users:
-                print(f"   Username: {user['username']}")
-                print(f"   Password: {user['password']}")
-                print(f"   Role: {user['role'].title()}")
-                print()
+            for user in USERS_TO_CREATE:
+                if user['username'] in report.created:
+                    print(f"   Username: {user['username']}")
+                    print(f"   Password: {user['password']}")
+                    print(f"   Role: {user['role'].title()}")
+                    print()
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import users from CSV or JSONL")
+    parser.add_argument('path', nargs='?', help="CSV or JSONL file (.csv, .jsonl)")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--report', help="Where to write rejected rows (default: <file>.errors.csv)")
+    args = parser.parse_args()
+    create_bulk_users(args.path, args.batch_size, args.report)
 
 if __name__ == "__main__":
-    create_bulk_users()
\ No newline at end of file
+    main()
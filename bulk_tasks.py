@@ -0,0 +1,271 @@
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import select, func
+from app import db
+from models import User, Task, task_tags
+from sync import record_task_removals
+from tags import normalize_tag_names, get_or_create_tags
+from rollups import ROLLUP_FIELDS, apply_task_changes
+from cache import mark_task_scopes_stale
+from events import task_snapshot, publish_task_event
+
+MAX_BATCH_SIZE = 500
+STATUSES = ('pending', 'in_progress', 'completed')
+PRIORITIES = ('low', 'medium', 'high')
+
+# Columns needed for permission checks, rollup and workload deltas, and event snapshots
+BATCH_COLUMNS = ('id', 'assignee_id', 'created_by_id', 'status', 'due_date', 'priority',
+                 'created_at', 'completed_at', 'estimated_hours', 'actual_hours')
+SNAPSHOT_FIELDS = ('id', 'assignee_id', 'status', 'due_date')
+
+class BatchResult:
+    """Per-item outcomes of a batch, plus the events to publish once it has committed"""
+
+    def __init__(self):
+        self.items = []
+        self.events = []
+
+    def add(self, task_id, outcome, error=None):
+        item = {'id': task_id, 'result': outcome}
+        if error:
+            item['error'] = error
+        self.items.append(item)
+
+    def publish(self):
+        for event_type, before, after in self.events:
+            publish_task_event(event_type, before, after)
+
+    def to_dict(self):
+        return {'results': self.items, 'summary': dict(Counter(item['result'] for item in self.items))}
+
+# Permission rules, the same as for editing and deleting a single task
+
+def can_edit(user, row):
+    return user.is_manager() or row['assignee_id'] == user.id or row['created_by_id'] == user.id
+
+def can_delete(user, row):
+    return user.is_manager() or row['created_by_id'] == user.id
+
+def can_reassign(user, row):
+    return user.is_manager()
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def _check_size(values, name):
+    if not isinstance(values, list) or not values:
+        raise ValueError(f"{name} must be a non-empty list")
+    if len(values) > MAX_BATCH_SIZE:
+        raise ValueError(f"At most {MAX_BATCH_SIZE} {name} per batch")
+
+def _task_ids(raw_ids, result):
+    """Parse ids, reporting bad entries as invalid and dropping duplicates"""
+    _check_size(raw_ids, 'task_ids')
+    ids = []
+    for raw in raw_ids:
+        task_id = _int_or_none(raw)
+        if task_id is None:
+            result.add(raw, 'invalid', 'Task id must be an integer')
+        elif task_id not in ids:
+            ids.append(task_id)
+    return ids
+
+def _active_user_ids(ids):
+    ids = {user_id for user_id in ids if user_id is not None}
+    if not ids:
+        return set()
+    return set(db.session.scalars(select(User.id).where(User.id.in_(ids), User.is_active.is_(True))))
+
+def _allowed_rows(user, ids, permission, result):
+    """Load the batch in one query and return the rows the user may change, in request order.
+
+    Rows are locked until commit where the database supports it, so the
+    values used for the rollup and events cannot change underneath us.
+    """
+    tasks = Task.__table__
+    rows = {row['id']: dict(row) for row in db.session.execute(
+        select(*[tasks.c[name] for name in BATCH_COLUMNS]).where(tasks.c.id.in_(ids)).with_for_update()
+    ).mappings()}
+
+    allowed = []
+    for task_id in ids:
+        row = rows.get(task_id)
+        if row is None:
+            result.add(task_id, 'not_found')
+        elif not permission(user, row):
+            result.add(task_id, 'forbidden')
+        else:
+            allowed.append(row)
+    return allowed
+
+def _snapshot(row):
+    return {name: row[name] for name in SNAPSHOT_FIELDS}
+
+def _sync_derived(changes):
+    """Bring the rollup, workload counters and response cache in step with (before, after) rows written in bulk"""
+    apply_task_changes(db.session.connection(), [
+        (before and {name: before[name] for name in ROLLUP_FIELDS},
+         after and {name: after[name] for name in ROLLUP_FIELDS})
+        for before, after in changes
+    ])
+    mark_task_scopes_stale(db.session, {row['assignee_id'] for pair in changes for row in pair if row})
+
+def _update(rows, values, new_values, result):
+    """One UPDATE for all rows; new_values(row) gives each row's columns after it"""
+    if not rows:
+        return
+    tasks = Task.__table__
+    db.session.execute(tasks.update().where(tasks.c.id.in_([row['id'] for row in rows])).values(values))
+
+    changes = [(row, dict(row, **new_values(row))) for row in rows]
+    for before, after in changes:
+        result.add(before['id'], 'updated')
+        result.events.append(('task.updated', _snapshot(before), _snapshot(after)))
+    _sync_derived(changes)
+
+def update_status(user, raw_ids, status):
+    """Set the status of many tasks, stamping or clearing completed_at as an edit does"""
+    if status not in STATUSES:
+        raise ValueError(f"Status must be one of: {', '.join(STATUSES)}")
+    result = BatchResult()
+    rows = _allowed_rows(user, _task_ids(raw_ids, result), can_edit, result)
+
+    changed = []
+    for row in rows:
+        if row['status'] == status:
+            result.add(row['id'], 'unchanged')
+        else:
+            changed.append(row)
+
+    now = datetime.utcnow()
+    if status == 'completed':
+        completed_at = func.coalesce(Task.__table__.c.completed_at, now)
+        new_values = lambda row: {'status': status, 'completed_at': row['completed_at'] or now}
+    else:
+        completed_at = None
+        new_values = lambda row: {'status': status, 'completed_at': None}
+    _update(changed, {'status': status, 'completed_at': completed_at, 'updated_at': now}, new_values, result)
+    return result
+
+def reassign(user, raw_ids, assignee_id):
+    """Move many tasks to another active user (managers only)"""
+    assignee_id = _int_or_none(assignee_id)
+    if assignee_id is None:
+        raise ValueError("assignee_id must be an integer")
+    if assignee_id not in _active_user_ids([assignee_id]):
+        raise ValueError("Assignee not found or inactive")
+    result = BatchResult()
+    rows = _allowed_rows(user, _task_ids(raw_ids, result), can_reassign, result)
+
+    changed = []
+    for row in rows:
+        if row['assignee_id'] == assignee_id:
+            result.add(row['id'], 'unchanged')
+        else:
+            changed.append(row)
+
+    record_task_removals([(row['id'], row['assignee_id']) for row in changed], reason='reassigned')
+    _update(changed, {'assignee_id': assignee_id, 'updated_at': datetime.utcnow()},
+            lambda row: {'assignee_id': assignee_id}, result)
+    return result
+
+def delete(user, raw_ids):
+    """Delete many tasks with one DELETE for their tags and one for the tasks"""
+    result = BatchResult()
+    rows = _allowed_rows(user, _task_ids(raw_ids, result), can_delete, result)
+    if not rows:
+        return result
+
+    ids = [row['id'] for row in rows]
+    record_task_removals([(row['id'], row['assignee_id']) for row in rows])
+    db.session.execute(task_tags.delete().where(task_tags.c.task_id.in_(ids)))
+    db.session.execute(Task.__table__.delete().where(Task.__table__.c.id.in_(ids)))
+
+    for row in rows:
+        result.add(row['id'], 'deleted')
+        result.events.append(('task.deleted', _snapshot(row), None))
+    _sync_derived([(row, None) for row in rows])
+    return result
+
+def _clean_item(item, active_ids):
+    """Return (Task column values, tags string, None) for a valid item, or (None, None, error)"""
+    if not isinstance(item, dict):
+        return None, None, "Expected a JSON object"
+    title = str(item.get('title') or '').strip()
+    if not title:
+        return None, None, "Title is required"
+    assignee_id = _int_or_none(item.get('assignee_id'))
+    if assignee_id is None:
+        return None, None, "assignee_id must be an integer"
+    if assignee_id not in active_ids:
+        return None, None, "Assignee not found or inactive"
+    priority = item.get('priority') or 'medium'
+    if priority not in PRIORITIES:
+        return None, None, f"Priority must be one of: {', '.join(PRIORITIES)}"
+
+    due_date = None
+    if item.get('due_date'):
+        try:
+            due_date = datetime.strptime(str(item['due_date']), '%Y-%m-%d')
+        except ValueError:
+            return None, None, "Invalid due date format"
+    estimated_hours = None
+    if item.get('estimated_hours') not in (None, ''):
+        try:
+            estimated_hours = float(item['estimated_hours'])
+        except (TypeError, ValueError):
+            return None, None, "estimated_hours must be a number"
+
+    values = {
+        'title': title,
+        'description': item.get('description'),
+        'assignee_id': assignee_id,
+        'priority': priority,
+        'due_date': due_date,
+        'category': item.get('category'),
+        'estimated_hours': estimated_hours,
+    }
+    return values, item.get('tags'), None
+
+def create(user, items):
+    """Create many tasks in one flush. Invalid items are reported and skipped.
+
+    Results are keyed by the item's position in the request, with the new id on success.
+    """
+    _check_size(items, 'tasks')
+    result = BatchResult()
+    active_ids = _active_user_ids(_int_or_none(item.get('assignee_id'))
+                                  for item in items if isinstance(item, dict))
+    cleaned = [_clean_item(item, active_ids) for item in items]
+
+    # Resolve every tag name in the batch with one lookup
+    all_names = []
+    for values, tags_string, _ in cleaned:
+        for name in normalize_tag_names(tags_string) if values else ():
+            if name not in all_names:
+                all_names.append(name)
+    tags_by_name = {tag.name: tag for tag in get_or_create_tags(all_names)}
+
+    created = []
+    for index, (values, tags_string, error) in enumerate(cleaned):
+        if error:
+            created.append((index, None, error))
+            continue
+        names = normalize_tag_names(tags_string)
+        task = Task(created_by_id=user.id, tags=', '.join(names) or None,
+                    tag_list=[tags_by_name[name] for name in names], **values)
+        db.session.add(task)
+        created.append((index, task, None))
+
+    # The rollup and cache hooks see these as ordinary ORM inserts
+    db.session.flush()
+    for index, task, error in created:
+        if task is None:
+            result.items.append({'index': index, 'result': 'invalid', 'error': error})
+        else:
+            result.items.append({'index': index, 'id': task.id, 'result': 'created'})
+            result.events.append(('task.created', None, task_snapshot(task)))
+    return result
@@ -0,0 +1,209 @@
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event, inspect
+from app import db
+from models import User, Task, Team, TeamMember
+from replicas import reading_from_replica
+from config import REPLICA_MAX_LAG_SECONDS
+
+# Views whose data is cached, per scope. Commits that touch tasks invalidate
+# the scopes those tasks belong to; commits that touch users or teams
+# invalidate all.
+CACHED_VIEWS = ('dashboard', 'analytics', 'api_dashboard_stats')
+
+# Overdue counts and date windows move with the clock, not just with commits
+CACHE_TTL_SECONDS = 60
+CACHE_MAX_ENTRIES = 1024
+
+MANAGER_SCOPE = 'manager'
+
+def assignee_scope(assignee_id):
+    return f'assignee:{int(assignee_id)}'
+
+def team_scope(manager_id):
+    return f'team:{int(manager_id)}'
+
+def user_scope(user):
+    """Managers seeing every task share one scope; team views get one per manager,
+    employees one per assignee"""
+    if user.assignee_ids is None:
+        return MANAGER_SCOPE
+    return team_scope(user.id) if user.is_manager() else assignee_scope(user.id)
+
+class LRUCacheBackend:
+    """Response cache storage in this process, least recently used entries evicted first.
+
+    A shared store (e.g. Redis) can be plugged in with
+    set_response_cache(ResponseCache(backend)), given the same four methods.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (True, value) for a live entry, (False, None) otherwise"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+class ResponseCache:
+    """Caches view data by (view, scope) on top of a storage backend, counting hits and misses"""
+
+    def __init__(self, backend=None, ttl=CACHE_TTL_SECONDS):
+        self.backend = backend or LRUCacheBackend()
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._invalidated_at = {}
+        # Team scopes computed here, by the assignee scopes that invalidate them
+        self._team_scopes = {}
+
+    @staticmethod
+    def key(view, scope):
+        return f'response:{view}:{scope}'
+
+    def get_or_compute(self, view, user, compute, version=None):
+        """Return the cached value for a view in the user's scope, computing it on a miss.
+
+        With a version (e.g. the scope_version() an ETag was built from), an
+        entry stored under another version is a miss. That catches changes this
+        process was never told about: writes in other workers, and deadlines passing.
+        """
+        scope = user_scope(user)
+        key = self.key(view, scope)
+        if user.team_scoped:
+            self._track_team_scope(scope, user.assignee_ids)
+        found, entry = self.backend.get(key)
+        if found and version is not None and entry[0] != version:
+            found = False
+        with self._lock:
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if found:
+            return entry[1]
+        value = compute()
+        if not (reading_from_replica() and self._recently_invalidated(scope)):
+            self.backend.set(key, (version, value), self.ttl)
+        return value
+
+    def _track_team_scope(self, scope, assignee_ids):
+        with self._lock:
+            for assignee_id in assignee_ids:
+                self._team_scopes.setdefault(assignee_scope(assignee_id), set()).add(scope)
+
+    def _recently_invalidated(self, scope):
+        """True if a replica may not have the change that invalidated this scope yet;
+        storing data read from it could then serve the old data for a whole TTL"""
+        cutoff = time.monotonic() - REPLICA_MAX_LAG_SECONDS
+        with self._lock:
+            return max(self._invalidated_at.get(scope, 0), self._invalidated_at.get(None, 0)) > cutoff
+
+    def invalidate(self, scopes=None):
+        """Drop cached data for the given scopes, or everything when scopes is None"""
+        now = time.monotonic()
+        with self._lock:
+            if scopes is not None:
+                # A task change also reaches the team views its assignee is in
+                scopes = set(scopes).union(*(self._team_scopes.get(scope, ()) for scope in scopes))
+            for scope in ([None] if scopes is None else scopes):
+                self._invalidated_at[scope] = now
+        if scopes is None:
+            self.backend.clear()
+        else:
+            self.backend.delete_many([self.key(view, scope) for view in CACHED_VIEWS for scope in scopes])
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            'backend': type(self.backend).__name__,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups, 3) if lookups else None,
+        }
+
+_response_cache = ResponseCache()
+
+def get_response_cache():
+    return _response_cache
+
+def set_response_cache(cache):
+    global _response_cache
+    _response_cache = cache
+
+# Invalidate after commit, once the new data is visible to other requests
+
+def _task_assignees(task, is_new):
+    """Assignee ids a task belonged to before this flush and belongs to after it.
+
+    Returns None when the previous assignee is unknown (the attribute was never loaded).
+    """
+    history = inspect(task).attrs.assignee_id.history
+    if not is_new and not (history.deleted or history.unchanged):
+        return None
+    return {assignee_id for assignee_id in (*history.deleted, *history.unchanged, *history.added)
+            if assignee_id is not None}
+
+def mark_task_scopes_stale(session, assignee_ids):
+    """Queue invalidation for set-based task writes, which the flush hook cannot see"""
+    stale = session.info.setdefault('stale_cache_scopes', set())
+    stale.add(MANAGER_SCOPE)
+    stale.update(assignee_scope(assignee_id) for assignee_id in assignee_ids)
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_stale_scopes(session, flush_context):
+    stale = session.info.setdefault('stale_cache_scopes', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (User, Team, TeamMember)):
+            stale.add(None)
+        elif isinstance(obj, Task):
+            assignees = _task_assignees(obj, obj in session.new)
+            if assignees is None:
+                stale.add(None)
+                continue
+            stale.add(MANAGER_SCOPE)
+            stale.update(assignee_scope(assignee_id) for assignee_id in assignees)
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_stale_scopes(session):
+    stale = session.info.pop('stale_cache_scopes', None)
+    if not stale:
+        return
+    get_response_cache().invalidate(None if None in stale else stale)
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_stale_scopes(session):
+    session.info.pop('stale_cache_scopes', None)
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Check the user_task_counts workload counters against the tasks table
+Reports users whose counters are off and exits 1 if any are. --repair
+rebuilds the counters from the tasks table; --refresh folds tasks that
+fell due into the stored overdue counts (schedule it daily).
+Usage: python check_workload.py [--repair] [--refresh]
+"""
+
+import argparse
+import sys
+import time
+from app import app
+from workload import check_user_task_counts, rebuild_user_task_counts, refresh_overdue_counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the per-user workload counters")
+    parser.add_argument('--repair', action='store_true', help="rebuild the counters if any are off")
+    parser.add_argument('--refresh', action='store_true', help="refresh stored overdue counts first")
+    args = parser.parse_args()
+
+    with app.app_context():
+        if args.refresh:
+            started = time.perf_counter()
+            rows = refresh_overdue_counts()
+            print(f"Refreshed overdue counts for {rows} users in {time.perf_counter() - started:.2f}s")
+
+        mismatches = check_user_task_counts()
+        if not mismatches:
+            print("✅ Workload counters match the tasks table")
+            return
+
+        print(f"❌ Workload counters are off for {len(mismatches)} users:")
+        for user_id, columns in mismatches.items():
+            details = ', '.join(f"{name} {stored} (expected {expected})"
+                                for name, (stored, expected) in columns.items())
+            print(f"  user {user_id}: {details}")
+
+        if not args.repair:
+            print("Run with --repair to rebuild them")
+            sys.exit(1)
+
+        started = time.perf_counter()
+        rows = rebuild_user_task_counts()
+        print(f"✅ Rebuilt counters for {rows} users in {time.perf_counter() - started:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import hashlib
+from datetime import datetime, timedelta
+from flask import request, session, make_response, g
+from sqlalchemy import func
+from app import db
+from models import Task, TaskTombstone
+from principal import current_principal
+from deadlines import deadline_windows
+from teams import in_scope
+from cache import user_scope
+
+def scope_version(user, session=None, windows=()):
+    """A cheap fingerprint of the tasks a user can see, answered by index seeks.
+
+    Inserts and updates move max(updated_at). Deletes and reassignments out of
+    the scope write a tombstone (see sync.py), which moves max(removed_at).
+    The next open deadline changes when a task becomes overdue, which moves
+    the overdue counters without any write. Each of windows (timedeltas) adds
+    the next open deadline after now + window, which changes when a task
+    enters that window, e.g. becomes due soon. Unlike a row count, none of
+    these needs to scan the scope.
+    """
+    session = session or db.session
+    now = datetime.utcnow()
+    last_updated = session.query(func.max(Task.updated_at))
+    last_removed = session.query(func.max(TaskTombstone.removed_at))
+    if user.assignee_ids is not None:
+        last_updated = last_updated.filter(in_scope(Task.assignee_id, user.assignee_ids))
+        last_removed = last_removed.filter(in_scope(TaskTombstone.assignee_id, user.assignee_ids))
+
+    next_deadlines = []
+    for window in (timedelta(0), *windows):
+        next_deadline = session.query(Task.due_date).filter(
+            Task.due_date >= now + window, Task.status != 'completed'
+        )
+        if user.assignee_ids is not None:
+            next_deadline = next_deadline.filter(in_scope(Task.assignee_id, user.assignee_ids))
+        next_deadlines.append(next_deadline.order_by(Task.due_date).limit(1).scalar_subquery())
+
+    return tuple(session.query(
+        last_updated.scalar_subquery(),
+        last_removed.scalar_subquery(),
+        *next_deadlines,
+    ).one())
+
+def compute_etag(user, *variant, session=None, windows=(), version=None):
+    """ETag for a user's view of their scope; version is scope_version() if already known"""
+    version = version or scope_version(user, session, windows)
+    # The scope key tells a manager's team and organization views apart
+    parts = [user.id, user.role, user_scope(user), *version, *variant]
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+def conditional_get(per_page_url=False, weak=False):
+    """Answer If-None-Match with 304 before running a view, and tag its response.
+
+    per_page_url: the representation also depends on the query string and on
+    today's date, so both go into the ETag, as do the deadlines that move
+    rows in or out of due soon and a due_within filter. weak: the body
+    can differ in immaterial bytes (e.g. a fresh sync token) for the same ETag.
+    The view can pass g.scope_version to the response cache, so a cached body
+    is only served with the ETag it was computed for.
+    Must be applied inside login_required.
+    """
+    def decorator(f):
+        def decorated_function(*args, **kwargs):
+            # Pending flash messages are shown by the next render; don't skip it
+            if request.method != 'GET' or session.get('_flashes'):
+                return f(*args, **kwargs)
+
+            user = current_principal()
+            variant, windows = (), ()
+            if per_page_url:
+                variant = (request.full_path, datetime.utcnow().date())
+                windows = deadline_windows(request.args)
+            g.scope_version = scope_version(user, windows=windows)
+            etag = compute_etag(user, *variant, version=g.scope_version)
+
+            # If-None-Match always uses weak comparison
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+            response.set_etag(etag, weak=weak)
+            # Per-user content: browsers may keep it but must revalidate every time
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        decorated_function.__name__ = f.__name__
+        return decorated_function
+    return decorator
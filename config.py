@@ -0,0 +1,68 @@
+import os
+
+# "development" (the default) or "production". Production turns off DEBUG
+# logging and schema creation at startup, and sizes the connection pool
+# to the serving profile below.
+APP_ENV = os.environ.get("APP_ENV", "development").lower()
+IS_PRODUCTION = APP_ENV == "production"
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO" if IS_PRODUCTION else "DEBUG").upper()
+
+# Serving profile, shared with gunicorn.conf.py: worker processes and
+# request threads per worker
+WORKERS = int(os.environ.get("WEB_CONCURRENCY", 0)) or (os.cpu_count() or 1) * 2 + 1
+THREADS = int(os.environ.get("WEB_THREADS", 4))
+
+# Live event streams (/api/events) each worker keeps open. A stream holds
+# its thread for as long as the page is open, so gunicorn gives each worker
+# this many threads on top of THREADS; streams beyond it are refused and
+# those pages fall back to polling. Streams use no database connection.
+EVENT_STREAMS = int(os.environ.get("EVENT_STREAMS_PER_WORKER", THREADS))
+
+# Threads gunicorn runs per worker. The stream threads are not set aside:
+# while streams are closed they serve ordinary requests like the others.
+WORKER_THREADS = THREADS + EVENT_STREAMS
+
+# Optional cap on connections all workers may open together, e.g. the
+# database's max_connections minus what other clients need
+DB_MAX_CONNECTIONS = int(os.environ.get("DB_MAX_CONNECTIONS", 0)) or None
+
+def pool_settings(workers=WORKERS, threads=WORKER_THREADS, max_connections=DB_MAX_CONNECTIONS):
+    """Return (pool_size, max_overflow) for one worker process.
+
+    A request holds at most one connection, so each of the worker's threads,
+    stream threads included, gets a pooled one; the overflow covers streamed
+    exports that outlive their thread's next request. With max_connections
+    the pools of all workers fit under it.
+    """
+    pool_size = int(os.environ.get("DB_POOL_SIZE", 0)) or threads
+    max_overflow = int(os.environ.get("DB_MAX_OVERFLOW", max(1, threads // 2)))
+    if max_connections:
+        per_worker = max(1, max_connections // workers)
+        pool_size = min(pool_size, per_worker)
+        max_overflow = max(0, min(max_overflow, per_worker - pool_size))
+    return pool_size, max_overflow
+
+def engine_options(database_url):
+    """SQLAlchemy engine options for the current mode"""
+    options = {
+        "pool_recycle": 300,
+        "pool_pre_ping": True,
+    }
+    if IS_PRODUCTION and not database_url.startswith("sqlite"):
+        pool_size, max_overflow = pool_settings()
+        options.update(pool_size=pool_size, max_overflow=max_overflow, pool_timeout=10)
+    return options
+
+# Optional read replicas, comma-separated URLs. Views marked read_replica
+# read from them; everything else, and any user who wrote within
+# REPLICA_MAX_LAG_SECONDS, uses the primary.
+REPLICA_URLS = [url.strip() for url in os.environ.get("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_MAX_LAG_SECONDS = float(os.environ.get("REPLICA_MAX_LAG_SECONDS", 5))
+
+# Request profiling: the share of requests timed (0 turns it off, 1 times
+# every request). Sampled requests get a Server-Timing header and feed
+# /admin/perf and /metrics. METRICS_TOKEN, if set, is required as a bearer
+# token on /metrics.
+PERF_SAMPLE_RATE = float(os.environ.get("PERF_SAMPLE_RATE", 0))
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
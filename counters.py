@@ -0,0 +1,55 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+
+# Shared by the counter tables the app maintains alongside tasks
+# (task_daily_stats in rollups.py, user_task_counts in workload.py)
+
+# Float sums drift by rounding as hours are added and removed
+HOURS_TOLERANCE = 1e-6
+
+def upsert(connection, table, key, row, changes):
+    """Insert row, or apply changes ({column: SQL expression}) to the row
+    with the same values in the key columns"""
+    dialect = connection.dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        connection.execute(insert(table).values(**row).on_conflict_do_update(
+            index_elements=[table.c[name] for name in key], set_=changes
+        ))
+        return
+
+    updated = connection.execute(
+        table.update().where(*[table.c[name] == row[name] for name in key]).values(changes)
+    ).rowcount
+    if not updated:
+        connection.execute(table.insert().values(**row))
+
+def compare_counters(stored_query, expected_query, key, columns, hours_columns=()):
+    """Run both queries and return {key: {column: (stored, expected)}} for rows that differ.
+
+    key maps a result row to its key. Columns in hours_columns may differ by
+    rounding; a row missing on one side counts as all zeros.
+    """
+    # A connection of its own, so the isolation level can be set whatever the
+    # session is in the middle of
+    options = {}
+    if db.engine.dialect.name == 'postgresql':
+        # Read both sides from one snapshot, so concurrent writes are not reported
+        options['isolation_level'] = 'REPEATABLE READ'
+    with db.engine.connect().execution_options(**options) as connection:
+        stored = {key(row): row._asdict() for row in connection.execute(stored_query)}
+        expected = {key(row): row._asdict() for row in connection.execute(expected_query)}
+
+    empty = dict.fromkeys(columns, 0)
+    mismatches = {}
+    for row_key in sorted(stored.keys() | expected.keys()):
+        have, want = stored.get(row_key, empty), expected.get(row_key, empty)
+        wrong = {}
+        for name in columns:
+            off = abs((have[name] or 0) - (want[name] or 0))
+            if off > (HOURS_TOLERANCE * max(1, abs(want[name] or 0)) if name in hours_columns else 0):
+                wrong[name] = (have[name], want[name])
+        if wrong:
+            mismatches[row_key] = wrong
+    return mismatches
@@ -0,0 +1,37 @@
+import re
+from datetime import datetime, timedelta
+from sqlalchemy import case
+from sqlalchemy.orm import with_expression
+from models import Task
+
+# Open tasks due within this long are flagged "due soon" in task lists
+DUE_SOON = timedelta(days=3)
+
+DUE_WITHIN_UNITS = {'h': 'hours', 'd': 'days', 'w': 'weeks'}
+MAX_DUE_WITHIN = timedelta(days=366)
+
+def parse_due_within(value):
+    """Parse a due_within filter such as '3d', '12h' or '2w'; None if missing or invalid"""
+    match = re.fullmatch(r'(\d{1,4})([hdw])', (value or '').strip().lower())
+    if not match:
+        return None
+    window = timedelta(**{DUE_WITHIN_UNITS[match.group(2)]: int(match.group(1))})
+    return window if timedelta(0) < window <= MAX_DUE_WITHIN else None
+
+def deadline_windows(args):
+    """How far ahead a task list's rows depend on deadlines: its due-soon flags and due_within filter"""
+    window = parse_due_within(args.get('due_within'))
+    return (DUE_SOON, window) if window else (DUE_SOON,)
+
+def due_state(now=None):
+    """SQL expression for Task.due_state, using one clock for every row"""
+    now = now or datetime.utcnow()
+    return case(
+        (Task.is_overdue_at(now), 'overdue'),
+        (Task.is_due_within(now, DUE_SOON), 'due_soon'),
+        else_=None,
+    )
+
+def with_due_state(query, now=None):
+    """Load Task.due_state with the query's rows rather than computing it per row"""
+    return query.options(with_expression(Task.due_state, due_state(now)))
@@ -0,0 +1,144 @@
+import queue
+import threading
+from datetime import datetime
+from stats import STAT_KEYS, task_stat_contributions
+from config import EVENT_STREAMS
+
+# Seconds between keep-alive comments on an idle event stream
+HEARTBEAT_SECONDS = 15
+
+# Event streams this process may hold open, each on a thread of its own
+_stream_slots = threading.BoundedSemaphore(EVENT_STREAMS)
+
+def acquire_stream_slot():
+    """Reserve one of this process's event stream slots; False if all are taken"""
+    return _stream_slots.acquire(blocking=False)
+
+def release_stream_slot():
+    _stream_slots.release()
+
+class Subscription:
+    """One listener's queue of events"""
+
+    def __init__(self, bus, max_pending):
+        self.bus = bus
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.overflowed = False
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # The listener fell behind; it will be told to resync instead
+            self.overflowed = True
+
+    def get(self, timeout=None):
+        """Return the next event, a resync marker after an overflow, or None on timeout"""
+        if self.overflowed:
+            self.overflowed = False
+            with self.queue.mutex:
+                self.queue.queue.clear()
+            return {'type': 'resync'}
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+class InProcessEventBus:
+    """Delivers task events to live listeners in this process only.
+
+    A broker-backed bus (e.g. Redis pub/sub) with the same publish, subscribe
+    and unsubscribe methods can be installed with set_event_bus().
+    """
+
+    def __init__(self, max_pending=100):
+        self.max_pending = max_pending
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def publish(self, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription.put(event)
+
+    def subscribe(self):
+        subscription = Subscription(self, self.max_pending)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+_event_bus = InProcessEventBus()
+
+def get_event_bus():
+    return _event_bus
+
+def set_event_bus(bus):
+    global _event_bus
+    _event_bus = bus
+
+def task_snapshot(task):
+    """Capture the fields of a task that decide who sees it and which counters it affects"""
+    return {
+        'id': task.id,
+        'assignee_id': task.assignee_id,
+        'status': task.status,
+        'due_date': task.due_date,
+    }
+
+def publish_task_event(event_type, before, after):
+    """Publish a task.created / task.updated / task.deleted event.
+
+    before and after are task_snapshot() dicts (None for create and delete
+    respectively). Call this only after the change has been committed.
+    """
+    for snapshot in (before, after):
+        if snapshot and snapshot['assignee_id'] is not None:
+            snapshot['assignee_id'] = int(snapshot['assignee_id'])
+    get_event_bus().publish({
+        'type': event_type,
+        'task_id': (after or before)['id'],
+        'before': before,
+        'after': after,
+    })
+
+def event_for_user(event, assignee_ids):
+    """Scope an event to one listener, or return None if the task is outside their scope.
+
+    assignee_ids is the listener's Principal.assignee_ids (None: every task).
+    The payload carries the change to that listener's dashboard counters.
+    """
+    if event['type'] == 'resync':
+        return event
+
+    def visible(snapshot):
+        return snapshot is not None and (assignee_ids is None or snapshot['assignee_id'] in assignee_ids)
+
+    before = event['before'] if visible(event['before']) else None
+    after = event['after'] if visible(event['after']) else None
+    if before is None and after is None:
+        return None
+
+    now = datetime.utcnow()
+    old_counts = task_stat_contributions(before, now)
+    new_counts = task_stat_contributions(after, now)
+
+    # A reassignment looks like a delete to the old assignee and a create to the new one
+    event_type = event['type']
+    if after is None:
+        event_type = 'task.deleted'
+    elif before is None:
+        event_type = 'task.created'
+
+    return {
+        'type': event_type,
+        'task_id': event['task_id'],
+        'stats_delta': {key: new_counts[key] - old_counts[key] for key in STAT_KEYS},
+    }
@@ -0,0 +1,115 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from flask import Response, stream_with_context
+from sqlalchemy.orm import aliased
+from app import db
+from models import User, Task, TaskDailyStat
+from pagination import sort_clauses
+from teams import in_scope
+
+# Rows fetched per round trip (a server-side cursor on PostgreSQL) and per chunk sent
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+Assignee = aliased(User)
+
+TASK_EXPORT_COLUMNS = {
+    'id': Task.id,
+    'title': Task.title,
+    'description': Task.description,
+    'status': Task.status,
+    'priority': Task.priority,
+    'category': Task.category,
+    'tags': Task.tags,
+    'due_date': Task.due_date,
+    'created_at': Task.created_at,
+    'updated_at': Task.updated_at,
+    'completed_at': Task.completed_at,
+    'assignee_id': Task.assignee_id,
+    'assignee_name': Assignee.first_name + ' ' + Assignee.last_name,
+    'created_by_id': Task.created_by_id,
+    'estimated_hours': Task.estimated_hours,
+    'actual_hours': Task.actual_hours,
+}
+
+ANALYTICS_EXPORT_COLUMNS = {
+    'day': TaskDailyStat.day,
+    'assignee_id': TaskDailyStat.assignee_id,
+    'assignee_name': User.first_name + ' ' + User.last_name,
+    'priority': TaskDailyStat.priority,
+    'created_count': TaskDailyStat.created_count,
+    'completed_count': TaskDailyStat.completed_count,
+    'completion_hours': TaskDailyStat.completion_hours,
+}
+
+def task_export_rows(query, sort_by='created_at', sort_order='desc', relevance=None):
+    """Stream a filtered task query as plain rows in task list order, EXPORT_BATCH_SIZE at a time"""
+    return query.outerjoin(Assignee, Assignee.id == Task.assignee_id).with_entities(
+        *[column.label(name) for name, column in TASK_EXPORT_COLUMNS.items()]
+    ).order_by(*sort_clauses(sort_by, sort_order, relevance)).yield_per(EXPORT_BATCH_SIZE)
+
+def analytics_export_rows(since=None, assignee_ids=None):
+    """Stream the daily rollup per assignee and priority, oldest day first.
+
+    assignee_ids narrows it to a team (see Principal.assignee_ids).
+    """
+    query = db.session.query(
+        *[column.label(name) for name, column in ANALYTICS_EXPORT_COLUMNS.items()]
+    ).join(User, User.id == TaskDailyStat.assignee_id).filter(
+        (TaskDailyStat.created_count != 0) | (TaskDailyStat.completed_count != 0)
+    )
+    if since is not None:
+        query = query.filter(TaskDailyStat.day >= since)
+    if assignee_ids is not None:
+        query = query.filter(in_scope(TaskDailyStat.assignee_id, assignee_ids))
+    return query.order_by(
+        TaskDailyStat.day, TaskDailyStat.assignee_id, TaskDailyStat.priority
+    ).yield_per(EXPORT_BATCH_SIZE)
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def _csv_chunks(columns, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    # Send the header before the query runs, so the download starts at once
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    for count, row in enumerate(rows, 1):
+        writer.writerow(['' if value is None else _plain(value) for value in row])
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def _ndjson_chunks(columns, rows):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({name: _plain(value) for name, value in zip(columns, row)}))
+        if len(lines) == EXPORT_BATCH_SIZE:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+def export_response(columns, rows, file_format, filename):
+    """A streamed download of rows; memory use stays flat however many rows there are"""
+    mimetype, extension = EXPORT_FORMATS[file_format]
+    chunks = _csv_chunks if file_format == 'csv' else _ndjson_chunks
+    return Response(stream_with_context(chunks(list(columns), rows)), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename="{filename}.{extension}"',
+        'Cache-Control': 'no-store',
+        # Stop nginx buffering the whole body before passing it on
+        'X-Accel-Buffering': 'no',
+    })
@@ -0,0 +1,58 @@
+# Production serving profile: gunicorn -c gunicorn.conf.py main:app
+#
+# Tune with WEB_CONCURRENCY (worker processes), WEB_THREADS (threads per
+# worker), EVENT_STREAMS_PER_WORKER and DB_MAX_CONNECTIONS (see config.py);
+# each worker sizes its database pool from the same numbers.
+import os
+
+os.environ.setdefault("APP_ENV", "production")
+
+# Not "config": gunicorn treats every name in this file as a setting
+import config as serving  # noqa: E402  (reads APP_ENV)
+
+bind = os.environ.get("BIND", f"0.0.0.0:{os.environ.get('PORT', '5000')}")
+workers = serving.WORKERS
+# Extra threads for event streams, which are capped per worker so open pages
+# always leave THREADS for other requests
+threads = serving.WORKER_THREADS
+# Threaded workers: event streams and exports hold a thread, not a process
+worker_class = "gthread"
+
+# Import the app once in the master so workers fork with it loaded
+preload_app = True
+
+# Recycle workers now and then to bound memory growth; the jitter keeps
+# them from all restarting at once
+max_requests = int(os.environ.get("MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.environ.get("MAX_REQUESTS_JITTER", 100))
+
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+loglevel = serving.LOG_LEVEL.lower()
+
+def on_starting(server):
+    pool_size, max_overflow = serving.pool_settings()
+    server.log.info(
+        f"{workers} workers x {threads} threads (up to {serving.EVENT_STREAMS} for event streams); "
+        f"database pool {pool_size} + {max_overflow} overflow "
+        f"per worker, up to {workers * (pool_size + max_overflow)} connections"
+    )
+    if pool_size < threads:
+        server.log.warning(
+            f"The database pool has {pool_size} connections for {threads} threads per worker; "
+            f"busy workers will queue for connections. Lower WEB_THREADS or EVENT_STREAMS_PER_WORKER."
+        )
+
+def post_fork(server, worker):
+    # Connections opened while preloading belong to the master; drop them
+    # (without closing the master's sockets) so each worker opens its own.
+    # db.engines holds the primary and every read replica bind; perf.py only
+    # listens on the Engine class and opens no engines of its own.
+    from app import app, db
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
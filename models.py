@@ -1,6 +1,8 @@
 from datetime import datetime
+from sqlalchemy import and_
+from sqlalchemy.ext.hybrid import hybrid_method
 from app import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from passwords import get_hashing_service
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -21,10 +23,13 @@ class User(db.Model):
     created_tasks = db.relationship('Task', foreign_keys='Task.created_by_id', backref='creator', lazy='dynamic')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = get_hashing_service().hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return get_hashing_service().verify(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        return get_hashing_service().needs_rehash(self.password_hash)
     
     @property
     def full_name(self):
@@ -36,6 +41,23 @@ class User(db.Model):
     def __repr__(self):
         return f'<User {self.username}>'
 
+task_tags = db.Table(
+    'task_tags',
+    db.Column('task_id', db.Integer, db.ForeignKey('tasks.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('tag_id', db.Integer, db.ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True),
+    # The primary key serves task -> tags; this serves tag -> tasks
+    db.Index('ix_task_tags_tag_task', 'tag_id', 'task_id'),
+)
+
+class Tag(db.Model):
+    __tablename__ = 'tags'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)
+    
+    def __repr__(self):
+        return f'<Tag {self.name}>'
+
 class Task(db.Model):
     __tablename__ = 'tasks'
     
@@ -46,7 +68,7 @@ class Task(db.Model):
     priority = db.Column(db.String(10), nullable=False, default='medium')  # 'low', 'medium', 'high'
     due_date = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     completed_at = db.Column(db.DateTime)
     
     # Foreign Keys
@@ -57,7 +79,30 @@ class Task(db.Model):
     estimated_hours = db.Column(db.Float)
     actual_hours = db.Column(db.Float)
     category = db.Column(db.String(100))
-    tags = db.Column(db.String(500))  # Comma-separated tags
+    tags = db.Column(db.String(500))  # Comma-separated tags, kept for display and search
+    
+    # Normalized tags; filtering and facet counts go through task_tags
+    tag_list = db.relationship('Tag', secondary=task_tags, order_by='Tag.name')
+    
+    # 'overdue', 'due_soon' or None, computed in the query by deadlines.with_due_state()
+    due_state = db.query_expression()
+    
+    __table_args__ = (
+        # Employee scope: counters by status and overdue checks without touching the table
+        db.Index('ix_tasks_assignee_status_due', 'assignee_id', 'status', 'due_date'),
+        # Employee task list in its default order
+        db.Index('ix_tasks_assignee_created', 'assignee_id', 'created_at', 'id'),
+        # Employee scope version for ETags: max(updated_at) per assignee
+        db.Index('ix_tasks_assignee_updated', 'assignee_id', 'updated_at'),
+        # Status filter combined with due date sorting
+        db.Index('ix_tasks_status_due_date', 'status', 'due_date'),
+        # Overdue range scans (due_date < now) and due date keyset pages
+        db.Index('ix_tasks_due_date_status', 'due_date', 'status'),
+        # Analytics completion window
+        db.Index('ix_tasks_completed_at', 'completed_at'),
+        # Manager task list in its default order (keyset pagination)
+        db.Index('ix_tasks_created_at_id', 'created_at', 'id'),
+    )
     
     def get_status_badge_class(self):
         status_classes = {
@@ -75,10 +120,28 @@ class Task(db.Model):
         }
         return priority_classes.get(self.priority, 'bg-secondary')
     
+    # Deadline checks against a given clock, usable per row and in queries,
+    # where they are ranges on the due_date indexes
+    @hybrid_method
+    def is_overdue_at(self, now):
+        return self.due_date is not None and self.status != 'completed' and self.due_date < now
+    
+    @is_overdue_at.expression
+    def is_overdue_at(cls, now):
+        return and_(cls.due_date < now, cls.status != 'completed')
+    
+    @hybrid_method
+    def is_due_within(self, now, window):
+        """Open and due in [now, now + window]; overdue tasks are not included"""
+        return (self.due_date is not None and self.status != 'completed'
+                and now <= self.due_date <= now + window)
+    
+    @is_due_within.expression
+    def is_due_within(cls, now, window):
+        return and_(cls.due_date >= now, cls.due_date <= now + window, cls.status != 'completed')
+    
     def is_overdue(self):
-        if self.due_date and self.status != 'completed':
-            return datetime.utcnow() > self.due_date
-        return False
+        return self.is_overdue_at(datetime.utcnow())
     
     def days_until_due(self):
         if self.due_date:
@@ -86,16 +149,91 @@ class Task(db.Model):
             return delta.days
         return None
     
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'status': self.status,
+            'priority': self.priority,
+            'category': self.category,
+            'tags': self.tags,
+            'due_date': self.due_date.isoformat() if self.due_date else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'assignee_id': self.assignee_id,
+            'assignee_name': self.assignee.full_name if self.assignee else None,
+            'created_by_id': self.created_by_id,
+            'estimated_hours': self.estimated_hours,
+            'actual_hours': self.actual_hours,
+            'status_badge_class': self.get_status_badge_class(),
+            'priority_badge_class': self.get_priority_badge_class()
+        }
+    
     def __repr__(self):
         return f'<Task {self.title}>'
 
+class TaskTombstone(db.Model):
+    """Records a task leaving a scope, so delta sync clients can drop its row"""
+    __tablename__ = 'task_tombstones'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.Integer, nullable=False)  # No FK: the task may be gone
+    assignee_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    reason = db.Column(db.String(20), nullable=False, default='deleted')  # 'deleted' or 'reassigned'
+    removed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f'<TaskTombstone {self.task_id} {self.reason}>'
+
+class TaskDailyStat(db.Model):
+    """Daily analytics rollup of tasks per assignee and priority, maintained by rollups.py.
+
+    created_count counts existing tasks created on the day (deleted tasks are
+    subtracted); completed_count and completion_hours cover tasks completed on it.
+    """
+    __tablename__ = 'task_daily_stats'
+
+    day = db.Column(db.Date, primary_key=True)
+    assignee_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    priority = db.Column(db.String(10), primary_key=True)
+    created_count = db.Column(db.Integer, nullable=False, default=0)
+    completed_count = db.Column(db.Integer, nullable=False, default=0)
+    completion_hours = db.Column(db.Float, nullable=False, default=0.0)  # Sum of created -> completed times
+
+    def __repr__(self):
+        return f'<TaskDailyStat {self.day} {self.assignee_id} {self.priority}>'
+
+class UserTaskCount(db.Model):
+    """Per-assignee workload counters, maintained by workload.py with every task write.
+
+    overdue_count counts open tasks that were past due at overdue_as_of; readers
+    add those that fell due since (workload.overdue_count).
+    """
+    __tablename__ = 'user_task_counts'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    task_count = db.Column(db.Integer, nullable=False, default=0)
+    pending_count = db.Column(db.Integer, nullable=False, default=0)
+    in_progress_count = db.Column(db.Integer, nullable=False, default=0)
+    completed_count = db.Column(db.Integer, nullable=False, default=0)
+    overdue_count = db.Column(db.Integer, nullable=False, default=0)
+    overdue_as_of = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    estimated_hours = db.Column(db.Float, nullable=False, default=0.0)
+    actual_hours = db.Column(db.Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f'<UserTaskCount {self.user_id}>'
+
 class Team(db.Model):
     __tablename__ = 'teams'
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
-    manager_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    # Indexed for resolving a manager's team members (teams.team_member_ids)
+    manager_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
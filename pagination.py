@@ -0,0 +1,150 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_
+from models import Task
+
+# Sort options offered on the tasks page, mapped to their columns
+SORT_COLUMNS = {
+    'created_at': Task.created_at,
+    'due_date': Task.due_date,
+    'title': Task.title,
+    'priority': Task.priority,
+    'status': Task.status,
+}
+
+# Sort keys whose column may be NULL; NULLs always sort last, on every backend
+NULLABLE_SORT_KEYS = {'due_date'}
+
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 200
+
+def encode_cursor(sort_by, sort_order, value, task_id):
+    """Pack the sort key of the last row on a page into an opaque, URL-safe token"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort_by, sort_order, value, task_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, sort_by, sort_order):
+    """Return (value, task_id) from a cursor, or None if it is invalid or stale.
+
+    A cursor only applies to the sort it was issued for; changing the sort
+    restarts from the first page.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_sort, cursor_order, value, task_id = json.loads(base64.urlsafe_b64decode(padded))
+        if (cursor_sort, cursor_order) != (sort_by, sort_order) or not isinstance(task_id, int):
+            return None
+        if value is not None and sort_by in ('created_at', 'due_date'):
+            value = datetime.fromisoformat(value)
+    except (ValueError, TypeError, binascii.Error):
+        return None
+    return value, task_id
+
+def _order_clauses(column, descending):
+    if descending:
+        return [column.desc(), Task.id.desc()]
+    return [column.asc(), Task.id.asc()]
+
+def _after_clause(column, descending, value, task_id):
+    """Filter for rows that come after (value, task_id) in the page ordering"""
+    id_after = Task.id < task_id if descending else Task.id > task_id
+    value_after = column < value if descending else column > value
+    return or_(value_after, and_(column == value, id_after))
+
+def _fetch_page(query, order, limit):
+    """Pick the page's task ids first, then load just those rows.
+
+    The id pass can sort from a covering index alone; the wide rows and their
+    eager-loaded joins are built for the page only, not for every row the
+    scope has to sort (e.g. all of a team's tasks).
+    """
+    page_ids = query.with_entities(Task.id).order_by(*order).limit(limit).scalar_subquery()
+    return query.filter(Task.id.in_(page_ids)).order_by(*order).all()
+
+def sort_clauses(sort_by='created_at', sort_order='desc', relevance=None):
+    """ORDER BY clauses giving paginate_tasks' row order in one full scan, e.g. for exports"""
+    if sort_by == 'relevance' and relevance is not None:
+        return _order_clauses(relevance, True)
+    if sort_by not in SORT_COLUMNS:
+        sort_by = 'created_at'
+    column = SORT_COLUMNS[sort_by]
+    clauses = _order_clauses(column, sort_order != 'asc')
+    if sort_by in NULLABLE_SORT_KEYS:
+        # False sorts before true, so NULLs come last in both directions
+        clauses.insert(0, column.is_(None))
+    return clauses
+
+def paginate_tasks(query, sort_by='created_at', sort_order='desc', cursor=None, per_page=DEFAULT_PER_PAGE,
+                   relevance=None):
+    """Apply keyset pagination to a task query.
+
+    Rows are ordered by the chosen sort column with the task id as a stable
+    tiebreaker. sort_by='relevance' orders by the given search relevance
+    expression, best match first. Returns (tasks, next_cursor); next_cursor
+    is None on the last page.
+    """
+    if sort_by == 'relevance' and relevance is not None:
+        sort_order = 'desc'
+        return _paginate_by_relevance(query, relevance, cursor, per_page)
+    if sort_by not in SORT_COLUMNS:
+        sort_by = 'created_at'
+    if sort_order != 'asc':
+        sort_order = 'desc'
+    per_page = max(1, min(per_page or DEFAULT_PER_PAGE, MAX_PER_PAGE))
+
+    column = SORT_COLUMNS[sort_by]
+    nullable = sort_by in NULLABLE_SORT_KEYS
+    descending = sort_order == 'desc'
+
+    position = decode_cursor(cursor, sort_by, sort_order)
+    limit = per_page + 1
+    
+    if not nullable:
+        if position is not None:
+            query = query.filter(_after_clause(column, descending, *position))
+        rows = _fetch_page(query, _order_clauses(column, descending), limit)
+    else:
+        # Rows with a value first, then the NULL tail ordered by id. Splitting
+        # them keeps both parts in index order instead of sorting on a NULL flag.
+        rows = []
+        id_order = Task.id.desc() if descending else Task.id.asc()
+        if position is None or position[0] is not None:
+            valued = query.filter(column.isnot(None))
+            if position is not None:
+                valued = valued.filter(_after_clause(column, descending, *position))
+            rows = _fetch_page(valued, _order_clauses(column, descending), limit)
+        if len(rows) < limit:
+            nulls = query.filter(column.is_(None))
+            if position is not None and position[0] is None:
+                nulls = nulls.filter(Task.id < position[1] if descending else Task.id > position[1])
+            rows += _fetch_page(nulls, [id_order], limit - len(rows))
+    
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort_by, sort_order, getattr(last, sort_by), last.id)
+    return rows, next_cursor
+
+def _paginate_by_relevance(query, relevance, cursor, per_page):
+    per_page = max(1, min(per_page or DEFAULT_PER_PAGE, MAX_PER_PAGE))
+    position = decode_cursor(cursor, 'relevance', 'desc')
+    if position is not None:
+        query = query.filter(_after_clause(relevance, True, *position))
+
+    rows = query.add_columns(relevance).order_by(
+        *_order_clauses(relevance, True)
+    ).limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last_task, last_score = rows[-1]
+        next_cursor = encode_cursor('relevance', 'desc', last_score, last_task.id)
+    return [task for task, _ in rows], next_cursor
@@ -0,0 +1,78 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Hash cost, in werkzeug's method syntax, e.g. "scrypt:32768:8:1" or
+# "pbkdf2:sha256:1000000". Stored hashes made with other parameters are
+# upgraded the next time their owner logs in.
+HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+
+# Web requests: at most WEB_WORKERS hashes run at once per process, at most
+# WEB_QUEUE more may wait, and none waits longer than WEB_TIMEOUT seconds.
+# hashlib releases the GIL while hashing, so threads run in parallel.
+WEB_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 2))
+WEB_QUEUE = int(os.environ.get("PASSWORD_HASH_QUEUE", 8))
+WEB_TIMEOUT = float(os.environ.get("PASSWORD_HASH_TIMEOUT", 10))
+
+# Bulk provisioning: a process pool sized to the machine unless configured
+BULK_PROCESSES = int(os.environ.get("PASSWORD_HASH_PROCESSES", 0)) or None
+
+class PasswordHashingBusy(Exception):
+    """Raised when the web hashing pool is saturated; the caller should ask the user to retry"""
+
+class HashingService:
+    """Runs password hashing on a bounded thread pool so bursts queue briefly, then fail fast"""
+
+    def __init__(self, method=HASH_METHOD, workers=WEB_WORKERS, queue=WEB_QUEUE, timeout=WEB_TIMEOUT):
+        self.method = method
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(workers + queue)
+        self._method_prefix = None
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PasswordHashingBusy()
+        try:
+            return self._executor.submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True if a stored hash was made with a different method or cost than configured"""
+        if self._method_prefix is None:
+            # werkzeug fills in default parameters ("scrypt" -> "scrypt:32768:8:1")
+            self._method_prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return password_hash.split('$', 1)[0] != self._method_prefix
+
+    def hash_many(self, passwords, processes=BULK_PROCESSES, pool=None):
+        """Hash a batch of passwords across a process pool, preserving order.
+
+        Pass an open ProcessPoolExecutor as pool to reuse it across batches.
+        """
+        passwords = list(passwords)
+        hash_one = partial(generate_password_hash, method=self.method)
+        if pool is not None:
+            return list(pool.map(hash_one, passwords, chunksize=max(1, len(passwords) // 64)))
+        if len(passwords) < 2:
+            return [hash_one(password) for password in passwords]
+        processes = processes or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            return list(pool.map(hash_one, passwords, chunksize=max(1, len(passwords) // (processes * 4))))
+
+_hashing_service = HashingService()
+
+def get_hashing_service():
+    return _hashing_service
+
+def set_hashing_service(service):
+    global _hashing_service
+    _hashing_service = service
@@ -0,0 +1,189 @@
+import random
+import threading
+import time
+from collections import deque
+from flask import g, has_request_context, request, before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app import app
+from config import PERF_SAMPLE_RATE
+
+# Recent samples kept per endpoint for percentiles
+SAMPLES_PER_ENDPOINT = 1000
+# Histogram buckets for /metrics, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_STATEMENT_LENGTH = 300
+
+class RequestProfile:
+    """Timings gathered over one sampled request"""
+    __slots__ = ('started', 'sql_count', 'sql_seconds', 'slowest_sql', 'slowest_sql_seconds',
+                 'template_seconds', 'template_started')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.slowest_sql = None
+        self.slowest_sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self.template_started = None
+
+    def add_statement(self, statement, seconds):
+        self.sql_count += 1
+        self.sql_seconds += seconds
+        if seconds > self.slowest_sql_seconds:
+            self.slowest_sql_seconds = seconds
+            self.slowest_sql = ' '.join(statement.split())[:MAX_STATEMENT_LENGTH]
+
+class EndpointStats:
+    """Recent samples and running totals for one endpoint"""
+
+    def __init__(self):
+        self.samples = deque(maxlen=SAMPLES_PER_ENDPOINT)  # (wall, sql count, sql s, template s)
+        self.slowest = deque(maxlen=SAMPLES_PER_ENDPOINT)  # (sql s, statement)
+        self.count = 0
+        self.wall_seconds = 0.0
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+class PerfStats:
+    """Thread-safe store of sampled request timings, per endpoint, for this process"""
+
+    def __init__(self):
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, wall, profile):
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, EndpointStats())
+            stats.samples.append((wall, profile.sql_count, profile.sql_seconds, profile.template_seconds))
+            if profile.slowest_sql:
+                stats.slowest.append((profile.slowest_sql_seconds, profile.slowest_sql))
+            stats.count += 1
+            stats.wall_seconds += wall
+            stats.sql_count += profile.sql_count
+            stats.sql_seconds += profile.sql_seconds
+            stats.template_seconds += profile.template_seconds
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if wall <= bound:
+                    stats.buckets[i] += 1
+
+    def summary(self):
+        """Per-endpoint percentiles and averages over the recent samples, slowest p95 first"""
+        rows = []
+        with self._lock:
+            for endpoint, stats in self._endpoints.items():
+                samples = list(stats.samples)
+                slowest = max(stats.slowest, default=(0.0, None))
+                walls = sorted(sample[0] for sample in samples)
+                n = len(samples)
+                rows.append({
+                    'endpoint': endpoint,
+                    'samples': n,
+                    'p50_ms': percentile(walls, 0.50) * 1000,
+                    'p95_ms': percentile(walls, 0.95) * 1000,
+                    'p99_ms': percentile(walls, 0.99) * 1000,
+                    'avg_sql_count': sum(sample[1] for sample in samples) / n,
+                    'avg_sql_ms': sum(sample[2] for sample in samples) / n * 1000,
+                    'avg_template_ms': sum(sample[3] for sample in samples) / n * 1000,
+                    'slowest_sql_ms': slowest[0] * 1000,
+                    'slowest_sql': slowest[1],
+                })
+        return sorted(rows, key=lambda row: row['p95_ms'], reverse=True)
+
+    def prometheus(self):
+        """Counters and a duration histogram in the Prometheus text format"""
+        lines = [
+            '# HELP taskflow_request_duration_seconds Wall time of sampled requests',
+            '# TYPE taskflow_request_duration_seconds histogram',
+        ]
+        totals = []
+        with self._lock:
+            for endpoint, stats in sorted(self._endpoints.items()):
+                label = f'endpoint="{endpoint}"'
+                for bound, count in zip(DURATION_BUCKETS, stats.buckets):
+                    lines.append(f'taskflow_request_duration_seconds_bucket{{{label},le="{bound}"}} {count}')
+                lines.append(f'taskflow_request_duration_seconds_bucket{{{label},le="+Inf"}} {stats.count}')
+                lines.append(f'taskflow_request_duration_seconds_sum{{{label}}} {stats.wall_seconds}')
+                lines.append(f'taskflow_request_duration_seconds_count{{{label}}} {stats.count}')
+                totals.append((label, stats.sql_count, stats.sql_seconds, stats.template_seconds))
+        for name, help_text, index in (
+            ('taskflow_sql_statements_total', 'SQL statements run by sampled requests', 1),
+            ('taskflow_sql_duration_seconds_total', 'Time spent in SQL by sampled requests', 2),
+            ('taskflow_template_duration_seconds_total', 'Time spent rendering templates in sampled requests', 3),
+        ):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            lines.extend(f'{name}{{{total[0]}}} {total[index]}' for total in totals)
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        with self._lock:
+            self._endpoints.clear()
+
+perf_stats = PerfStats()
+
+def current_profile():
+    if has_request_context():
+        return g.get('perf')
+    return None
+
+@app.before_request
+def _start_profile():
+    if PERF_SAMPLE_RATE and random.random() < PERF_SAMPLE_RATE:
+        g.perf = RequestProfile()
+
+@app.after_request
+def _finish_profile(response):
+    profile = g.pop('perf', None)
+    if profile is None:
+        return response
+    # For streamed responses (exports, event streams) this is the time to the first byte
+    wall = time.perf_counter() - profile.started
+    perf_stats.record(request.endpoint or 'unmatched', wall, profile)
+    response.headers.add('Server-Timing', ', '.join([
+        f'app;dur={wall * 1000:.1f}',
+        f'db;dur={profile.sql_seconds * 1000:.1f};desc="{profile.sql_count} queries"',
+        f'tpl;dur={profile.template_seconds * 1000:.1f}',
+    ]))
+    return response
+
+# SQL timing on every engine, including replicas; only sampled requests pay for it
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_statement(conn, cursor, statement, parameters, context, executemany):
+    if current_profile() is not None:
+        conn.info.setdefault('perf_started', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_statement(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile()
+    started = conn.info.get('perf_started')
+    if profile is not None and started:
+        profile.add_statement(statement, time.perf_counter() - started.pop())
+
+@event.listens_for(Engine, 'handle_error')
+def _failed_statement(exception_context):
+    started = exception_context.connection.info.get('perf_started') if exception_context.connection else None
+    if started:
+        started.pop()
+
+@before_render_template.connect_via(app)
+def _before_render(sender, template, context, **extra):
+    profile = current_profile()
+    if profile is not None:
+        profile.template_started = time.perf_counter()
+
+@template_rendered.connect_via(app)
+def _after_render(sender, template, context, **extra):
+    profile = current_profile()
+    if profile is not None and profile.template_started is not None:
+        profile.template_seconds += time.perf_counter() - profile.template_started
+        profile.template_started = None
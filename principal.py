@@ -0,0 +1,154 @@
+import copy
+import threading
+import time
+from flask import g, session
+from sqlalchemy import event
+from app import db
+from models import User, Team, TeamMember
+from teams import ALL_SCOPE, team_member_ids
+
+# Each worker caches its own copies; the TTL bounds how long a change made
+# elsewhere (another worker, a script) can take to be noticed.
+PRINCIPAL_TTL_SECONDS = 60
+PRINCIPAL_CACHE_SIZE = 1024
+
+class Principal:
+    """Slim, read-only record of a logged-in user, safe to share between requests"""
+    __slots__ = ('id', 'username', 'role', 'first_name', 'last_name', 'department', 'is_active',
+                 'team_member_ids', 'assignee_ids')
+    columns = (User.id, User.username, User.role, User.first_name, User.last_name, User.department,
+               User.is_active)
+
+    def __init__(self, id, username, role, first_name, last_name, department, is_active,
+                 team_member_ids=frozenset()):
+        self.id = id
+        self.username = username
+        self.role = role
+        self.first_name = first_name
+        self.last_name = last_name
+        self.department = department
+        self.is_active = is_active
+        self.team_member_ids = team_member_ids
+        # Assignees whose tasks make up the user's task views; None means every task
+        if self.role != 'manager':
+            self.assignee_ids = frozenset([id])
+        elif team_member_ids:
+            self.assignee_ids = team_member_ids | {id}
+        else:
+            self.assignee_ids = None
+
+    @property
+    def full_name(self):
+        return f"{self.first_name} {self.last_name}"
+
+    def is_manager(self):
+        return self.role == 'manager'
+
+    @property
+    def team_scoped(self):
+        """True when a manager's views are narrowed to their teams"""
+        return self.is_manager() and self.assignee_ids is not None
+
+    def with_task_scope(self, task_scope):
+        """This principal, or a copy seeing every task when a team manager chose ALL_SCOPE"""
+        if task_scope != ALL_SCOPE or not self.team_scoped:
+            return self
+        widened = copy.copy(self)
+        widened.assignee_ids = None
+        return widened
+
+    def __repr__(self):
+        return f'<Principal {self.username}>'
+
+class PrincipalCache:
+    """Thread-safe TTL cache of Principals by user id"""
+
+    def __init__(self, ttl=PRINCIPAL_TTL_SECONDS, max_size=PRINCIPAL_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, principal = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            return principal
+
+    def put(self, principal):
+        with self._lock:
+            if len(self._entries) >= self.max_size and principal.id not in self._entries:
+                # Evict the entry closest to expiry
+                oldest = min(self._entries, key=lambda user_id: self._entries[user_id][0])
+                del self._entries[oldest]
+            self._entries[principal.id] = (time.monotonic() + self.ttl, principal)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+principal_cache = PrincipalCache()
+
+def load_principal(user_id, session=None):
+    """Fetch the slim user record, and a manager's team members, bypassing the cache"""
+    row = (session or db.session).query(*Principal.columns).filter(User.id == user_id).first()
+    if row is None:
+        return None
+    members = team_member_ids(user_id, session) if row.role == 'manager' else frozenset()
+    return Principal(*row, team_member_ids=members)
+
+def current_principal():
+    """The logged-in, active user for this request, or None; resolved once per request"""
+    if 'principal' in g:
+        return g.principal
+
+    principal = None
+    user_id = session.get('user_id')
+    if user_id is not None:
+        principal = principal_cache.get(user_id)
+        if principal is None:
+            principal = load_principal(user_id)
+            if principal is not None:
+                principal_cache.put(principal)
+        if principal is not None and not principal.is_active:
+            principal = None
+        if principal is not None:
+            principal = principal.with_task_scope(session.get('task_scope'))
+
+    g.principal = principal
+    return principal
+
+# Drop cached principals once a change to their user commits (role changes,
+# deactivation, password resets), so it takes effect on the next request.
+# Team changes are rare and may touch any manager's members: drop them all.
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_changed_users(session, flush_context):
+    changed = session.info.setdefault('changed_user_ids', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (Team, TeamMember)):
+            changed.add(None)
+        elif isinstance(obj, User) and obj.id is not None and obj not in session.new:
+            changed.add(obj.id)
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_changed_users(session):
+    changed = session.info.pop('changed_user_ids', ())
+    if None in changed:
+        principal_cache.clear()
+        return
+    for user_id in changed:
+        principal_cache.invalidate(user_id)
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_changed_users(session):
+    session.info.pop('changed_user_ids', None)
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Rebuild the task_daily_stats analytics rollup from the tasks table
+Run once after upgrading, or after bulk imports that write tasks outside the app.
+Usage: python rebuild_analytics.py
+"""
+
+import time
+from app import app
+from rollups import rebuild_task_daily_stats
+
+def main():
+    with app.app_context():
+        print("Rebuilding task_daily_stats...")
+        started = time.perf_counter()
+        rows = rebuild_task_daily_stats()
+        elapsed = time.perf_counter() - started
+        print(f"✅ Wrote {rows} rollup rows in {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import random
+import time
+from flask import g, has_request_context, session as flask_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select, event
+from config import REPLICA_URLS, REPLICA_MAX_LAG_SECONDS
+
+REPLICA_BIND_PREFIX = 'replica_'
+
+def replica_binds():
+    """SQLALCHEMY_BINDS entries for the configured replicas"""
+    return {f'{REPLICA_BIND_PREFIX}{i}': url for i, url in enumerate(REPLICA_URLS)}
+
+def reading_from_replica():
+    """True while the current request's plain reads go to a replica"""
+    return bool(REPLICA_URLS) and has_request_context() and g.get('read_replica', False)
+
+def recently_wrote():
+    """True if this browser session committed a write within the replica lag window"""
+    return flask_session.get('primary_until', 0) > time.time()
+
+def read_replica(f):
+    """Send a read-only view's queries to a replica, unless its user has just written.
+
+    The stickiness gives read-your-writes: after a commit the user reads from
+    the primary until the replicas have had time to catch up.
+    """
+    def decorated_function(*args, **kwargs):
+        g.read_replica = not recently_wrote()
+        return f(*args, **kwargs)
+    decorated_function.__name__ = f.__name__
+    return decorated_function
+
+class RoutingSession(Session):
+    """Sends plain SELECTs to a replica when the request allows it, everything else to the primary"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            writing = self._flushing or not isinstance(clause, Select) or clause._for_update_arg is not None
+            if writing:
+                if clause is not None or self._flushing:
+                    self.info['wrote'] = True
+            elif not self.info.get('wrote') and reading_from_replica():
+                return self._replica()
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _replica(self):
+        # One replica per session, so a request sees a single consistent snapshot
+        key = self.info.get('replica_bind')
+        if key is None:
+            key = self.info['replica_bind'] = random.choice(
+                [key for key in self._db.engines if key and key.startswith(REPLICA_BIND_PREFIX)]
+            )
+        return self._db.engines[key]
+
+def stick_to_primary():
+    """Route this browser session's reads to the primary for the replica lag window"""
+    if REPLICA_URLS and has_request_context():
+        flask_session['primary_until'] = time.time() + REPLICA_MAX_LAG_SECONDS
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _stick_after_write(session):
+    if session.info.pop('wrote', False):
+        stick_to_primary()
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _forget_write(session):
+    session.info.pop('wrote', None)
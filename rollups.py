@@ -0,0 +1,227 @@
+from datetime import datetime, timedelta
+from sqlalchemy import event, inspect, select, func, literal, union_all, case
+from app import db
+from models import User, Task, TaskDailyStat
+from analytics import date_bucket, hours_between
+from teams import in_scope
+from workload import add_workload_contribution, apply_workload_deltas
+from counters import upsert, compare_counters
+
+# Task fields that decide which rollup rows and workload counters a task counts towards
+ROLLUP_FIELDS = ('created_at', 'completed_at', 'assignee_id', 'priority',
+                 'status', 'due_date', 'estimated_hours', 'actual_hours')
+COUNTER_COLUMNS = ('created_count', 'completed_count', 'completion_hours')
+PRIORITY_ORDER = {'low': 0, 'medium': 1, 'high': 2}
+
+def _completion_hours(created_at, completed_at):
+    return (completed_at - created_at).total_seconds() / 3600
+
+def _add_contribution(deltas, values, sign):
+    """Add (sign=1) or remove (sign=-1) one task's counts from a delta map"""
+    created_at = values['created_at']
+    if created_at is None or values['assignee_id'] is None:
+        return
+    assignee_id = int(values['assignee_id'])
+    priority = values['priority']
+
+    counters = deltas.setdefault((created_at.date(), assignee_id, priority), [0, 0, 0.0])
+    counters[0] += sign
+
+    completed_at = values['completed_at']
+    if completed_at is not None:
+        counters = deltas.setdefault((completed_at.date(), assignee_id, priority), [0, 0, 0.0])
+        counters[1] += sign
+        counters[2] += sign * _completion_hours(created_at, completed_at)
+
+def _new_values(task):
+    if task.created_at is None:
+        # Set it now rather than at flush so the rollup and the row agree on the day
+        task.created_at = datetime.utcnow()
+    if task.priority is None:
+        task.priority = Task.__table__.c.priority.default.arg
+    if task.status is None:
+        task.status = Task.__table__.c.status.default.arg
+    assignee_id = task.assignee_id
+    if assignee_id is None and task.assignee is not None:
+        assignee_id = task.assignee.id
+    return {'created_at': task.created_at, 'completed_at': task.completed_at,
+            'assignee_id': assignee_id, 'priority': task.priority,
+            'status': task.status, 'due_date': task.due_date,
+            'estimated_hours': task.estimated_hours, 'actual_hours': task.actual_hours}
+
+def _old_values(session, task):
+    """The values a persistent task was last flushed with"""
+    state = inspect(task)
+    values = {}
+    unknown = []
+    for name in ROLLUP_FIELDS:
+        history = state.attrs[name].history
+        if history.deleted:
+            values[name] = history.deleted[0]
+        elif history.unchanged:
+            values[name] = history.unchanged[0]
+        elif not history.added:
+            values[name] = getattr(task, name)
+        else:
+            # Assigned without ever being loaded; the database still has the old value
+            unknown.append(name)
+    if unknown:
+        columns = [Task.__table__.c[name] for name in unknown]
+        row = session.connection().execute(select(*columns).where(Task.__table__.c.id == task.id)).one()
+        values.update(zip(unknown, row))
+    return values
+
+def _rollup_changed(task):
+    state = inspect(task)
+    return any(state.attrs[name].history.has_changes() for name in ROLLUP_FIELDS)
+
+def _upsert(connection, key, counters):
+    table = TaskDailyStat.__table__
+    day, assignee_id, priority = key
+    row = dict(zip(COUNTER_COLUMNS, counters), day=day, assignee_id=assignee_id, priority=priority)
+    changes = {name: table.c[name] + value for name, value in zip(COUNTER_COLUMNS, counters)}
+    upsert(connection, table, ('day', 'assignee_id', 'priority'), row, changes)
+
+def apply_rollup_deltas(connection, deltas):
+    """Add a {(day, assignee_id, priority): [created, completed, hours]} map to the rollup"""
+    for key, counters in sorted(deltas.items()):
+        if any(counters):
+            _upsert(connection, key, counters)
+
+class _Changes:
+    """Rollup and workload deltas collected over one flush or set-based write"""
+
+    def __init__(self):
+        self.rollup = {}
+        self.workload = {}
+
+    def add(self, values, sign):
+        _add_contribution(self.rollup, values, sign)
+        add_workload_contribution(self.workload, values, sign)
+
+    def apply(self, connection):
+        if self.rollup:
+            apply_rollup_deltas(connection, self.rollup)
+        if self.workload:
+            apply_workload_deltas(connection, self.workload)
+
+def apply_task_changes(connection, changes):
+    """Update the rollup and workload counters for set-based task writes, which
+    the flush hook cannot see.
+
+    changes holds (before, after) dicts of ROLLUP_FIELDS, with None for the
+    missing side of an insert or delete.
+    """
+    deltas = _Changes()
+    for before, after in changes:
+        if before is not None:
+            deltas.add(before, -1)
+        if after is not None:
+            deltas.add(after, 1)
+    deltas.apply(connection)
+
+@event.listens_for(db.session, 'before_flush')
+def _maintain_task_daily_stats(session, flush_context, instances):
+    """Keep task_daily_stats and user_task_counts in step with task inserts,
+    edits and deletes, in the same transaction"""
+    deltas = _Changes()
+    for obj in session.new:
+        if isinstance(obj, Task):
+            deltas.add(_new_values(obj), 1)
+    for obj in session.dirty:
+        if isinstance(obj, Task) and _rollup_changed(obj):
+            deltas.add(_old_values(session, obj), -1)
+            deltas.add(_new_values(obj), 1)
+    for obj in session.deleted:
+        if isinstance(obj, Task):
+            deltas.add(_old_values(session, obj), -1)
+    deltas.apply(session.connection())
+
+def _expected_rollup():
+    """task_daily_stats rows as the tasks table says they should be"""
+    tasks = Task.__table__
+
+    created = select(
+        date_bucket(tasks.c.created_at).label('day'), tasks.c.assignee_id, tasks.c.priority,
+        literal(1).label('created_count'), literal(0).label('completed_count'),
+        literal(0.0).label('completion_hours'),
+    ).where(tasks.c.created_at.isnot(None))
+    completed = select(
+        date_bucket(tasks.c.completed_at), tasks.c.assignee_id, tasks.c.priority,
+        literal(0), literal(1),
+        hours_between(tasks.c.created_at, tasks.c.completed_at),
+    ).where(tasks.c.created_at.isnot(None), tasks.c.completed_at.isnot(None))
+    contributions = union_all(created, completed).subquery()
+
+    return select(
+        contributions.c.day, contributions.c.assignee_id, contributions.c.priority,
+        func.sum(contributions.c.created_count).label('created_count'),
+        func.sum(contributions.c.completed_count).label('completed_count'),
+        func.sum(contributions.c.completion_hours).label('completion_hours'),
+    ).group_by(contributions.c.day, contributions.c.assignee_id, contributions.c.priority)
+
+def rebuild_task_daily_stats():
+    """Recompute task_daily_stats from the tasks table in one set-based pass.
+
+    For backfilling a new rollup table, or repairing it after bulk writes
+    that bypass the ORM. Returns the number of rollup rows written.
+    """
+    rollup = TaskDailyStat.__table__
+    db.session.execute(rollup.delete())
+    db.session.execute(rollup.insert().from_select(
+        ['day', 'assignee_id', 'priority', *COUNTER_COLUMNS], _expected_rollup()
+    ))
+    db.session.commit()
+    return db.session.query(func.count()).select_from(rollup).scalar()
+
+def check_task_daily_stats():
+    """Compare task_daily_stats with the tasks table.
+
+    Returns {(day, assignee id, priority): {column: (stored, expected)}} for
+    every rollup row that is off; empty when they all agree.
+    """
+    rollup = TaskDailyStat.__table__.c
+    stored = select(rollup.day, rollup.assignee_id, rollup.priority, *[rollup[name] for name in COUNTER_COLUMNS])
+    return compare_counters(stored, _expected_rollup(), lambda row: (row.day, row.assignee_id, row.priority),
+                            COUNTER_COLUMNS, ('completion_hours',))
+
+# The chart queries take an optional set of assignee ids (a Principal's
+# assignee_ids) to narrow them to a team; None covers every assignee.
+
+def _scoped(query, assignee_ids):
+    if assignee_ids is None:
+        return query
+    return query.filter(in_scope(TaskDailyStat.assignee_id, assignee_ids))
+
+def completion_trend(days=30, unit='day', assignee_ids=None):
+    """(bucket start, completed count) for each day, week or month in the last `days` with completions"""
+    since = (datetime.utcnow() - timedelta(days=days)).date()
+    bucket = TaskDailyStat.day if unit == 'day' else date_bucket(TaskDailyStat.day, unit)
+    bucket = bucket.label('bucket')
+    completed = func.sum(TaskDailyStat.completed_count)
+    query = db.session.query(bucket, completed.label('completed_count')).filter(TaskDailyStat.day >= since)
+    return _scoped(query, assignee_ids).group_by(bucket).having(completed > 0).order_by(bucket).all()
+
+def tasks_by_priority(assignee_ids=None):
+    """(priority, task count) over all current tasks"""
+    count = func.sum(TaskDailyStat.created_count)
+    priority_order = case(PRIORITY_ORDER, value=TaskDailyStat.priority, else_=len(PRIORITY_ORDER))
+    query = db.session.query(TaskDailyStat.priority, count.label('count'))
+    return _scoped(query, assignee_ids).group_by(
+        TaskDailyStat.priority
+    ).having(count > 0).order_by(priority_order).all()
+
+def productivity_by_assignee(assignee_ids=None):
+    """Per assignee: name, total and completed tasks, and average hours to complete"""
+    total = func.sum(TaskDailyStat.created_count)
+    completed = func.sum(TaskDailyStat.completed_count)
+    query = db.session.query(
+        User.first_name,
+        User.last_name,
+        total.label('total_tasks'),
+        completed.label('completed_tasks'),
+        (func.sum(TaskDailyStat.completion_hours) / func.nullif(completed, 0)).label('avg_completion_time'),
+    ).join(TaskDailyStat, TaskDailyStat.assignee_id == User.id)
+    return _scoped(query, assignee_ids).group_by(
+        User.id, User.first_name, User.last_name
+    ).having(total > 0).order_by(User.first_name, User.last_name).all()
@@ -1,26 +1,54 @@
-from flask import render_template, request, redirect, url_for, flash, session, jsonify
+import json
+from flask import render_template, request, redirect, url_for, flash, session, jsonify, Response, g
 from datetime import datetime, timedelta
-from sqlalchemy import func, and_, or_, case
+from sqlalchemy.orm import joinedload
 from app import app, db
 from models import User, Task, Team, TeamMember
+from stats import get_task_stats
+from workload import workload_by_user
+from pagination import paginate_tasks
+from deadlines import parse_due_within, with_due_state
+from sync import current_sync_token, decode_sync_token, record_task_removal, changed_tasks, removed_task_ids
+from search import get_search_backend
+from tags import set_task_tags, tagged_task_ids, tag_facets
+from rollups import completion_trend, tasks_by_priority, productivity_by_assignee
+from principal import current_principal
+from teams import TASK_SCOPES, in_scope
+from passwords import PasswordHashingBusy
+from cache import get_response_cache
+from conditional import conditional_get
+from replicas import read_replica
+from perf import perf_stats
+from config import PERF_SAMPLE_RATE, METRICS_TOKEN
+import bulk_tasks
+from export import EXPORT_FORMATS, TASK_EXPORT_COLUMNS, ANALYTICS_EXPORT_COLUMNS, task_export_rows, analytics_export_rows, export_response
+from events import (get_event_bus, task_snapshot, publish_task_event, event_for_user, HEARTBEAT_SECONDS,
+                    acquire_stream_slot, release_stream_slot)
 
 # Session management helpers
 def login_user(user):
     session['user_id'] = user.id
     session['user_role'] = user.role
+    session.pop('task_scope', None)
 
 def logout_user():
     session.pop('user_id', None)
     session.pop('user_role', None)
+    session.pop('task_scope', None)
 
 def get_current_user():
-    if 'user_id' in session:
-        return User.query.get(session['user_id'])
-    return None
+    """The logged-in user as a slim Principal, resolved once per request and cached between them"""
+    return current_principal()
+
+def with_task_people(query):
+    """Eager-load assignee and creator so task lists don't issue one query per row"""
+    return query.options(joinedload(Task.assignee), joinedload(Task.creator))
 
 def login_required(f):
     def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
+        if get_current_user() is None:
+            # Not logged in, or the account was deactivated or removed
+            logout_user()
             flash('Please log in to access this page.', 'warning')
             return redirect(url_for('login'))
         return f(*args, **kwargs)
@@ -52,7 +80,21 @@ def login():
         
         user = User.query.filter_by(username=username).first()
         
-        if user and user.check_password(password) and user.is_active:
+        try:
+            valid = user is not None and user.check_password(password) and user.is_active
+        except PasswordHashingBusy:
+            flash('Too many sign-in attempts right now. Please try again in a moment.', 'warning')
+            return render_template('login.html'), 503
+        
+        if valid:
+            if user.password_needs_rehash():
+                # The hash cost changed since this password was stored; upgrade it
+                # while the plaintext is at hand. A busy pool just retries next login.
+                try:
+                    user.set_password(password)
+                    db.session.commit()
+                except PasswordHashingBusy:
+                    db.session.rollback()
             login_user(user)
             flash(f'Welcome back, {user.first_name}!', 'success')
             return redirect(url_for('dashboard'))
@@ -70,129 +112,136 @@ def logout():
 # Dashboard routes
 @app.route('/dashboard')
 @login_required
+@read_replica
 def dashboard():
     user = get_current_user()
     
-    # Get dashboard statistics
-    if user.is_manager():
-        # Manager dashboard stats
-        total_tasks = Task.query.count()
-        pending_tasks = Task.query.filter_by(status='pending').count()
-        in_progress_tasks = Task.query.filter_by(status='in_progress').count()
-        completed_tasks = Task.query.filter_by(status='completed').count()
-        overdue_tasks = Task.query.filter(
-            and_(Task.due_date < datetime.utcnow(), Task.status != 'completed')
-        ).count()
-        
-        # Team performance data
-        team_stats = db.session.query(
-            User.first_name,
-            User.last_name,
-            func.count(Task.id).label('total_tasks'),
-            func.sum(case((Task.status == 'completed', 1), else_=0)).label('completed_tasks')
-        ).join(Task, User.id == Task.assignee_id).group_by(User.id, User.first_name, User.last_name).all()
-        
-        # Recent tasks
-        recent_tasks = Task.query.order_by(Task.created_at.desc()).limit(5).all()
-        
-    else:
-        # Employee dashboard stats
-        total_tasks = user.assigned_tasks.count()
-        pending_tasks = user.assigned_tasks.filter_by(status='pending').count()
-        in_progress_tasks = user.assigned_tasks.filter_by(status='in_progress').count()
-        completed_tasks = user.assigned_tasks.filter_by(status='completed').count()
-        overdue_tasks = user.assigned_tasks.filter(
-            and_(Task.due_date < datetime.utcnow(), Task.status != 'completed')
-        ).count()
-        
+    def dashboard_data():
         team_stats = []
-        recent_tasks = user.assigned_tasks.order_by(Task.created_at.desc()).limit(5).all()
+        if user.is_manager():
+            # Team performance data, per member of the manager's teams unless they see everyone
+            team_stats = workload_by_user(user.assignee_ids)
+        return {'stats': get_task_stats(user), 'team_stats': team_stats}
+    
+    data = get_response_cache().get_or_compute('dashboard', user, dashboard_data)
+    
+    # Recent tasks are ORM objects, so they are always loaded fresh (one indexed query)
+    recent_tasks = with_due_state(with_task_people(task_scope_query(user))).order_by(Task.created_at.desc()).limit(5).all()
     
     return render_template('dashboard.html', 
                          user=user,
-                         total_tasks=total_tasks,
-                         pending_tasks=pending_tasks,
-                         in_progress_tasks=in_progress_tasks,
-                         completed_tasks=completed_tasks,
-                         overdue_tasks=overdue_tasks,
-                         team_stats=team_stats,
-                         recent_tasks=recent_tasks)
+                         team_stats=data['team_stats'],
+                         recent_tasks=recent_tasks,
+                         **data['stats'])
 
 # Task management routes
+def get_task_filters(args=None):
+    """Read the task list filter and sort parameters from the query string"""
+    args = request.args if args is None else args
+    search_query = args.get('search', '')
+    return {
+        'status': args.get('status', ''),
+        'priority': args.get('priority', ''),
+        'assignee': args.get('assignee', ''),
+        'tag': args.get('tag', ''),
+        'search': search_query,
+        'overdue': args.get('overdue', ''),
+        'due_within': args.get('due_within', ''),
+        'sort': args.get('sort', 'relevance' if search_query else 'created_at'),
+        'order': args.get('order', 'desc')
+    }
+
+def task_scope_query(user, session=None):
+    """Tasks in the user's views: their teams' (or all) for managers, their own assignments otherwise"""
+    query = (session or db.session).query(Task)
+    if user.assignee_ids is None:
+        return query
+    return query.filter(in_scope(Task.assignee_id, user.assignee_ids))
+
+def filtered_task_query(user, filters, session=None):
+    """Build the task query for the user's scope with the list filters applied"""
+    query = task_scope_query(user, session)
+    
+    if filters['status']:
+        query = query.filter(Task.status == filters['status'])
+    
+    if filters['priority']:
+        query = query.filter(Task.priority == filters['priority'])
+    
+    if filters['assignee'] and user.is_manager():
+        query = query.filter(Task.assignee_id == filters['assignee'])
+    
+    if filters['tag']:
+        query = query.filter(Task.id.in_(tagged_task_ids(filters['tag'])))
+    
+    if filters['search']:
+        query = search_backend(session).filter(query, filters['search'])
+    
+    # Deadline filters are ranges on due_date, evaluated against one clock
+    now = datetime.utcnow()
+    if filters['overdue'] == '1':
+        query = query.filter(Task.is_overdue_at(now))
+    
+    window = parse_due_within(filters['due_within'])
+    if window:
+        query = query.filter(Task.is_due_within(now, window))
+    
+    return query
+
+def search_backend(session=None):
+    return get_search_backend(session.get_bind() if session is not None else None)
+
+def search_relevance(filters, session=None):
+    """Relevance score expression for the current search, if the backend ranks results"""
+    if not filters['search']:
+        return None
+    return search_backend(session).relevance(filters['search'])
+
+def task_to_json(task, user):
+    """Serialize a task for the API, including what the current user may do with it"""
+    data = task.to_dict()
+    # From the query's single clock (with_due_state), not a per-row utcnow()
+    data['due_state'] = task.due_state
+    data['is_overdue'] = task.due_state == 'overdue'
+    data['can_edit'] = user.is_manager() or task.assignee_id == user.id or task.created_by_id == user.id
+    data['can_delete'] = user.is_manager() or task.created_by_id == user.id
+    return data
+
 @app.route('/tasks')
 @login_required
+@read_replica
+@conditional_get(per_page_url=True, weak=True)
 def tasks():
     user = get_current_user()
     
-    # Get filter parameters
-    status_filter = request.args.get('status', '')
-    priority_filter = request.args.get('priority', '')
-    assignee_filter = request.args.get('assignee', '')
-    search_query = request.args.get('search', '')
-    sort_by = request.args.get('sort', 'created_at')
-    sort_order = request.args.get('order', 'desc')
+    filters = get_task_filters()
+    query = filtered_task_query(user, filters)
+    tasks_list, next_cursor = paginate_tasks(with_due_state(with_task_people(query)), filters['sort'], filters['order'],
+                                             request.args.get('cursor'),
+                                             request.args.get('per_page', type=int),
+                                             relevance=search_relevance(filters))
     
-    # Build query based on user role
-    if user.is_manager():
-        query = Task.query
-    else:
-        query = user.assigned_tasks
-    
-    # Apply filters
-    if status_filter:
-        query = query.filter(Task.status == status_filter)
-    
-    if priority_filter:
-        query = query.filter(Task.priority == priority_filter)
-    
-    if assignee_filter and user.is_manager():
-        query = query.filter(Task.assignee_id == assignee_filter)
-    
-    if search_query:
-        query = query.filter(
-            or_(
-                Task.title.contains(search_query),
-                Task.description.contains(search_query),
-                Task.tags.contains(search_query)
-            )
-        )
+    # Tag cloud for the current filters
+    narrowed = any(filters[key] for key in ('status', 'priority', 'assignee', 'tag', 'search', 'overdue', 'due_within'))
+    tag_counts = tag_facets(query if narrowed or user.assignee_ids is not None else None)
     
-    # Apply sorting
-    if sort_by == 'title':
-        order_column = Task.title
-    elif sort_by == 'due_date':
-        order_column = Task.due_date
-    elif sort_by == 'priority':
-        order_column = Task.priority
-    elif sort_by == 'status':
-        order_column = Task.status
-    else:
-        order_column = Task.created_at
-    
-    if sort_order == 'asc':
-        query = query.order_by(order_column.asc())
-    else:
-        query = query.order_by(order_column.desc())
-    
-    tasks_list = query.all()
-    
-    # Get all employees for assignee filter (managers only)
+    # Assignees to filter by (managers only): the team's members when scoped to teams
     employees = []
     if user.is_manager():
-        employees = User.query.filter_by(is_active=True).all()
+        employees = User.query.filter_by(is_active=True)
+        if user.assignee_ids is not None:
+            employees = employees.filter(in_scope(User.id, user.assignee_ids))
+        employees = employees.all()
     
     return render_template('tasks.html',
                          user=user,
                          tasks=tasks_list,
                          employees=employees,
-                         current_filters={
-                             'status': status_filter,
-                             'priority': priority_filter,
-                             'assignee': assignee_filter,
-                             'search': search_query,
-                             'sort': sort_by,
-                             'order': sort_order
-                         })
+                         tag_counts=tag_counts,
+                         next_cursor=next_cursor,
+                         is_first_page=not request.args.get('cursor'),
+                         sync_token=current_sync_token(),
+                         current_filters=filters)
 
 @app.route('/tasks/create', methods=['GET', 'POST'])
 @login_required
@@ -240,12 +289,13 @@ def create_task():
             priority=priority,
             due_date=due_date,
             category=category,
-            tags=tags,
             estimated_hours=estimated_hours_float
         )
+        set_task_tags(task, tags)
         
         db.session.add(task)
         db.session.commit()
+        publish_task_event('task.created', None, task_snapshot(task))
         
         flash('Task created successfully!', 'success')
         return redirect(url_for('tasks'))
@@ -267,17 +317,19 @@ def edit_task(task_id):
         return redirect(url_for('tasks'))
     
     if request.method == 'POST':
+        before = task_snapshot(task)
         task.title = request.form.get('title', task.title)
         task.description = request.form.get('description', task.description)
         task.status = request.form.get('status', task.status)
         task.priority = request.form.get('priority', task.priority)
         task.category = request.form.get('category', task.category)
-        task.tags = request.form.get('tags', task.tags)
+        set_task_tags(task, request.form.get('tags', task.tags))
         
         # Handle assignee change (managers only)
         if user.is_manager():
             assignee_id = request.form.get('assignee_id')
-            if assignee_id:
+            if assignee_id and assignee_id != str(task.assignee_id):
+                record_task_removal(task.id, task.assignee_id, reason='reassigned')
                 task.assignee_id = assignee_id
         
         # Handle due date
@@ -311,6 +363,7 @@ def edit_task(task_id):
         
         task.updated_at = datetime.utcnow()
         db.session.commit()
+        publish_task_event('task.updated', before, task_snapshot(task))
         
         flash('Task updated successfully!', 'success')
         return redirect(url_for('tasks'))
@@ -331,8 +384,11 @@ def delete_task(task_id):
         flash('You do not have permission to delete this task.', 'danger')
         return redirect(url_for('tasks'))
     
+    before = task_snapshot(task)
+    record_task_removal(task.id, task.assignee_id)
     db.session.delete(task)
     db.session.commit()
+    publish_task_event('task.deleted', before, None)
     
     flash('Task deleted successfully!', 'success')
     return redirect(url_for('tasks'))
@@ -341,83 +397,216 @@ def delete_task(task_id):
 @app.route('/analytics')
 @login_required
 @manager_required
+@read_replica
 def analytics():
     user = get_current_user()
     
-    # Task completion analytics
-    completion_data = db.session.query(
-        func.date(Task.completed_at).label('date'),
-        func.count(Task.id).label('completed_count')
-    ).filter(
-        Task.status == 'completed',
-        Task.completed_at >= datetime.utcnow() - timedelta(days=30)
-    ).group_by(func.date(Task.completed_at)).all()
-    
-    # Priority distribution
-    priority_data = db.session.query(
-        Task.priority,
-        func.count(Task.id).label('count')
-    ).group_by(Task.priority).all()
-    
-    # Status distribution
-    status_data = db.session.query(
-        Task.status,
-        func.count(Task.id).label('count')
-    ).group_by(Task.status).all()
-    
-    # Employee productivity
-    productivity_data = db.session.query(
-        User.first_name,
-        User.last_name,
-        func.count(Task.id).label('total_tasks'),
-        func.sum(func.case((Task.status == 'completed', 1), else_=0)).label('completed_tasks'),
-        func.avg(
-            func.case(
-                (Task.completed_at.isnot(None), 
-                 func.extract('epoch', Task.completed_at - Task.created_at) / 3600),
-                else_=None
-            )
-        ).label('avg_completion_time')
-    ).join(Task, User.id == Task.assignee_id).group_by(User.id).all()
-    
-    return render_template('analytics.html',
-                         user=user,
-                         completion_data=completion_data,
-                         priority_data=priority_data,
-                         status_data=status_data,
-                         productivity_data=productivity_data)
+    def analytics_data():
+        # Charts read the task_daily_stats rollup rather than scanning task history
+        stats = get_task_stats(user)
+        return {
+            'completion_data': completion_trend(30, assignee_ids=user.assignee_ids),
+            'priority_data': tasks_by_priority(user.assignee_ids),
+            'productivity_data': productivity_by_assignee(user.assignee_ids),
+            # Status distribution; the dashboard counters are a single index-only pass
+            'status_data': [(status, stats[f'{status}_tasks']) for status in ('pending', 'in_progress', 'completed')],
+        }
+    
+    data = get_response_cache().get_or_compute('analytics', user, analytics_data)
+    
+    return render_template('analytics.html', user=user, **data)
+
+@app.route('/analytics/export')
+@login_required
+@manager_required
+@read_replica
+def analytics_export():
+    """The daily analytics rollup per assignee and priority, streamed as CSV or NDJSON"""
+    user = get_current_user()
+    
+    file_format = request.args.get('format', 'csv')
+    if file_format not in EXPORT_FORMATS:
+        return jsonify({'error': f"Format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    
+    days = request.args.get('days', type=int)
+    since = (datetime.utcnow() - timedelta(days=days)).date() if days else None
+    return export_response(ANALYTICS_EXPORT_COLUMNS, analytics_export_rows(since, user.assignee_ids), file_format, 'analytics')
 
 # API endpoints for real-time updates
 @app.route('/api/dashboard-stats')
 @login_required
+@read_replica
+@conditional_get()
 def api_dashboard_stats():
     user = get_current_user()
+    # Keyed to the ETag's scope version, so a fresh ETag never goes out with a stale body
+    stats = get_response_cache().get_or_compute('api_dashboard_stats', user, lambda: get_task_stats(user),
+                                                version=g.get('scope_version'))
+    return jsonify(stats)
+
+@app.route('/api/tasks')
+@login_required
+@read_replica
+@conditional_get(per_page_url=True, weak=True)
+def api_tasks():
+    user = get_current_user()
     
-    if user.is_manager():
-        total_tasks = Task.query.count()
-        pending_tasks = Task.query.filter_by(status='pending').count()
-        in_progress_tasks = Task.query.filter_by(status='in_progress').count()
-        completed_tasks = Task.query.filter_by(status='completed').count()
-        overdue_tasks = Task.query.filter(
-            and_(Task.due_date < datetime.utcnow(), Task.status != 'completed')
-        ).count()
-    else:
-        total_tasks = user.assigned_tasks.count()
-        pending_tasks = user.assigned_tasks.filter_by(status='pending').count()
-        in_progress_tasks = user.assigned_tasks.filter_by(status='in_progress').count()
-        completed_tasks = user.assigned_tasks.filter_by(status='completed').count()
-        overdue_tasks = user.assigned_tasks.filter(
-            and_(Task.due_date < datetime.utcnow(), Task.status != 'completed')
-        ).count()
+    filters = get_task_filters()
+    query = with_due_state(with_task_people(filtered_task_query(user, filters)))
+    tasks_list, next_cursor = paginate_tasks(query, filters['sort'], filters['order'],
+                                             request.args.get('cursor'),
+                                             request.args.get('per_page', type=int),
+                                             relevance=search_relevance(filters))
     
     return jsonify({
-        'total_tasks': total_tasks,
-        'pending_tasks': pending_tasks,
-        'in_progress_tasks': in_progress_tasks,
-        'completed_tasks': completed_tasks,
-        'overdue_tasks': overdue_tasks
+        'tasks': [task_to_json(task, user) for task in tasks_list],
+        'next_cursor': next_cursor,
+        'sync_token': current_sync_token()
     })
 
+@app.route('/api/tasks/export')
+@login_required
+@read_replica
+def api_tasks_export():
+    """Every task matching the task list filters, streamed as CSV or NDJSON"""
+    user = get_current_user()
+    
+    file_format = request.args.get('format', 'csv')
+    if file_format not in EXPORT_FORMATS:
+        return jsonify({'error': f"Format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    
+    filters = get_task_filters()
+    rows = task_export_rows(filtered_task_query(user, filters), filters['sort'], filters['order'],
+                            relevance=search_relevance(filters))
+    return export_response(TASK_EXPORT_COLUMNS, rows, file_format, 'tasks')
+
+@app.route('/api/tasks/changes')
+@login_required
+def api_task_changes():
+    user = get_current_user()
+    
+    # Issue the next token before reading so nothing committed meanwhile is skipped
+    sync_token = current_sync_token()
+    since = decode_sync_token(request.args.get('since'))
+    changed = None
+    if since is not None:
+        changed = changed_tasks(with_due_state(with_task_people(task_scope_query(user))), since)
+    
+    if changed is None:
+        # Unknown, expired or too far behind: the client should reload the page
+        return jsonify({'reset': True, 'changed': [], 'deleted': [], 'sync_token': sync_token})
+    
+    # Flag which changed tasks still belong on the filtered list
+    matching_ids = set()
+    if changed:
+        filters = get_task_filters()
+        matching_ids = {task_id for (task_id,) in filtered_task_query(user, filters).filter(
+            Task.id.in_([task.id for task in changed])
+        ).with_entities(Task.id)}
+    
+    changed_json = []
+    for task in changed:
+        data = task_to_json(task, user)
+        data['matches_filters'] = task.id in matching_ids
+        changed_json.append(data)
+    
+    # A task reassigned within a team leaves a tombstone but is still in scope
+    changed_ids = {task.id for task in changed}
+    deleted = [task_id for task_id in removed_task_ids(user, since) if task_id not in changed_ids]
+    
+    return jsonify({
+        'reset': False,
+        'changed': changed_json,
+        'deleted': deleted,
+        'sync_token': sync_token
+    })
+
+# Batch task operations: one transaction per request, per-item results
+def run_task_batch(operation, *args):
+    try:
+        result = operation(get_current_user(), *args)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    db.session.commit()
+    result.publish()
+    return jsonify(result.to_dict())
+
+@app.route('/api/tasks/batch/create', methods=['POST'])
+@login_required
+def api_batch_create():
+    payload = request.get_json(silent=True) or {}
+    return run_task_batch(bulk_tasks.create, payload.get('tasks'))
+
+@app.route('/api/tasks/batch/status', methods=['POST'])
+@login_required
+def api_batch_status():
+    payload = request.get_json(silent=True) or {}
+    return run_task_batch(bulk_tasks.update_status, payload.get('task_ids'), payload.get('status'))
+
+@app.route('/api/tasks/batch/reassign', methods=['POST'])
+@login_required
+def api_batch_reassign():
+    payload = request.get_json(silent=True) or {}
+    return run_task_batch(bulk_tasks.reassign, payload.get('task_ids'), payload.get('assignee_id'))
+
+@app.route('/api/tasks/batch/delete', methods=['POST'])
+@login_required
+def api_batch_delete():
+    payload = request.get_json(silent=True) or {}
+    return run_task_batch(bulk_tasks.delete, payload.get('task_ids'))
+
+@app.route('/api/events')
+@login_required
+def api_events():
+    """Server-Sent Events stream of task changes visible to the current user.
+
+    Each open stream holds a worker thread, so streams are capped per process
+    (config.EVENT_STREAMS). Past the cap the client gets a 503 and polls instead.
+    """
+    user = get_current_user()
+    assignee_ids = user.assignee_ids
+    if not acquire_stream_slot():
+        return jsonify({'error': 'Too many open event streams; poll instead'}), 503, {'Retry-After': '60'}
+    subscription = get_event_bus().subscribe()
+    
+    def stream():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                event = subscription.get(timeout=HEARTBEAT_SECONDS)
+                if event is None:
+                    yield ': keep-alive\n\n'
+                    continue
+                payload = event_for_user(event, assignee_ids)
+                if payload is not None:
+                    yield f"event: {payload['type']}\ndata: {json.dumps(payload)}\n\n"
+        finally:
+            subscription.close()
+    
+    response = Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # Runs when the server closes the stream, even if it never started
+    response.call_on_close(release_stream_slot)
+    return response
+
+@app.route('/task-scope', methods=['POST'])
+@login_required
+@manager_required
+def set_task_scope():
+    """Switch a team manager's views between their teams' tasks and every task"""
+    scope = request.form.get('scope')
+    if scope in TASK_SCOPES:
+        session['task_scope'] = scope
+    
+    # Back to the page the switch was used on; its filters may not apply to the new scope
+    next_endpoint = request.form.get('next')
+    if next_endpoint not in ('dashboard', 'tasks', 'analytics'):
+        next_endpoint = 'dashboard'
+    return redirect(url_for(next_endpoint))
+
 # Admin routes for user management
 @app.route('/admin/users')
 @login_required
@@ -427,6 +616,39 @@ def admin_users():
     all_users = User.query.all()
     return render_template('admin_users.html', user=user, all_users=all_users)
 
+@app.route('/admin/cache-stats')
+@login_required
+@manager_required
+def admin_cache_stats():
+    """Hit and miss counters of this worker's response cache"""
+    return jsonify(get_response_cache().stats())
+
+@app.route('/admin/perf')
+@login_required
+@manager_required
+def admin_perf():
+    """Latency percentiles, SQL and template time per route, from sampled requests"""
+    user = get_current_user()
+    return render_template('admin_perf.html', user=user, endpoints=perf_stats.summary(),
+                           sample_rate=PERF_SAMPLE_RATE)
+
+@app.route('/admin/perf/reset', methods=['POST'])
+@login_required
+@manager_required
+def admin_perf_reset():
+    perf_stats.clear()
+    flash('Performance samples cleared.', 'success')
+    return redirect(url_for('admin_perf'))
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus text exposition of this worker's sampled request metrics"""
+    if not PERF_SAMPLE_RATE:
+        return Response('Profiling is off; set PERF_SAMPLE_RATE\n', status=404, mimetype='text/plain')
+    if METRICS_TOKEN and request.headers.get('Authorization') != f'Bearer {METRICS_TOKEN}':
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    return Response(perf_stats.prometheus(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/admin/add-user', methods=['POST'])
 @login_required
 @manager_required
@@ -454,6 +676,9 @@ def admin_add_user():
         db.session.commit()
         
         flash(f'User {new_user.full_name} added successfully!', 'success')
+    except PasswordHashingBusy:
+        flash('The server is busy. Please try again in a moment.', 'warning')
+        db.session.rollback()
     except Exception as e:
         flash('Error creating user. Please try again.', 'danger')
         db.session.rollback()
@@ -491,6 +716,9 @@ def admin_reset_password(user_id):
                 flash('Password must be at least 6 characters', 'danger')
         else:
             flash('User not found', 'danger')
+    except PasswordHashingBusy:
+        flash('The server is busy. Please try again in a moment.', 'warning')
+        db.session.rollback()
     except Exception as e:
         flash('Error updating password', 'danger')
         db.session.rollback()
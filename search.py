@@ -0,0 +1,246 @@
+import logging
+import re
+from sqlalchemy import inspect, text, func, literal_column, or_, table, column
+from app import db
+from models import Task
+
+# Search input is reduced to word terms; each must match, as a prefix
+SEARCH_TERM_RE = re.compile(r'\w+', re.UNICODE)
+MAX_SEARCH_TERMS = 8
+
+def search_terms(search_query):
+    return SEARCH_TERM_RE.findall(search_query.lower())[:MAX_SEARCH_TERMS]
+
+class LikeSearchBackend:
+    """Substring search with LIKE; used when no full-text index is available"""
+    name = 'like'
+
+    def setup(self, conn):
+        """Create the index's schema, in the caller's transaction"""
+        pass
+
+    def _backfill(self, conn):
+        """Fill search_vector on the rows from before the trigger existed, in short transactions"""
+        after = 0
+        while True:
+            ids = conn.execute(text(
+                "SELECT id FROM tasks WHERE id > :after ORDER BY id LIMIT :limit"
+            ), {'after': after, 'limit': self.backfill_batch_size}).scalars().all()
+            if not ids:
+                break
+            conn.execute(text(
+                f"UPDATE tasks SET search_vector = {self.vector_sql()} "
+                "WHERE id BETWEEN :first AND :last AND search_vector IS NULL"
+            ), {'first': ids[0], 'last': ids[-1]})
+            after = ids[-1]
+
+    def build(self, engine):
+        """Fill and index existing rows, outside any transaction"""
+        pass
+
+    def filter(self, query, search_query):
+        return query.filter(
+            or_(
+                Task.title.contains(search_query),
+                Task.description.contains(search_query),
+                Task.tags.contains(search_query)
+            )
+        )
+
+    def relevance(self, search_query):
+        return None
+
+class SqliteFtsBackend(LikeSearchBackend):
+    """SQLite FTS5 external-content index on tasks, kept in sync by triggers"""
+    name = 'sqlite-fts5'
+
+    fts_table = table('tasks_fts', column('rowid'))
+    # bm25 column weights for title, description, tags
+    weights = (10.0, 1.0, 5.0)
+
+    def setup(self, conn):
+        created = not inspect(conn).has_table('tasks_fts')
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+            "title, description, tags, content='tasks', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        ))
+        conn.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN "
+            "INSERT INTO tasks_fts(rowid, title, description, tags) "
+            "VALUES (new.id, new.title, new.description, new.tags); END"
+        ))
+        conn.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN "
+            "INSERT INTO tasks_fts(tasks_fts, rowid, title, description, tags) "
+            "VALUES ('delete', old.id, old.title, old.description, old.tags); END"
+        ))
+        conn.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description, tags ON tasks BEGIN "
+            "INSERT INTO tasks_fts(tasks_fts, rowid, title, description, tags) "
+            "VALUES ('delete', old.id, old.title, old.description, old.tags); "
+            "INSERT INTO tasks_fts(rowid, title, description, tags) "
+            "VALUES (new.id, new.title, new.description, new.tags); END"
+        ))
+        if created:
+            # Index the tasks that existed before the index did
+            conn.execute(text("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')"))
+
+    def filter(self, query, search_query):
+        terms = search_terms(search_query)
+        if not terms:
+            return query
+        match = ' '.join(f'"{term}"*' for term in terms)
+        return query.join(self.fts_table, self.fts_table.c.rowid == Task.id).filter(
+            literal_column('tasks_fts').op('MATCH')(match)
+        )
+
+    def relevance(self, search_query):
+        if not search_terms(search_query):
+            return None
+        # bm25() is lower for better matches; negate so higher is better
+        return -func.bm25(literal_column('tasks_fts'), *self.weights)
+
+class PostgresFtsBackend(LikeSearchBackend):
+    """PostgreSQL tsvector column, kept in sync by a trigger, with a GIN index.
+
+    Set up without long locks, so the app can keep writing tasks: the column
+    is added empty, existing rows are filled in id-ordered batches, and the
+    index is built concurrently.
+    """
+    name = 'postgresql-tsvector'
+
+    search_vector = literal_column('tasks.search_vector')
+    index_name = 'ix_tasks_search_vector'
+    backfill_batch_size = 1000
+
+    @staticmethod
+    def vector_sql(row=''):
+        return (
+            f"setweight(to_tsvector('simple', coalesce({row}title, '')), 'A') || "
+            f"setweight(to_tsvector('simple', coalesce({row}tags, '')), 'B') || "
+            f"setweight(to_tsvector('simple', coalesce({row}description, '')), 'C')"
+        )
+
+    def _generated(self, conn):
+        """True if an earlier version installed search_vector as a generated column"""
+        return conn.execute(text(
+            "SELECT is_generated FROM information_schema.columns "
+            "WHERE table_name = 'tasks' AND column_name = 'search_vector'"
+        )).scalar() == 'ALWAYS'
+
+    def setup(self, conn):
+        if self._generated(conn):
+            # Postgres fills it already; it needs no trigger or backfill
+            return
+        # Without a default, adding the column does not rewrite the table
+        conn.execute(text("ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector"))
+        conn.execute(text(
+            "CREATE OR REPLACE FUNCTION tasks_search_vector_update() RETURNS trigger AS $$ "
+            f"BEGIN NEW.search_vector := {self.vector_sql('NEW.')}; RETURN NEW; END "
+            "$$ LANGUAGE plpgsql"
+        ))
+        conn.execute(text("DROP TRIGGER IF EXISTS tasks_search_vector_update ON tasks"))
+        conn.execute(text(
+            "CREATE TRIGGER tasks_search_vector_update "
+            "BEFORE INSERT OR UPDATE OF title, description, tags ON tasks "
+            "FOR EACH ROW EXECUTE FUNCTION tasks_search_vector_update()"
+        ))
+
+    def _index_valid(self, conn):
+        """True if the index exists and is usable, None if missing, False if a build failed"""
+        return conn.execute(text(
+            "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name"
+        ), {'name': self.index_name}).scalar()
+
+    def _backfill(self, conn):
+        """Fill search_vector on the rows from before the trigger existed, in short transactions"""
+        after = 0
+        while True:
+            ids = conn.execute(text(
+                "SELECT id FROM tasks WHERE id > :after ORDER BY id LIMIT :limit"
+            ), {'after': after, 'limit': self.backfill_batch_size}).scalars().all()
+            if not ids:
+                break
+            conn.execute(text(
+                f"UPDATE tasks SET search_vector = {self.vector_sql()} "
+                "WHERE id BETWEEN :first AND :last AND search_vector IS NULL"
+            ), {'first': ids[0], 'last': ids[-1]})
+            after = ids[-1]
+
+    def build(self, engine):
+        # CONCURRENTLY cannot run in a transaction; each backfill batch commits on its own
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            valid = self._index_valid(conn)
+            if valid:
+                return
+            if valid is False:
+                # Left behind by an interrupted concurrent build
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {self.index_name}"))
+
+            if not self._generated(conn):
+                self._backfill(conn)
+            conn.execute(text(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {self.index_name} ON tasks USING GIN (search_vector)"
+            ))
+
+    def _tsquery(self, search_query):
+        terms = search_terms(search_query)
+        if not terms:
+            return None
+        return func.to_tsquery('simple', ' & '.join(f'{term}:*' for term in terms))
+
+    def filter(self, query, search_query):
+        tsquery = self._tsquery(search_query)
+        if tsquery is None:
+            return query
+        return query.filter(self.search_vector.op('@@')(tsquery))
+
+    def relevance(self, search_query):
+        tsquery = self._tsquery(search_query)
+        if tsquery is None:
+            return None
+        return func.ts_rank_cd(self.search_vector, tsquery)
+
+_backends = {}
+
+def _detect_backend(engine):
+    inspector = inspect(engine)
+    if engine.dialect.name == 'postgresql':
+        # The index is built last, once every row has its search_vector
+        if PostgresFtsBackend.index_name in {index['name'] for index in inspector.get_indexes('tasks')}:
+            return PostgresFtsBackend()
+    elif engine.dialect.name == 'sqlite':
+        if inspector.has_table('tasks_fts'):
+            return SqliteFtsBackend()
+    return LikeSearchBackend()
+
+def get_search_backend(engine=None):
+    """Return the search backend for the current database, detected once per engine"""
+    engine = engine or db.engine
+    if engine not in _backends:
+        _backends[engine] = _detect_backend(engine)
+    return _backends[engine]
+
+def setup_search():
+    """Create the full-text index for the current database, if it supports one"""
+    engine = db.engine
+    if engine.dialect.name == 'postgresql':
+        backend = PostgresFtsBackend()
+    elif engine.dialect.name == 'sqlite':
+        backend = SqliteFtsBackend()
+    else:
+        backend = LikeSearchBackend()
+
+    try:
+        with engine.begin() as conn:
+            backend.setup(conn)
+        backend.build(engine)
+    except Exception as e:
+        # e.g. SQLite built without FTS5, or PostgreSQL older than 11
+        logging.warning(f"Full-text search unavailable, falling back to LIKE: {e}")
+        backend = LikeSearchBackend()
+
+    _backends[engine] = backend
+    return backend
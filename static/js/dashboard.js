@@ -1,13 +1,13 @@
 // Dashboard JavaScript functionality
 
-// Auto-refresh functionality
-let refreshInterval;
+// Live update functionality
+let taskEventSource;
 
 function refreshDashboard() {
-    fetch('/api/dashboard-stats')
-        .then(response => response.json())
-        .then(data => {
-            updateDashboardStats(data);
+    fetchJSONIfChanged('/api/dashboard-stats')
+        .then(result => {
+            if (!result.changed) return;
+            updateDashboardStats(result.data);
             showRefreshIndicator();
         })
         .catch(error => {
@@ -23,6 +23,27 @@ function updateDashboardStats(data) {
     document.getElementById('overdue-tasks').textContent = data.overdue_tasks;
 }
 
+function applyStatsDelta(delta) {
+    const counters = {
+        'total-tasks': delta.total_tasks,
+        'pending-tasks': delta.pending_tasks,
+        'in-progress-tasks': delta.in_progress_tasks,
+        'completed-tasks': delta.completed_tasks,
+        'overdue-tasks': delta.overdue_tasks
+    };
+    let changed = false;
+    Object.entries(counters).forEach(([id, change]) => {
+        const element = document.getElementById(id);
+        if (element && change) {
+            element.textContent = (parseInt(element.textContent) || 0) + change;
+            changed = true;
+        }
+    });
+    if (changed) {
+        showRefreshIndicator();
+    }
+}
+
 function showRefreshIndicator() {
     // Create a subtle refresh indicator
     let indicator = document.getElementById('refresh-indicator');
@@ -66,8 +87,12 @@ document.addEventListener('DOMContentLoaded', function() {
     // Animate counters on load
     animateCounters();
     
-    // Set up auto-refresh
-    refreshInterval = setInterval(refreshDashboard, 30000);
+    // Live updates, falling back to polling every 30s while the stream is down
+    taskEventSource = subscribeToTaskEvents({
+        onEvent: data => applyStatsDelta(data.stats_delta),
+        onResync: refreshDashboard,
+        poll: refreshDashboard
+    });
     
     // Add refresh button functionality
     const refreshButton = document.createElement('button');
@@ -78,12 +103,6 @@ document.addEventListener('DOMContentLoaded', function() {
     document.body.appendChild(refreshButton);
     feather.replace();
     
-    // Clean up on page unload
-    window.addEventListener('beforeunload', function() {
-        if (refreshInterval) {
-            clearInterval(refreshInterval);
-        }
-    });
 });
 
 // Chart color schemes
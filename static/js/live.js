@@ -0,0 +1,80 @@
+// Live task updates over Server-Sent Events, with polling as a fallback
+
+const TASK_EVENT_TYPES = ['task.created', 'task.updated', 'task.deleted'];
+
+// Last ETag and body per URL, for conditional GETs
+const conditionalResponses = new Map();
+
+function fetchJSONIfChanged(url, options) {
+    // Resolves to {changed, data}; on 304 Not Modified, data is the previous body
+    const previous = conditionalResponses.get(url);
+    const headers = Object.assign({}, (options || {}).headers);
+    if (previous) {
+        headers['If-None-Match'] = previous.etag;
+    }
+    
+    return fetch(url, Object.assign({}, options, {headers: headers, cache: 'no-store'}))
+        .then(response => {
+            if (response.status === 304 && previous) {
+                return {changed: false, data: previous.data};
+            }
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            return response.json().then(data => {
+                const etag = response.headers.get('ETag');
+                if (etag) {
+                    conditionalResponses.set(url, {etag: etag, data: data});
+                }
+                return {changed: true, data: data};
+            });
+        });
+}
+
+function subscribeToTaskEvents(options) {
+    // options.onEvent(data): a task event scoped to the current user
+    // options.onResync(): reload state after (re)connecting or missing events
+    // options.poll(): called every pollInterval ms while the stream is down
+    const pollInterval = options.pollInterval || 30000;
+    let pollTimer = null;
+    
+    function startPolling() {
+        if (!pollTimer) {
+            pollTimer = setInterval(options.poll, pollInterval);
+        }
+    }
+    
+    function stopPolling() {
+        if (pollTimer) {
+            clearInterval(pollTimer);
+            pollTimer = null;
+        }
+    }
+    
+    if (!window.EventSource) {
+        startPolling();
+        return null;
+    }
+    
+    const source = new EventSource('/api/events');
+    source.addEventListener('open', function() {
+        stopPolling();
+        options.onResync();
+    });
+    TASK_EVENT_TYPES.forEach(type => {
+        source.addEventListener(type, event => options.onEvent(JSON.parse(event.data)));
+    });
+    source.addEventListener('resync', options.onResync);
+    source.addEventListener('error', function() {
+        // EventSource reconnects by itself after network errors, but not after
+        // the server refuses the stream (all its slots taken); poll meanwhile
+        startPolling();
+    });
+    
+    window.addEventListener('beforeunload', function() {
+        source.close();
+        stopPolling();
+    });
+    
+    return source;
+}
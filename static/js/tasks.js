@@ -1,36 +1,144 @@
 // Tasks page JavaScript functionality
 
-// Auto-refresh for tasks list
-let tasksRefreshInterval;
+// Live updates for tasks list
+let tasksEventSource;
+let tasksSyncTimeout;
+
+function scheduleTasksSync() {
+    // Coalesce bursts of events into one delta sync
+    clearTimeout(tasksSyncTimeout);
+    tasksSyncTimeout = setTimeout(syncTasksList, 300);
+}
 
 function refreshTasksList() {
-    // Get current URL with all filters
-    const currentUrl = window.location.href;
+    // Fetch the current page of tasks as JSON, keeping all filters and the cursor
+    fetchJSONIfChanged('/api/tasks' + window.location.search, {
+        headers: {
+            'X-Requested-With': 'XMLHttpRequest'
+        }
+    })
+    .then(result => {
+        const tbody = document.getElementById('tasks-table-body');
+        if (!tbody || !result.changed) return;
+        
+        const data = result.data;
+        tbody.innerHTML = data.tasks.map(renderTaskRow).join('');
+        tbody.dataset.syncToken = data.sync_token;
+        initializeTaskRows();
+        feather.replace();
+        showRefreshIndicator();
+    })
+    .catch(error => {
+        console.error('Error refreshing tasks:', error);
+    });
+}
+
+function syncTasksList() {
+    // Fetch only what changed since the last sync and patch individual rows
+    const tbody = document.getElementById('tasks-table-body');
+    if (!tbody) return;
+    
+    const params = new URLSearchParams(window.location.search);
+    params.set('since', tbody.dataset.syncToken || '');
     
-    fetch(currentUrl, {
+    fetch('/api/tasks/changes?' + params.toString(), {
         headers: {
             'X-Requested-With': 'XMLHttpRequest'
         }
     })
-    .then(response => response.text())
-    .then(html => {
-        // Parse the response and update only the table
-        const parser = new DOMParser();
-        const doc = parser.parseFromString(html, 'text/html');
-        const newTable = doc.querySelector('.table-responsive');
-        const currentTable = document.querySelector('.table-responsive');
+    .then(response => response.json())
+    .then(data => {
+        if (data.reset) {
+            refreshTasksList();
+            return;
+        }
+        
+        let needsReload = false;
+        data.deleted.forEach(taskId => {
+            const row = tbody.querySelector(`tr[data-task-id="${taskId}"]`);
+            if (row) row.remove();
+        });
+        data.changed.forEach(task => {
+            const row = tbody.querySelector(`tr[data-task-id="${task.id}"]`);
+            if (row && task.matches_filters) {
+                row.outerHTML = renderTaskRow(task);
+            } else if (row) {
+                row.remove();
+            } else if (task.matches_filters) {
+                // A new row's position depends on sort and paging; let the server place it
+                needsReload = true;
+            }
+        });
+        
+        if (needsReload) {
+            refreshTasksList();
+            return;
+        }
         
-        if (newTable && currentTable) {
-            currentTable.innerHTML = newTable.innerHTML;
+        tbody.dataset.syncToken = data.sync_token;
+        if (data.changed.length || data.deleted.length) {
+            initializeTaskRows();
             feather.replace();
             showRefreshIndicator();
         }
     })
     .catch(error => {
-        console.error('Error refreshing tasks:', error);
+        console.error('Error syncing tasks:', error);
     });
 }
 
+function escapeHtml(value) {
+    const div = document.createElement('div');
+    div.textContent = value == null ? '' : String(value);
+    return div.innerHTML;
+}
+
+function titleCase(value) {
+    return value.replace(/_/g, ' ').replace(/\w\S*/g, word => word.charAt(0).toUpperCase() + word.slice(1).toLowerCase());
+}
+
+// Build a table row matching templates/tasks.html from an /api/tasks item
+function renderTaskRow(task) {
+    let taskCell = `<strong>${escapeHtml(task.title)}</strong>`;
+    if (task.description) {
+        const description = task.description.length > 100 ? task.description.slice(0, 100) + '...' : task.description;
+        taskCell += `<br><small class="text-muted">${escapeHtml(description)}</small>`;
+    }
+    if (task.category) {
+        taskCell += `<br><span class="badge bg-light text-dark">${escapeHtml(task.category)}</span>`;
+    }
+    
+    let dueCell = '<span class="text-muted">No due date</span>';
+    if (task.due_date) {
+        dueCell = task.due_date.split('T')[0];
+        if (task.due_state === 'overdue') {
+            dueCell += '<br><small class="text-danger"><i data-feather="alert-triangle"></i> Overdue</small>';
+        } else if (task.due_state === 'due_soon') {
+            dueCell += '<br><small class="text-warning"><i data-feather="clock"></i> Due soon</small>';
+        }
+    }
+    
+    let actions = '';
+    if (task.can_edit) {
+        actions += `<a href="/tasks/${task.id}/edit" class="btn btn-outline-primary"><i data-feather="edit-2"></i></a>`;
+    }
+    if (task.can_delete) {
+        actions += `<form method="POST" action="/tasks/${task.id}/delete" class="d-inline" onsubmit="return confirm('Are you sure you want to delete this task?')">
+                <button type="submit" class="btn btn-outline-danger"><i data-feather="trash-2"></i></button>
+            </form>`;
+    }
+    
+    return `<tr data-task-id="${task.id}">
+        <td>${taskCell}</td>
+        <td>${escapeHtml(task.assignee_name)}</td>
+        <td><span class="badge ${task.status_badge_class}">${titleCase(task.status)}</span></td>
+        <td><span class="badge ${task.priority_badge_class}">${titleCase(task.priority)}</span></td>
+        <td>${dueCell}</td>
+        <td>${task.created_at ? task.created_at.split('T')[0] : ''}</td>
+        <td><div class="btn-group btn-group-sm">${actions}</div></td>
+    </tr>`;
+}
+
 function showRefreshIndicator() {
     let indicator = document.getElementById('tasks-refresh-indicator');
     if (!indicator) {
@@ -105,9 +213,8 @@ function filterByPriority(priority) {
 }
 
 function filterOverdue() {
-    // This would require backend support to filter overdue tasks
-    // For now, we'll sort by due date and show pending/in_progress
-    document.getElementById('status').value = '';
+    document.getElementById('overdue').checked = true;
+    document.getElementById('due_within').value = '';
     document.getElementById('sort').value = 'due_date';
     document.getElementById('order').value = 'asc';
     document.querySelector('form').submit();
@@ -117,6 +224,10 @@ function filterOverdue() {
 function initializeTaskRows() {
     const rows = document.querySelectorAll('tbody tr');
     rows.forEach(row => {
+        // Rows kept across a sync are already wired up
+        if (row.dataset.initialized) return;
+        row.dataset.initialized = 'true';
+        
         // Add click handler to expand/collapse task details
         row.addEventListener('click', function(e) {
             if (e.target.closest('.btn-group')) return; // Ignore button clicks
@@ -227,31 +338,6 @@ function initializeKeyboardShortcuts() {
     });
 }
 
-// Export functionality
-function exportTasksToCSV() {
-    const table = document.querySelector('.table');
-    if (!table) return;
-    
-    const rows = Array.from(table.rows);
-    const csvContent = rows.map(row => {
-        const cells = Array.from(row.cells);
-        return cells.map(cell => {
-            const text = cell.textContent.trim().replace(/\s+/g, ' ');
-            return `"${text.replace(/"/g, '""')}"`;
-        }).join(',');
-    }).join('\n');
-    
-    const blob = new Blob([csvContent], { type: 'text/csv;charset=utf-8;' });
-    const link = document.createElement('a');
-    const url = URL.createObjectURL(blob);
-    link.setAttribute('href', url);
-    link.setAttribute('download', `tasks_${new Date().toISOString().split('T')[0]}.csv`);
-    link.style.visibility = 'hidden';
-    document.body.appendChild(link);
-    link.click();
-    document.body.removeChild(link);
-}
-
 // Initialize all functionality
 document.addEventListener('DOMContentLoaded', function() {
     // Create quick filters
@@ -269,24 +355,13 @@ document.addEventListener('DOMContentLoaded', function() {
     // Initialize keyboard shortcuts
     initializeKeyboardShortcuts();
     
-    // Set up auto-refresh
-    tasksRefreshInterval = setInterval(refreshTasksList, 30000);
-    
-    // Add export button
-    const titleDiv = document.querySelector('h1').parentNode;
-    const exportButton = document.createElement('button');
-    exportButton.className = 'btn btn-outline-secondary btn-sm ms-2';
-    exportButton.innerHTML = '<i data-feather="download"></i> Export CSV';
-    exportButton.onclick = exportTasksToCSV;
-    titleDiv.appendChild(exportButton);
-    feather.replace();
-    
-    // Clean up on page unload
-    window.addEventListener('beforeunload', function() {
-        if (tasksRefreshInterval) {
-            clearInterval(tasksRefreshInterval);
-        }
+    // Live updates, falling back to polling every 30s while the stream is down
+    tasksEventSource = subscribeToTaskEvents({
+        onEvent: scheduleTasksSync,
+        onResync: syncTasksList,
+        poll: syncTasksList
     });
+    
 });
 
 // Form validation for task operations
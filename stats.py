@@ -0,0 +1,62 @@
+from datetime import datetime
+from sqlalchemy import func, and_, case
+from app import db
+from models import Task, UserTaskCount
+from teams import in_scope
+from workload import overdue_count
+
+# Keys returned by get_task_stats(), in the order the dashboard cards show them
+STAT_KEYS = ('total_tasks', 'pending_tasks', 'in_progress_tasks', 'completed_tasks', 'overdue_tasks')
+
+def task_stats_query(assignee_ids=None, session=None):
+    """Build one conditional-aggregate query that yields all dashboard counters
+    from the tasks table; get_task_stats() reads the workload counters instead"""
+    now = datetime.utcnow()
+    # count(*) rather than count(id) lets the planner answer from an index alone
+    query = (session or db.session).query(
+        func.count(),
+        func.coalesce(func.sum(case((Task.status == 'pending', 1), else_=0)), 0),
+        func.coalesce(func.sum(case((Task.status == 'in_progress', 1), else_=0)), 0),
+        func.coalesce(func.sum(case((Task.status == 'completed', 1), else_=0)), 0),
+        func.coalesce(func.sum(case(
+            (and_(Task.due_date < now, Task.status != 'completed'), 1), else_=0
+        )), 0),
+    ).select_from(Task)
+    if assignee_ids is not None:
+        query = query.filter(in_scope(Task.assignee_id, assignee_ids))
+    return query
+
+def get_task_stats(user, session=None):
+    """Return the dashboard counters for a user in a single round trip.
+
+    Counters cover the user's task scope: their teams' tasks for managers
+    (every task if they have none, or chose to see all), their own for employees.
+    They are summed from user_task_counts, one row per user in scope, so the
+    cost does not grow with the number of tasks.
+    """
+    counts = UserTaskCount.__table__.c
+    query = (session or db.session).query(
+        func.coalesce(func.sum(counts.task_count), 0),
+        func.coalesce(func.sum(counts.pending_count), 0),
+        func.coalesce(func.sum(counts.in_progress_count), 0),
+        func.coalesce(func.sum(counts.completed_count), 0),
+        func.coalesce(func.sum(overdue_count()), 0),
+    )
+    if user.assignee_ids is not None:
+        query = query.filter(in_scope(counts.user_id, user.assignee_ids))
+    row = query.one()
+    return {key: int(value) for key, value in zip(STAT_KEYS, row)}
+
+def task_stat_contributions(snapshot, now=None):
+    """Return how much a single task (a task_snapshot() dict, or None) adds to each counter"""
+    counts = dict.fromkeys(STAT_KEYS, 0)
+    if snapshot is None:
+        return counts
+    now = now or datetime.utcnow()
+    counts['total_tasks'] = 1
+    status_key = f"{snapshot['status']}_tasks"
+    if status_key in counts:
+        counts[status_key] = 1
+    if snapshot['due_date'] and snapshot['due_date'] < now and snapshot['status'] != 'completed':
+        counts['overdue_tasks'] = 1
+    return counts
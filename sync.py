@@ -0,0 +1,87 @@
+import base64
+import binascii
+from datetime import datetime, timedelta
+from app import db
+from models import Task, TaskTombstone
+from replicas import reading_from_replica
+from config import REPLICA_MAX_LAG_SECONDS
+from teams import in_scope
+
+# Changes are re-sent for this long after a token was issued, so rows whose
+# transaction committed slightly after their updated_at was stamped are not missed
+SYNC_OVERLAP = timedelta(seconds=5)
+
+# Tombstones older than this are pruned; older tokens get a full reset
+TOMBSTONE_RETENTION = timedelta(days=7)
+
+# Above this many changed rows a full reload is cheaper than patching
+MAX_CHANGES = 500
+
+def current_sync_token():
+    """Return an opaque token marking the current point in time"""
+    issued = datetime.utcnow()
+    if reading_from_replica():
+        # The replica may not have the latest commits yet; have the next sync re-check them
+        issued -= timedelta(seconds=REPLICA_MAX_LAG_SECONDS)
+    return base64.urlsafe_b64encode(issued.isoformat().encode()).decode().rstrip('=')
+
+def decode_sync_token(token):
+    """Return the datetime a token was issued at, or None if it is invalid or expired"""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        since = datetime.fromisoformat(base64.urlsafe_b64decode(padded).decode())
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        return None
+    if since < datetime.utcnow() - TOMBSTONE_RETENTION:
+        return None
+    return since
+
+def record_task_removal(task_id, assignee_id, reason='deleted'):
+    """Add a tombstone for a task leaving an assignee's scope.
+
+    The caller commits it together with the delete or reassignment.
+    """
+    db.session.add(TaskTombstone(task_id=task_id, assignee_id=assignee_id, reason=reason))
+    _prune_tombstones()
+
+def record_task_removals(removals, reason='deleted'):
+    """Add tombstones for many (task id, assignee id) pairs in one multi-row insert"""
+    if not removals:
+        return
+    removed_at = datetime.utcnow()
+    db.session.execute(TaskTombstone.__table__.insert(), [
+        {'task_id': task_id, 'assignee_id': assignee_id, 'reason': reason, 'removed_at': removed_at}
+        for task_id, assignee_id in removals
+    ])
+    _prune_tombstones()
+
+def _prune_tombstones():
+    TaskTombstone.query.filter(
+        TaskTombstone.removed_at < datetime.utcnow() - TOMBSTONE_RETENTION
+    ).delete(synchronize_session=False)
+
+def changed_tasks(scope_query, since):
+    """Return tasks in the scope updated since a point in time, oldest first.
+
+    Returns None when there are more than MAX_CHANGES, meaning the client should reload.
+    """
+    tasks = scope_query.filter(
+        Task.updated_at >= since - SYNC_OVERLAP
+    ).order_by(Task.updated_at.asc(), Task.id.asc()).limit(MAX_CHANGES + 1).all()
+    if len(tasks) > MAX_CHANGES:
+        return None
+    return tasks
+
+def removed_task_ids(user, since):
+    """Return ids of tasks that left the user's scope since a point in time"""
+    query = db.session.query(TaskTombstone.task_id).filter(
+        TaskTombstone.removed_at >= since - SYNC_OVERLAP
+    )
+    if user.assignee_ids is None:
+        # Managers seeing every task lose a row only to a real delete
+        query = query.filter(TaskTombstone.reason == 'deleted')
+    else:
+        query = query.filter(in_scope(TaskTombstone.assignee_id, user.assignee_ids))
+    return sorted({task_id for (task_id,) in query})
@@ -0,0 +1,98 @@
+from sqlalchemy import func, select
+from app import db
+from models import Task, Tag, task_tags
+
+MAX_TAG_LENGTH = 50
+MAX_FACETS = 20
+
+def normalize_tag_names(tags_string):
+    """Split a comma-separated tag string into unique, lowercased names, keeping order"""
+    names = []
+    for raw in (tags_string or '').split(','):
+        name = ' '.join(raw.split()).lower()[:MAX_TAG_LENGTH]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+def get_or_create_tags(names):
+    """Return Tag rows for the given names, creating the missing ones in one batch"""
+    if not names:
+        return []
+    existing = {tag.name: tag for tag in Tag.query.filter(Tag.name.in_(names))}
+    for name in names:
+        if name not in existing:
+            existing[name] = Tag(name=name)
+            db.session.add(existing[name])
+    return [existing[name] for name in names]
+
+def set_task_tags(task, tags_string):
+    """Set a task's tags from form input, updating both the text column and task_tags"""
+    names = normalize_tag_names(tags_string)
+    task.tags = ', '.join(names) or None
+    task.tag_list = get_or_create_tags(names)
+
+def tagged_task_ids(tag_name):
+    """Subquery of ids of tasks carrying a tag, driven by the tag index"""
+    return select(task_tags.c.task_id).join(Tag, Tag.id == task_tags.c.tag_id).where(
+        Tag.name == tag_name.strip().lower()
+    )
+
+def tag_facets(task_query=None, limit=MAX_FACETS):
+    """Return (tag name, task count) for the most used tags among a query's tasks.
+
+    With no query, counts over all tasks straight from the tag index.
+    """
+    count = func.count(task_tags.c.task_id)
+    query = db.session.query(Tag.name, count).join(task_tags, task_tags.c.tag_id == Tag.id)
+    if task_query is not None:
+        query = query.filter(task_tags.c.task_id.in_(task_query.with_entities(Task.id).order_by(None)))
+    return query.group_by(Tag.name).order_by(count.desc(), Tag.name).limit(limit).all()
+
+def backfill_task_tags(batch_size=5000):
+    """Populate tags and task_tags from the comma-separated Task.tags column.
+
+    One-shot bulk migration for databases created before task_tags existed.
+    Returns the number of task-tag links created.
+    """
+    tasks_table = Task.__table__
+    tags_table = Tag.__table__
+
+    # Pass 1: collect every tag name and insert the missing ones in bulk
+    names = set()
+    rows = db.session.execute(
+        select(tasks_table.c.tags).where(tasks_table.c.tags.isnot(None))
+    ).yield_per(batch_size)
+    for (tags_string,) in rows:
+        names.update(normalize_tag_names(tags_string))
+
+    existing = {name for (name,) in db.session.execute(select(tags_table.c.name))}
+    missing = [{'name': name} for name in sorted(names - existing)]
+    if missing:
+        db.session.execute(tags_table.insert(), missing)
+    tag_ids = dict(db.session.execute(select(tags_table.c.name, tags_table.c.id)).all())
+
+    # Pass 2: walk tasks in id order and insert their links one batch at a time
+    created = 0
+    last_id = 0
+    while True:
+        batch = db.session.execute(
+            select(tasks_table.c.id, tasks_table.c.tags).where(
+                tasks_table.c.id > last_id, tasks_table.c.tags.isnot(None)
+            ).order_by(tasks_table.c.id).limit(batch_size)
+        ).all()
+        if not batch:
+            break
+        last_id = batch[-1][0]
+
+        already_linked = {task_id for (task_id,) in db.session.execute(
+            select(task_tags.c.task_id).where(task_tags.c.task_id.in_([row[0] for row in batch])).distinct()
+        )}
+        links = [{'task_id': task_id, 'tag_id': tag_ids[name]}
+                 for task_id, tags_string in batch if task_id not in already_linked
+                 for name in normalize_tag_names(tags_string)]
+        if links:
+            db.session.execute(task_tags.insert(), links)
+            created += len(links)
+
+    db.session.commit()
+    return created
@@ -0,0 +1,22 @@
+from app import db
+from models import Team, TeamMember
+
+# A manager's task views show their teams' tasks by default; ALL_SCOPE, kept
+# in the session, widens them to every task
+TEAM_SCOPE = 'team'
+ALL_SCOPE = 'all'
+TASK_SCOPES = (TEAM_SCOPE, ALL_SCOPE)
+
+def team_member_ids(manager_id, session=None):
+    """Ids of everyone in the teams a user manages, from one indexed join"""
+    rows = (session or db.session).query(TeamMember.user_id).join(
+        Team, Team.id == TeamMember.team_id
+    ).filter(Team.manager_id == manager_id).distinct()
+    return frozenset(user_id for (user_id,) in rows)
+
+def in_scope(column, assignee_ids):
+    """Filter an assignee column to a task scope's assignee ids"""
+    if len(assignee_ids) == 1:
+        # Plain equality keeps the single-assignee plans employees always had
+        return column == next(iter(assignee_ids))
+    return column.in_(sorted(assignee_ids))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Bring an existing Task Tracker database up to date with models.py
+Creates missing tables and indexes and backfills data they need. Safe to run repeatedly.
+Usage: python upgrade_db.py
+"""
+
+from sqlalchemy import inspect
+from app import app, db
+from models import task_tags
+from search import setup_search
+from tags import backfill_task_tags
+from rollups import check_task_daily_stats, rebuild_task_daily_stats
+from workload import check_user_task_counts, rebuild_user_task_counts
+
+def create_missing_indexes():
+    """Create every index declared on the models that the database lacks"""
+    engine = db.engine
+    inspector = inspect(engine)
+    created = []
+
+    for table in db.metadata.sorted_tables:
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if index.name in existing:
+                continue
+
+            print(f"Creating index {index.name} on {table.name}...")
+            if engine.dialect.name == 'postgresql':
+                # Build without blocking writes; CONCURRENTLY cannot run in a transaction
+                index.dialect_options['postgresql']['concurrently'] = True
+                with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+                    index.create(conn)
+                index.dialect_options['postgresql']['concurrently'] = False
+            else:
+                with engine.begin() as conn:
+                    index.create(conn)
+            created.append(index.name)
+
+    return created
+
+def upgrade():
+    with app.app_context():
+        print("Task Tracker - Database Upgrade")
+        print("=" * 40)
+
+        # New tables (create_all never alters existing ones)
+        db.create_all()
+
+        created = create_missing_indexes()
+        
+        backend = setup_search()
+        print(f"Search backend: {backend.name}")
+        
+        if not db.session.query(task_tags).first():
+            links = backfill_task_tags()
+            if links:
+                print(f"Linked {links} task tags from the old tags column")
+        
+        # Checked rather than filled only when empty: a worker already on the
+        # new code may have written rollup rows before this ran
+        mismatches = check_task_daily_stats()
+        if mismatches:
+            rows = rebuild_task_daily_stats()
+            print(f"Rebuilt {rows} analytics rollup rows (out of date: {len(mismatches)})")
+        
+        # Likewise for the workload counters
+        mismatches = check_user_task_counts()
+        if mismatches:
+            rows = rebuild_user_task_counts()
+            print(f"Rebuilt workload counters for {rows} users (out of date for {len(mismatches)})")
+        
+        if created:
+            print(f"\n✅ Created {len(created)} indexes")
+        else:
+            print("\n✅ Database already up to date")
+
+if __name__ == "__main__":
+    upgrade()
@@ -0,0 +1,150 @@
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
+from app import db
+from models import User
+from passwords import get_hashing_service, BULK_PROCESSES
+
+REQUIRED_FIELDS = ('username', 'email', 'first_name', 'last_name', 'password')
+ROLES = ('employee', 'manager')
+MIN_PASSWORD_LENGTH = 6
+DEFAULT_BATCH_SIZE = 1000
+
+def read_rows(path, file_format=None):
+    """Yield (line number, row dict) from a CSV or JSONL file, one line at a time"""
+    file_format = file_format or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        if file_format == 'csv':
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+            return
+
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                row = {'_error': f"Invalid JSON: {e}"}
+            if not isinstance(row, dict):
+                row = {'_error': "Expected a JSON object"}
+            yield line_number, row
+
+class ImportReport:
+    """Outcome of an import: created usernames and one error entry per rejected row"""
+
+    def __init__(self):
+        self.created = []
+        self.errors = []
+
+    def reject(self, line_number, row, message):
+        self.errors.append((line_number, row.get('username', ''), row.get('email', ''), message))
+
+    def write_csv(self, path):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['line', 'username', 'email', 'error'])
+            writer.writerows(sorted(self.errors))
+
+def clean_row(row):
+    """Return (user values, None) for a valid row, or (None, error message)"""
+    if row.get('_error'):
+        return None, row['_error']
+
+    values = {key: str(row.get(key) or '').strip() for key in
+              (*REQUIRED_FIELDS, 'role', 'department')}
+    missing = [field for field in REQUIRED_FIELDS if not values[field]]
+    if missing:
+        return None, f"Missing {', '.join(missing)}"
+    if '@' not in values['email']:
+        return None, "Invalid email"
+    if len(values['password']) < MIN_PASSWORD_LENGTH:
+        return None, f"Password must be at least {MIN_PASSWORD_LENGTH} characters"
+
+    values['role'] = values['role'].lower() or 'employee'
+    if values['role'] not in ROLES:
+        return None, f"Role must be one of: {', '.join(ROLES)}"
+    values['department'] = values['department'] or None
+    return values, None
+
+def _existing(usernames, emails):
+    """Usernames and emails already taken, in one query for the whole batch"""
+    rows = db.session.execute(
+        select(User.username, User.email).where(or_(User.username.in_(usernames), User.email.in_(emails)))
+    ).all()
+    return {row.username for row in rows}, {row.email for row in rows}
+
+def _insert_batch(rows, report):
+    users = User.__table__
+    try:
+        db.session.execute(users.insert(), [values for _, values in rows])
+        db.session.commit()
+        report.created.extend(values['username'] for _, values in rows)
+    except IntegrityError:
+        # Someone else took a name after our check; find the row(s) one by one
+        db.session.rollback()
+        for line_number, values in rows:
+            try:
+                db.session.execute(users.insert(), [values])
+                db.session.commit()
+                report.created.append(values['username'])
+            except IntegrityError:
+                db.session.rollback()
+                report.reject(line_number, values, "Username or email already exists")
+
+def _import_batch(batch, report, seen_usernames, seen_emails, pool):
+    valid = []
+    for line_number, row in batch:
+        values, error = clean_row(row)
+        if error:
+            report.reject(line_number, row, error)
+        elif values['username'] in seen_usernames:
+            report.reject(line_number, values, "Duplicate username in file")
+        elif values['email'] in seen_emails:
+            report.reject(line_number, values, "Duplicate email in file")
+        else:
+            seen_usernames.add(values['username'])
+            seen_emails.add(values['email'])
+            valid.append((line_number, values))
+    if not valid:
+        return
+
+    taken_usernames, taken_emails = _existing([v['username'] for _, v in valid], [v['email'] for _, v in valid])
+    rows = []
+    for line_number, values in valid:
+        if values['username'] in taken_usernames:
+            report.reject(line_number, values, "Username already exists")
+        elif values['email'] in taken_emails:
+            report.reject(line_number, values, "Email already exists")
+        else:
+            rows.append((line_number, values))
+    if not rows:
+        return
+
+    hashes = get_hashing_service().hash_many([values.pop('password') for _, values in rows], pool=pool)
+    for (_, values), password_hash in zip(rows, hashes):
+        values['password_hash'] = password_hash
+        values['is_active'] = True
+    _insert_batch(rows, report)
+
+def import_users(rows, batch_size=DEFAULT_BATCH_SIZE, processes=BULK_PROCESSES):
+    """Create users from (line number, row dict) pairs in batches; returns an ImportReport.
+
+    Each batch costs one duplicate-check query and one multi-row insert, and
+    its passwords are hashed in parallel on a process pool shared by all batches.
+    """
+    report = ImportReport()
+    seen_usernames, seen_emails = set(), set()
+    rows = iter(rows)
+    with ProcessPoolExecutor(max_workers=processes or os.cpu_count() or 1) as pool:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            _import_batch(batch, report, seen_usernames, seen_emails, pool)
+    return report
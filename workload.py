@@ -0,0 +1,182 @@
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import select, func, case, literal
+from app import db
+from models import User, Task, UserTaskCount
+from teams import in_scope
+from counters import upsert, compare_counters
+
+# Open tasks past their due date are overdue. Listing the open statuses,
+# rather than excluding 'completed', lets the overdue seeks below stay on
+# the (assignee_id, status, due_date) index.
+OPEN_STATUSES = ('pending', 'in_progress')
+
+STATUS_COLUMNS = {'pending': 'pending_count', 'in_progress': 'in_progress_count', 'completed': 'completed_count'}
+COUNT_COLUMNS = ('task_count', 'pending_count', 'in_progress_count', 'completed_count',
+                 'estimated_hours', 'actual_hours')
+HOURS_COLUMNS = ('estimated_hours', 'actual_hours')
+
+class WorkloadDelta:
+    """Changes to one user's counters: amounts to add, and the due dates of open
+    tasks gained (+1) or lost (-1), which count as overdue only if due before
+    the row's overdue_as_of"""
+    __slots__ = ('counts', 'open_due')
+
+    def __init__(self):
+        self.counts = dict.fromkeys(COUNT_COLUMNS, 0)
+        self.open_due = Counter()
+
+    def __bool__(self):
+        return any(self.counts.values()) or any(self.open_due.values())
+
+def add_workload_contribution(deltas, values, sign):
+    """Add (sign=1) or remove (sign=-1) one task from a {user id: WorkloadDelta} map"""
+    if values['assignee_id'] is None:
+        return
+    delta = deltas.setdefault(int(values['assignee_id']), WorkloadDelta())
+    counts = delta.counts
+    counts['task_count'] += sign
+    if values['status'] in STATUS_COLUMNS:
+        counts[STATUS_COLUMNS[values['status']]] += sign
+    for name in HOURS_COLUMNS:
+        counts[name] += sign * (values[name] or 0)
+    if values['status'] in OPEN_STATUSES and values['due_date'] is not None:
+        delta.open_due[values['due_date']] += sign
+
+def _overdue_before(as_of, open_due):
+    """SQL for the net count of open_due dates before as_of.
+
+    One CASE over running totals, latest date first, so a large batch stays
+    a flat expression rather than a sum of one term per task.
+    """
+    whens, running = [], 0
+    for due_date, sign in sorted(open_due.items()):
+        if sign:
+            running += sign
+            whens.append((as_of > due_date, running))
+    if not whens:
+        return literal(0)
+    return case(*reversed(whens), else_=0)
+
+def _upsert(connection, user_id, delta, now):
+    table = UserTaskCount.__table__
+    # A new row starts its overdue count at now
+    overdue = sum(sign for due_date, sign in delta.open_due.items() if due_date < now)
+    row = dict(delta.counts, user_id=user_id, overdue_count=overdue, overdue_as_of=now)
+    changes = {name: table.c[name] + value for name, value in delta.counts.items() if value}
+    changes['overdue_count'] = table.c.overdue_count + _overdue_before(table.c.overdue_as_of, delta.open_due)
+    upsert(connection, table, ('user_id',), row, changes)
+
+def apply_workload_deltas(connection, deltas, now=None):
+    """Add a {user id: WorkloadDelta} map to user_task_counts"""
+    now = now or datetime.utcnow()
+    # In user order, so concurrent writers lock rows in the same order
+    for user_id, delta in sorted(deltas.items()):
+        if delta:
+            _upsert(connection, user_id, delta, now)
+
+# Reading the counters
+
+def overdue_count(now=None):
+    """A user_task_counts row's overdue count at now.
+
+    The stored count plus the open tasks that fell due since overdue_as_of,
+    or minus those due between now and overdue_as_of if a clock ahead of
+    this one wrote it: one range seek per open status on the
+    (assignee_id, status, due_date) index per row.
+    """
+    now = now or datetime.utcnow()
+    counts = UserTaskCount.__table__.c
+    behind = counts.overdue_as_of > now
+    crossed = select(
+        func.coalesce(func.sum(case((Task.due_date < counts.overdue_as_of, -1), else_=1)), 0)
+    ).where(
+        Task.assignee_id == counts.user_id,
+        Task.status.in_(OPEN_STATUSES),
+        Task.due_date >= case((behind, now), else_=counts.overdue_as_of),
+        Task.due_date < case((behind, counts.overdue_as_of), else_=now),
+    ).scalar_subquery()
+    return counts.overdue_count + crossed
+
+def workload_by_user(assignee_ids=None, session=None, now=None):
+    """Per user with tasks: name, counters and overdue count, one row each.
+
+    assignee_ids narrows it to a team (see Principal.assignee_ids).
+    """
+    counts = UserTaskCount.__table__.c
+    query = (session or db.session).query(
+        User.first_name,
+        User.last_name,
+        counts.task_count.label('total_tasks'),
+        counts.completed_count.label('completed_tasks'),
+        counts.pending_count.label('pending_tasks'),
+        counts.in_progress_count.label('in_progress_tasks'),
+        overdue_count(now).label('overdue_tasks'),
+        counts.estimated_hours,
+        counts.actual_hours,
+    ).join(User, User.id == counts.user_id).filter(counts.task_count > 0)
+    if assignee_ids is not None:
+        query = query.filter(in_scope(counts.user_id, assignee_ids))
+    return query.order_by(User.first_name, User.last_name).all()
+
+# Maintenance: the counters can be recomputed from the tasks table at any time
+
+def _expected_counts(now):
+    """user_task_counts rows as the tasks table says they should be, with overdue as of now"""
+    tasks = Task.__table__.c
+    return select(
+        tasks.assignee_id.label('user_id'),
+        func.count().label('task_count'),
+        *[func.sum(case((tasks.status == status, 1), else_=0)).label(column)
+          for status, column in STATUS_COLUMNS.items()],
+        func.sum(case((tasks.status.in_(OPEN_STATUSES) & (tasks.due_date < now), 1), else_=0)).label('overdue_count'),
+        literal(now).label('overdue_as_of'),
+        func.coalesce(func.sum(tasks.estimated_hours), 0.0).label('estimated_hours'),
+        func.coalesce(func.sum(tasks.actual_hours), 0.0).label('actual_hours'),
+    ).where(tasks.assignee_id.isnot(None)).group_by(tasks.assignee_id)
+
+def rebuild_user_task_counts(now=None):
+    """Recompute user_task_counts from the tasks table in one set-based pass.
+
+    For backfilling the table, or repairing it after bulk writes that bypass
+    the ORM. Returns the number of rows written.
+    """
+    now = now or datetime.utcnow()
+    table = UserTaskCount.__table__
+    expected = _expected_counts(now).subquery()
+    db.session.execute(table.delete())
+    db.session.execute(table.insert().from_select(list(expected.c.keys()), select(expected)))
+    db.session.commit()
+    return db.session.query(func.count()).select_from(table).scalar()
+
+def refresh_overdue_counts(now=None):
+    """Fold the tasks that fell due since each row's overdue_as_of into its stored count.
+
+    Reads are correct without it, but each one seeks over every task that
+    fell due since overdue_as_of; refreshing daily bounds that to a day's worth.
+    Returns the number of rows refreshed.
+    """
+    now = now or datetime.utcnow()
+    table = UserTaskCount.__table__
+    # Lock the rows first: writers holding them commit before the recount's
+    # snapshot, and later ones apply their changes against the new overdue_as_of
+    db.session.execute(select(table.c.user_id).with_for_update()).all()
+    refreshed = db.session.execute(table.update().values(
+        overdue_count=overdue_count(now),
+        # Never move backwards if another server's clock wrote a later one
+        overdue_as_of=case((table.c.overdue_as_of > now, table.c.overdue_as_of), else_=now),
+    )).rowcount
+    db.session.commit()
+    return refreshed
+
+def check_user_task_counts(now=None):
+    """Compare user_task_counts with the tasks table.
+
+    Returns {user id: {column: (stored, expected)}} for every user whose
+    counters are off; empty when they all agree.
+    """
+    now = now or datetime.utcnow()
+    counts = UserTaskCount.__table__.c
+    stored = select(counts.user_id, *[counts[name] for name in COUNT_COLUMNS], overdue_count(now).label('overdue_count'))
+    return compare_counters(stored, _expected_counts(now), lambda row: row.user_id,
+                            (*COUNT_COLUMNS, 'overdue_count'), HOURS_COLUMNS)